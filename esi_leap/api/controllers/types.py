@@ -37,6 +37,8 @@ class JsonType(wtypes.UserType):
 
 
 class Collection(wtypes.Base):
+    next = wtypes.text
+
     @property
     def collection(self):
         return getattr(self, self._type)
@@ -45,16 +47,23 @@ class Collection(wtypes.Base):
         """Return whether collection has more items."""
         return len(self.collection) and len(self.collection) == limit
 
-    def get_next(self, limit, url=None, **kwargs):
-        if not self.has_next(limit):
-            return wtypes.Unset
+    def get_next(self, limit, url=None, marker=None, **kwargs):
+        """Return a link to the next page of the collection.
+
+        :param marker: marker of the next page; defaults to the uuid of the
+            last item when the collection is full
+        """
+        if marker is None:
+            if not self.has_next(limit):
+                return wtypes.Unset
+            marker = getattr(self.collection[-1], "uuid")
 
         url = url or self._type
         q_args = "".join(["%s=%s&" % item for item in kwargs.items()])
         next_args = "?%(args)slimit=%(limit)d&marker=%(marker)s" % {
             "args": q_args,
             "limit": limit,
-            "marker": getattr(self.collection[-1], "uuid"),
+            "marker": marker,
         }
 
         next_link = "%(url)s/v1/%(resource)s%(args)s" % {
@@ -62,7 +62,8 @@ class EventsController(rest.RestController):
         wtypes.text,
         wtypes.text,
         wtypes.text,
-        wtypes.text,
+        int,
+        int,
     )
     def get_all(
         self,
@@ -72,9 +73,12 @@ class EventsController(rest.RestController):
         event_type=None,
         resource_type=None,
         resource_uuid=None,
+        limit=None,
+        marker=None,
     ):
         request = pecan.request.context
         cdict = request.to_policy_values()
+        limit = utils.validate_limit(limit)
 
         try:
             utils.policy_authorize("esi_leap:offer:offer_admin", cdict, cdict)
@@ -99,6 +103,8 @@ class EventsController(rest.RestController):
             "event_type": event_type,
             "resource_type": resource_type,
             "resource_uuid": resource_uuid,
+            "limit": limit,
+            "marker": marker,
         }
 
         # unpack iterator to tuple so we can use 'del'
@@ -123,4 +129,17 @@ class EventsController(rest.RestController):
             )
             event_collection.events.append(e)
 
+        event_collection.next = utils.get_next_link(
+            event_collection,
+            limit,
+            events,
+            marker_attr="id",
+            last_event_id=last_event_id,
+            lessee_or_owner_id=lessee_or_owner_id,
+            last_event_time=last_event_time,
+            event_type=event_type,
+            resource_type=resource_type,
+            resource_uuid=resource_uuid,
+        )
+
         return event_collection
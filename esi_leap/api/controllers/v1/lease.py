@@ -10,7 +10,6 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import concurrent.futures
 import datetime
 import http.client as http_client
 from oslo_utils import uuidutils
@@ -25,7 +24,6 @@ from esi_leap.api.controllers import types
 from esi_leap.api.controllers.v1 import utils
 from esi_leap.common import constants
 from esi_leap.common import exception
-from esi_leap.common import ironic
 from esi_leap.common import keystone
 from esi_leap.common import statuses
 import esi_leap.conf
@@ -79,7 +77,29 @@ class LeaseCollection(types.Collection):
         self._type = "leases"
 
 
+class LeaseSelection(base.ESILEAPBase):
+    lease_uuids = wsme.wsattr([wtypes.text])
+    project_id = wsme.wsattr(wtypes.text)
+    owner_id = wsme.wsattr(wtypes.text)
+    offer_uuid = wsme.wsattr(wtypes.text)
+
+    def __init__(self, **kwargs):
+        self.fields = ("lease_uuids", "project_id", "owner_id", "offer_uuid")
+        for field in self.fields:
+            setattr(self, field, kwargs.get(field, wtypes.Unset))
+
+
+class LeaseExtension(LeaseSelection):
+    end_time = wsme.wsattr(datetime.datetime, mandatory=True)
+
+    def __init__(self, **kwargs):
+        super(LeaseExtension, self).__init__(**kwargs)
+        self.end_time = kwargs.get("end_time", wtypes.Unset)
+
+
 class LeasesController(rest.RestController):
+    _custom_actions = {"bulk_cancel": ["POST"], "bulk_extend": ["POST"]}
+
     @wsme_pecan.wsexpose(Lease, wtypes.text)
     def get_one(self, lease_id):
         request = pecan.request.context
@@ -102,6 +122,9 @@ class LeasesController(rest.RestController):
         wtypes.text,
         wtypes.text,
         wtypes.text,
+        int,
+        wtypes.text,
+        wtypes.text,
     )
     def get_all(
         self,
@@ -115,9 +138,14 @@ class LeasesController(rest.RestController):
         resource_type=None,
         resource_uuid=None,
         resource_class=None,
+        limit=None,
+        marker=None,
+        fields=None,
     ):
         request = pecan.request.context
         cdict = request.to_policy_values()
+        limit = utils.validate_limit(limit)
+        fields = utils.validate_fields(fields, Lease)
 
         if project_id is not None:
             project_id = keystone.get_project_uuid_from_ident(project_id)
@@ -144,6 +172,10 @@ class LeasesController(rest.RestController):
             resource_type=resource_type,
             resource_uuid=resource_uuid,
         )
+        if limit is not None:
+            filters["limit"] = limit
+        if marker is not None:
+            filters["marker"] = marker
 
         lease_collection = LeaseCollection()
         leases = lease_obj.Lease.get_all(filters, request)
@@ -151,31 +183,45 @@ class LeasesController(rest.RestController):
         lease_collection.leases = []
 
         if len(leases) > 0:
-            project_list = None
+            # resource_class is needed to filter even if it is not returned
+            added_fields = fields
+            if fields is not None and resource_class:
+                added_fields = fields + ["resource_class"]
+
             node_list = None
+            if utils.fields_requested(added_fields, *utils.RESOURCE_FIELDS):
+                node_list = utils.get_resource_node_list(leases)
 
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                f1 = executor.submit(ironic.get_node_list)
-                f2 = executor.submit(keystone.get_project_list)
-                node_list = f1.result()
-                project_list = f2.result()
-
-            leases_with_added_info = [
-                Lease(
-                    **utils.lease_get_dict_with_added_info(
-                        lease, project_list, node_list
-                    )
-                )
+            lease_dicts = [
+                utils.lease_get_dict_with_added_info(lease, node_list, added_fields)
                 for lease in leases
             ]
             if resource_class:
-                lease_collection.leases = [
+                lease_dicts = [
                     lease
-                    for lease in leases_with_added_info
-                    if lease.resource_class == resource_class
+                    for lease in lease_dicts
+                    if lease["resource_class"] == resource_class
                 ]
-            else:
-                lease_collection.leases = leases_with_added_info
+            lease_collection.leases = [
+                Lease(**utils.filter_fields(lease, fields)) for lease in lease_dicts
+            ]
+
+        lease_collection.next = utils.get_next_link(
+            lease_collection,
+            limit,
+            leases,
+            project_id=project_id,
+            start_time=start_time,
+            end_time=end_time,
+            status=status,
+            offer_uuid=offer_uuid,
+            view=view,
+            owner_id=owner_id,
+            resource_type=resource_type,
+            resource_uuid=resource_uuid,
+            resource_class=resource_class,
+            fields=",".join(fields) if fields else None,
+        )
 
         return lease_collection
 
@@ -231,6 +277,7 @@ class LeasesController(rest.RestController):
 
         lease = lease_obj.Lease(**lease_dict)
         lease.create(request)
+        utils.schedule_lease(request, lease)
         return Lease(**utils.lease_get_dict_with_added_info(lease))
 
     @wsme_pecan.wsexpose(Lease, wtypes.text, body={wtypes.text: wtypes.text})
@@ -251,6 +298,7 @@ class LeasesController(rest.RestController):
         )
         updates = {"end_time": new_end_time}
         lease.update(updates, request)
+        utils.schedule_lease(request, lease)
 
         return Lease(**utils.lease_get_dict_with_added_info(lease))
 
@@ -264,6 +312,72 @@ class LeasesController(rest.RestController):
 
         lease.cancel(request)
 
+    @wsme_pecan.wsexpose(LeaseCollection, body=LeaseSelection)
+    def bulk_cancel(self, selection):
+        request = pecan.request.context
+
+        leases = LeasesController._get_selected_leases(
+            request, selection, "esi_leap:lease:delete", statuses.LEASE_CAN_DELETE
+        )
+        leases = lease_obj.Lease.cancel_many(leases, request)
+        if leases:
+            utils.cancel_leases(request)
+
+        return LeasesController._get_lease_collection(leases)
+
+    @wsme_pecan.wsexpose(LeaseCollection, body=LeaseExtension)
+    def bulk_extend(self, extension):
+        request = pecan.request.context
+
+        leases = LeasesController._get_selected_leases(
+            request, extension, "esi_leap:lease:update", statuses.LEASE_CAN_EXPIRE
+        )
+        lease_obj.Lease.extend_many(leases, extension.end_time, request)
+        for lease in leases:
+            utils.schedule_lease(request, lease)
+
+        return LeasesController._get_lease_collection(leases)
+
+    @staticmethod
+    def _get_selected_leases(request, selection, policy_name, status_filters):
+        lease_uuids = selection.lease_uuids or None
+        filters = {
+            name: getattr(selection, name)
+            for name in ("project_id", "owner_id", "offer_uuid")
+            if getattr(selection, name)
+        }
+        if bool(lease_uuids) == bool(filters):
+            raise exception.LeaseInvalidSelection()
+
+        if lease_uuids:
+            return utils.check_leases_policy_and_retrieve(
+                request, policy_name, lease_uuids, status_filters
+            )
+
+        for name in ("project_id", "owner_id"):
+            if name in filters:
+                filters[name] = keystone.get_project_uuid_from_ident(filters[name])
+        filters = LeasesController._lease_get_all_authorize_filters(
+            request.to_policy_values(), **filters
+        )
+        filters["status"] = status_filters
+
+        leases = lease_obj.Lease.get_all(filters, request)
+        utils.check_leases_policy(request, policy_name, leases)
+        return leases
+
+    @staticmethod
+    def _get_lease_collection(leases):
+        lease_collection = LeaseCollection()
+        lease_collection.leases = []
+        if leases:
+            node_list = utils.get_resource_node_list(leases)
+            lease_collection.leases = [
+                Lease(**utils.lease_get_dict_with_added_info(lease, node_list))
+                for lease in leases
+            ]
+        return lease_collection
+
     @staticmethod
     def _lease_get_all_authorize_filters(
         cdict,
@@ -277,6 +391,10 @@ class LeasesController(rest.RestController):
         resource_type=None,
         resource_uuid=None,
     ):
+        # leases that can be archived may have moved to the history table
+        include_history = CONF.archive.query_history and (
+            status == "any" or status in statuses.LEASE_CAN_ARCHIVE
+        )
         if status is not None:
             status = [status] if status != "any" else None
         else:
@@ -298,6 +416,8 @@ class LeasesController(rest.RestController):
             "resource_uuid": resource_uuid,
             "time_filter_type": constants.WITHIN_TIME_FILTER,
         }
+        if include_history:
+            filters["include_history"] = True
 
         if view == "all":
             utils.policy_authorize("esi_leap:lease:lease_admin", cdict, cdict)
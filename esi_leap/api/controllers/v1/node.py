@@ -10,7 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import concurrent.futures
+import collections
 from datetime import datetime
 import pecan
 from pecan import rest
@@ -93,15 +93,10 @@ class NodesController(rest.RestController):
             "lessee": lessee,
         }
 
-        nodes = None
-        project_list = None
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            filter_args = {k: v for k, v in filter_args.items() if v is not None}
-            f1 = executor.submit(ironic.get_node_list, context, **filter_args)
-            f2 = executor.submit(keystone.get_project_list)
-            nodes = f1.result()
-            project_list = f2.result()
+        filter_args = {k: v for k, v in filter_args.items() if v is not None}
+        nodes = ironic.get_node_list(
+            context, fields=ironic.NODE_LIST_FIELDS, **filter_args
+        )
 
         node_collection = NodeCollection()
 
@@ -111,23 +106,24 @@ class NodesController(rest.RestController):
 
         leases = lease_obj.Lease.get_all({"status": [statuses.CREATED]}, context)
 
+        offers_by_node = collections.defaultdict(list)
+        for offer in offers:
+            offers_by_node[offer.resource_uuid].append(offer)
+        leases_by_node = collections.defaultdict(list)
+        for lease in leases:
+            leases_by_node[lease.resource_uuid].append(lease)
+
         for node in nodes:
             f_offer_uuids = []
             current_offer = None
 
-            node_offers = [
-                offer for offer in offers if offer.resource_uuid == node.uuid
-            ]
-
-            for offer in node_offers:
+            for offer in offers_by_node[node.uuid]:
                 if offer.start_time > now:
                     f_offer_uuids.append(offer.uuid)
                 elif offer.end_time >= now:
                     current_offer = offer
 
-            f_lease_uuids = [
-                lease.uuid for lease in leases if lease.resource_uuid == node.uuid
-            ]
+            f_lease_uuids = [lease.uuid for lease in leases_by_node[node.uuid]]
 
             n = Node(
                 name=node.name,
@@ -139,8 +135,8 @@ class NodesController(rest.RestController):
                 resource_class=node.resource_class,
                 properties=ironic.get_condensed_properties(node.properties),
                 maintenance=str(node.maintenance),
-                owner=keystone.get_project_name(node.owner, project_list),
-                lessee=keystone.get_project_name(node.lessee, project_list),
+                owner=keystone.get_project_name(node.owner),
+                lessee=keystone.get_project_name(node.lessee),
                 future_offers=f_offer_uuids,
                 future_leases=f_lease_uuids,
             )
@@ -10,7 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import concurrent.futures
+import collections
 import datetime
 import http.client as http_client
 from oslo_utils import uuidutils
@@ -25,13 +25,13 @@ from esi_leap.api.controllers import types
 from esi_leap.api.controllers.v1 import lease
 from esi_leap.api.controllers.v1 import utils
 from esi_leap.common import exception
-from esi_leap.common import ironic
 from esi_leap.common import keystone
 from esi_leap.common import statuses
 import esi_leap.conf
 from esi_leap.objects import lease as lease_obj
 from esi_leap.objects import offer as offer_obj
 from esi_leap.resource_objects import get_resource_object
+from esi_leap.resource_objects import get_type
 
 CONF = esi_leap.conf.CONF
 
@@ -78,8 +78,51 @@ class OfferCollection(types.Collection):
         self._type = "offers"
 
 
+class OfferResult(base.ESILEAPBase):
+    offer = Offer
+    error = wsme.wsattr(wtypes.text)
+
+    def __init__(self, **kwargs):
+        self.fields = ("offer", "error")
+        for field in self.fields:
+            setattr(self, field, kwargs.get(field, wtypes.Unset))
+
+
+class OfferResultCollection(types.Collection):
+    results = [OfferResult]
+
+    def __init__(self, **kwargs):
+        self._type = "results"
+
+
+class BulkClaim(base.ESILEAPBase):
+    offer_uuids = wsme.wsattr([wtypes.text], mandatory=True)
+    name = wsme.wsattr(wtypes.text)
+    start_time = wsme.wsattr(datetime.datetime)
+    end_time = wsme.wsattr(datetime.datetime)
+    properties = {wtypes.text: types.jsontype}
+    purpose = wsme.wsattr(wtypes.text)
+
+    def __init__(self, **kwargs):
+        self.fields = (
+            "offer_uuids",
+            "name",
+            "start_time",
+            "end_time",
+            "properties",
+            "purpose",
+        )
+        for field in self.fields:
+            setattr(self, field, kwargs.get(field, wtypes.Unset))
+
+
 class OffersController(rest.RestController):
-    _custom_actions = {"claim": ["POST"]}
+    _custom_actions = {
+        "claim": ["POST"],
+        "search": ["GET"],
+        "bulk_claim": ["POST"],
+        "bulk_create": ["POST"],
+    }
 
     @wsme_pecan.wsexpose(Offer, wtypes.text)
     def get_one(self, offer_id):
@@ -106,6 +149,9 @@ class OffersController(rest.RestController):
         datetime.datetime,
         datetime.datetime,
         wtypes.text,
+        int,
+        wtypes.text,
+        wtypes.text,
     )
     def get_all(
         self,
@@ -118,10 +164,15 @@ class OffersController(rest.RestController):
         available_start_time=None,
         available_end_time=None,
         status=None,
+        limit=None,
+        marker=None,
+        fields=None,
     ):
         request = pecan.request.context
         cdict = request.to_policy_values()
         utils.policy_authorize("esi_leap:offer:get_all", cdict, cdict)
+        limit = utils.validate_limit(limit)
+        fields = utils.validate_fields(fields, Offer)
 
         if project_id is not None:
             project_id = keystone.get_project_uuid_from_ident(project_id)
@@ -153,6 +204,11 @@ class OffersController(rest.RestController):
                 a_start=str(available_start_time), a_end=str(available_end_time)
             )
 
+        status_arg = status
+        # offers that can be archived may have moved to the history table
+        include_history = CONF.archive.query_history and (
+            status == "any" or status in statuses.OFFER_CAN_ARCHIVE
+        )
         if status is None:
             status = statuses.OFFER_CAN_DELETE
         elif status == "any":
@@ -160,11 +216,7 @@ class OffersController(rest.RestController):
         else:
             status = [status]
 
-        try:
-            utils.policy_authorize("esi_leap:offer:offer_admin", cdict, cdict)
-            lessee_id = None
-        except exception.HTTPForbidden:
-            lessee_id = cdict["project_id"]
+        lessee_id = OffersController._get_lessee_filter(cdict)
 
         filters = {
             "project_id": project_id,
@@ -176,7 +228,11 @@ class OffersController(rest.RestController):
             "end_time": end_time,
             "available_start_time": available_start_time,
             "available_end_time": available_end_time,
+            "limit": limit,
+            "marker": marker,
         }
+        if include_history:
+            filters["include_history"] = True
 
         # unpack iterator to tuple so we can use 'del'
         for k, v in tuple(filters.items()):
@@ -186,32 +242,83 @@ class OffersController(rest.RestController):
         offer_collection = OfferCollection()
         offers = offer_obj.Offer.get_all(filters, request)
 
-        offer_collection.offers = []
+        offer_collection.offers = OffersController._get_offers_with_added_info(
+            offers, fields, resource_class
+        )
 
-        if len(offers) > 0:
-            project_list = None
-            node_list = None
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                f1 = executor.submit(ironic.get_node_list)
-                f2 = executor.submit(keystone.get_project_list)
-                node_list = f1.result()
-                project_list = f2.result()
+        offer_collection.next = utils.get_next_link(
+            offer_collection,
+            limit,
+            offers,
+            project_id=project_id,
+            resource_type=resource_type,
+            resource_class=resource_class,
+            resource_uuid=resource_uuid,
+            start_time=start_time,
+            end_time=end_time,
+            available_start_time=available_start_time,
+            available_end_time=available_end_time,
+            status=status_arg,
+            fields=",".join(fields) if fields else None,
+        )
 
-            offers_with_added_info = [
-                Offer(
-                    **utils.offer_get_dict_with_added_info(o, project_list, node_list)
-                )
-                for o in offers
-            ]
-            if resource_class:
-                offer_collection.offers = [
-                    o
-                    for o in offers_with_added_info
-                    if o.resource_class == resource_class
-                ]
-            else:
-                offer_collection.offers = offers_with_added_info
+        return offer_collection
+
+    @wsme_pecan.wsexpose(
+        OfferCollection,
+        wtypes.text,
+        datetime.datetime,
+        datetime.datetime,
+        wtypes.text,
+        int,
+        wtypes.text,
+    )
+    def search(
+        self,
+        resource_class=None,
+        start_time=None,
+        end_time=None,
+        resource_type=None,
+        limit=None,
+        fields=None,
+    ):
+        request = pecan.request.context
+        cdict = request.to_policy_values()
+        utils.policy_authorize("esi_leap:offer:get_all", cdict, cdict)
+        limit = utils.validate_limit(limit)
+        fields = utils.validate_fields(fields, Offer)
 
+        if start_time is None or end_time is None or end_time <= start_time:
+            raise exception.InvalidTimeAPICommand(
+                resource="an offer", start_time=str(start_time), end_time=str(end_time)
+            )
+
+        if resource_type is None:
+            resource_type = CONF.api.default_resource_type
+
+        # narrow the search down to the resources of the class when the
+        # resource type can look them up; otherwise check each offer
+        resource_uuids = None
+        if resource_class is not None:
+            resource_uuids = get_type(resource_type).get_uuids_by_resource_class(
+                resource_class
+            )
+        filter_resource_class = resource_class if resource_uuids is None else None
+
+        offers = offer_obj.Offer.search(
+            start_time,
+            end_time,
+            resource_type=resource_type,
+            resource_uuids=resource_uuids,
+            lessee_id=OffersController._get_lessee_filter(cdict),
+            limit=limit if filter_resource_class is None else None,
+            context=request,
+        )
+
+        offer_collection = OfferCollection()
+        offer_collection.offers = OffersController._get_offers_with_added_info(
+            offers, fields, filter_resource_class
+        )[:limit]
         return offer_collection
 
     @wsme_pecan.wsexpose(Offer, body=Offer, status_code=http_client.CREATED)
@@ -221,50 +328,76 @@ class OffersController(rest.RestController):
         utils.policy_authorize("esi_leap:offer:create", cdict, cdict)
 
         offer_dict = new_offer.to_dict()
-        offer_dict["project_id"] = request.project_id
-        offer_dict["uuid"] = uuidutils.generate_uuid()
         if "resource_type" not in offer_dict:
             offer_dict["resource_type"] = CONF.api.default_resource_type
         resource = get_resource_object(
             offer_dict["resource_type"], offer_dict["resource_uuid"]
         )
-        offer_dict["resource_uuid"] = resource.get_uuid()
-
-        if "lessee_id" in offer_dict:
-            offer_dict["lessee_id"] = keystone.get_project_uuid_from_ident(
-                offer_dict["lessee_id"]
-            )
-
-        if "start_time" not in offer_dict:
-            offer_dict["start_time"] = datetime.datetime.now()
-        if "end_time" not in offer_dict:
-            offer_dict["end_time"] = datetime.datetime.max
-
-        if offer_dict["start_time"] >= offer_dict["end_time"]:
-            raise exception.InvalidTimeRange(
-                resource="an offer",
-                start_time=str(offer_dict["start_time"]),
-                end_time=str(offer_dict["end_time"]),
-            )
-
-        try:
-            utils.check_resource_admin(cdict, resource, request.project_id)
-        except exception.HTTPResourceForbidden:
-            parent_lease_uuid = utils.check_resource_lease_admin(
-                cdict,
-                resource,
-                request.project_id,
-                offer_dict.get("start_time"),
-                offer_dict.get("end_time"),
-            )
-            if parent_lease_uuid is None:
-                raise
-            offer_dict["parent_lease_uuid"] = parent_lease_uuid
+        OffersController._complete_offer_dict(request, cdict, offer_dict, resource)
 
         o = offer_obj.Offer(**offer_dict)
         o.create()
+        utils.schedule_offer(request, o)
         return Offer(**utils.offer_get_dict_with_added_info(o))
 
+    @wsme_pecan.wsexpose(OfferResultCollection, body=[Offer])
+    def bulk_create(self, new_offers):
+        request = pecan.request.context
+        cdict = request.to_policy_values()
+        utils.policy_authorize("esi_leap:offer:create", cdict, cdict)
+
+        offer_dicts = [new_offer.to_dict() for new_offer in new_offers]
+        idents_by_type = collections.defaultdict(set)
+        for offer_dict in offer_dicts:
+            if "resource_type" not in offer_dict:
+                offer_dict["resource_type"] = CONF.api.default_resource_type
+            idents_by_type[offer_dict["resource_type"]].add(offer_dict["resource_uuid"])
+
+        # one lookup per resource type rather than one per offer
+        resources = {}
+        for resource_type, idents in idents_by_type.items():
+            try:
+                resources[resource_type] = get_type(resource_type).get_many(idents)
+            except exception.ResourceTypeUnknown:
+                resources[resource_type] = {}
+
+        results = [OfferResult() for _ in offer_dicts]
+        offers = []
+        for result, offer_dict in zip(results, offer_dicts):
+            try:
+                resource_type = offer_dict["resource_type"]
+                get_type(resource_type)
+                resource = resources[resource_type].get(offer_dict["resource_uuid"])
+                if resource is None:
+                    raise exception.ResourceNotFound(
+                        resource_type=resource_type,
+                        resource_ident=offer_dict["resource_uuid"],
+                    )
+                OffersController._complete_offer_dict(
+                    request, cdict, offer_dict, resource
+                )
+            except exception.ESILeapException as e:
+                result.error = str(e)
+                continue
+            offers.append((result, offer_obj.Offer(**offer_dict)))
+
+        errors = offer_obj.Offer.create_many([o for _, o in offers])
+
+        created = [o for (_, o), error in zip(offers, errors) if error is None]
+        node_list = None
+        if created:
+            node_list = utils.get_resource_node_list(created)
+        for (result, o), error in zip(offers, errors):
+            if error is not None:
+                result.error = str(error)
+                continue
+            utils.schedule_offer(request, o)
+            result.offer = Offer(**utils.offer_get_dict_with_added_info(o, node_list))
+
+        result_collection = OfferResultCollection()
+        result_collection.results = results
+        return result_collection
+
     @wsme_pecan.wsexpose(Offer, wtypes.text)
     def delete(self, offer_id):
         request = pecan.request.context
@@ -301,16 +434,9 @@ class OffersController(rest.RestController):
             lease_dict["start_time"] = datetime.datetime.now()
 
         if "end_time" not in lease_dict:
-            q = offer.get_next_lease_start_time(lease_dict["start_time"])
-            if q is None:
-                max_end_time = offer.end_time
-            else:
-                max_end_time = q.start_time
-            default_end_time = lease_dict["start_time"] + datetime.timedelta(
-                days=CONF.api.default_lease_time
+            lease_dict["end_time"] = self._get_default_end_time(
+                offer, lease_dict["start_time"]
             )
-            end_time = min([default_end_time, max_end_time])
-            lease_dict["end_time"] = end_time
         else:
             utils.check_lease_length(
                 cdict,
@@ -321,4 +447,159 @@ class OffersController(rest.RestController):
 
         new_lease = lease_obj.Lease(**lease_dict)
         new_lease.create(request)
+        utils.schedule_lease(request, new_lease)
         return lease.Lease(**utils.lease_get_dict_with_added_info(new_lease))
+
+    @wsme_pecan.wsexpose(
+        lease.LeaseCollection, body=BulkClaim, status_code=http_client.CREATED
+    )
+    def bulk_claim(self, claim):
+        request = pecan.request.context
+        cdict = request.to_policy_values()
+
+        claim_dict = claim.to_dict()
+        offer_uuids = claim_dict.pop("offer_uuids")
+        if not offer_uuids:
+            raise exception.OfferEmptyClaim()
+        if len(set(offer_uuids)) != len(offer_uuids):
+            raise exception.OfferDuplicateClaim(
+                offer_uuid=next(u for u in offer_uuids if offer_uuids.count(u) > 1)
+            )
+
+        offers = utils.check_offers_policy_and_retrieve(
+            request, "esi_leap:offer:claim", offer_uuids, [statuses.AVAILABLE]
+        )
+        for offer in offers:
+            utils.check_offer_lessee(cdict, offer)
+
+        if "start_time" not in claim_dict:
+            claim_dict["start_time"] = datetime.datetime.now()
+
+        if "end_time" in claim_dict:
+            utils.check_lease_length(
+                cdict,
+                claim_dict["start_time"],
+                claim_dict["end_time"],
+                CONF.api.max_lease_time,
+            )
+
+        new_leases = []
+        for offer in offers:
+            lease_dict = dict(claim_dict)
+            if "end_time" not in lease_dict:
+                lease_dict["end_time"] = self._get_default_end_time(
+                    offer, lease_dict["start_time"]
+                )
+            lease_dict["project_id"] = request.project_id
+            lease_dict["uuid"] = uuidutils.generate_uuid()
+            lease_dict["offer_uuid"] = offer.uuid
+            lease_dict["resource_type"] = offer.resource_type
+            lease_dict["resource_uuid"] = offer.resource_uuid
+            lease_dict["owner_id"] = offer.project_id
+            if offer.parent_lease_uuid is not None:
+                lease_dict["parent_lease_uuid"] = offer.parent_lease_uuid
+            new_leases.append(lease_obj.Lease(**lease_dict))
+
+        lease_obj.Lease.create_many(new_leases, request)
+        for new_lease in new_leases:
+            utils.schedule_lease(request, new_lease)
+
+        node_list = utils.get_resource_node_list(new_leases)
+        lease_collection = lease.LeaseCollection()
+        lease_collection.leases = [
+            lease.Lease(**utils.lease_get_dict_with_added_info(new_lease, node_list))
+            for new_lease in new_leases
+        ]
+        return lease_collection
+
+    @staticmethod
+    def _get_default_end_time(offer, start_time):
+        """Return the end time of a lease claimed without one.
+
+        The lease lasts [api]default_lease_time days, cut short by the
+        end of the offer and by the next lease on the offer.
+        """
+        q = offer.get_next_lease_start_time(start_time)
+        if q is None:
+            max_end_time = offer.end_time
+        else:
+            max_end_time = q.start_time
+        default_end_time = start_time + datetime.timedelta(
+            days=CONF.api.default_lease_time
+        )
+        return min([default_end_time, max_end_time])
+
+    @staticmethod
+    def _complete_offer_dict(request, cdict, offer_dict, resource):
+        offer_dict["project_id"] = request.project_id
+        offer_dict["uuid"] = uuidutils.generate_uuid()
+        offer_dict["resource_uuid"] = resource.get_uuid()
+
+        if "lessee_id" in offer_dict:
+            offer_dict["lessee_id"] = keystone.get_project_uuid_from_ident(
+                offer_dict["lessee_id"]
+            )
+
+        if "start_time" not in offer_dict:
+            offer_dict["start_time"] = datetime.datetime.now()
+        if "end_time" not in offer_dict:
+            offer_dict["end_time"] = datetime.datetime.max
+
+        if offer_dict["start_time"] >= offer_dict["end_time"]:
+            raise exception.InvalidTimeRange(
+                resource="an offer",
+                start_time=str(offer_dict["start_time"]),
+                end_time=str(offer_dict["end_time"]),
+            )
+
+        try:
+            utils.check_resource_admin(cdict, resource, request.project_id)
+        except exception.HTTPResourceForbidden:
+            parent_lease_uuid = utils.check_resource_lease_admin(
+                cdict,
+                resource,
+                request.project_id,
+                offer_dict.get("start_time"),
+                offer_dict.get("end_time"),
+            )
+            if parent_lease_uuid is None:
+                raise
+            offer_dict["parent_lease_uuid"] = parent_lease_uuid
+
+    @staticmethod
+    def _get_lessee_filter(cdict):
+        try:
+            utils.policy_authorize("esi_leap:offer:offer_admin", cdict, cdict)
+            return None
+        except exception.HTTPForbidden:
+            return cdict["project_id"]
+
+    @staticmethod
+    def _get_offers_with_added_info(offers, fields=None, resource_class=None):
+        if len(offers) == 0:
+            return []
+
+        # resource_class is needed to filter even if it is not returned
+        added_fields = fields
+        if fields is not None and resource_class:
+            added_fields = fields + ["resource_class"]
+
+        node_list = None
+        if utils.fields_requested(added_fields, *utils.RESOURCE_FIELDS):
+            node_list = utils.get_resource_node_list(offers)
+
+        availabilities = None
+        if utils.fields_requested(added_fields, "availabilities"):
+            availabilities = offer_obj.Offer.get_availabilities_many(offers)
+
+        offer_dicts = [
+            utils.offer_get_dict_with_added_info(
+                o, node_list, added_fields, availabilities
+            )
+            for o in offers
+        ]
+        if resource_class:
+            offer_dicts = [
+                o for o in offer_dicts if o["resource_class"] == resource_class
+            ]
+        return [Offer(**utils.filter_fields(o, fields)) for o in offer_dicts]
@@ -10,16 +10,31 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo_log import log as logging
 from oslo_policy import policy as oslo_policy
 from oslo_utils import uuidutils
+import pecan
+from wsme import types as wtypes
 
 import datetime
+from urllib import parse
 
 from esi_leap.common import exception
+from esi_leap.common import ironic
 from esi_leap.common import keystone
 from esi_leap.common import policy
+import esi_leap.conf
+from esi_leap.manager import rpcapi
 from esi_leap.objects import lease as lease_obj
 from esi_leap.objects import offer as offer_obj
+from esi_leap.resource_objects import ironic_node
+
+CONF = esi_leap.conf.CONF
+LOG = logging.getLogger(__name__)
+_manager_rpcapi = None
+
+# enriched fields computed from the resource backing a lease or offer
+RESOURCE_FIELDS = ("resource", "resource_class", "resource_properties")
 
 
 def check_resource_admin(cdict, resource, project_id):
@@ -141,6 +156,50 @@ def check_offer_policy_and_retrieve(
     return offer
 
 
+def check_offers_policy_and_retrieve(
+    request, policy_name, offer_uuids, status_filters=[]
+):
+    offers = {o.uuid: o for o in offer_obj.Offer.get_many(offer_uuids)}
+
+    cdict = request.to_policy_values()
+    result = []
+    for offer_uuid in offer_uuids:
+        offer = offers.get(offer_uuid)
+        if offer is None or (status_filters and offer.status not in status_filters):
+            raise exception.OfferNotFound(offer_uuid=offer_uuid)
+
+        target = dict(cdict)
+        target["offer.project_id"] = offer.project_id
+        resource_policy_authorize(policy_name, target, cdict, "offer", offer.uuid)
+        result.append(offer)
+    return result
+
+
+def check_leases_policy(request, policy_name, leases):
+    cdict = request.to_policy_values()
+    for lease in leases:
+        target = dict(cdict)
+        target["lease.owner_id"] = lease.owner_id
+        target["lease.project_id"] = lease.project_id
+        resource_policy_authorize(policy_name, target, cdict, "lease", lease.uuid)
+
+
+def check_leases_policy_and_retrieve(
+    request, policy_name, lease_uuids, status_filters=[]
+):
+    leases = {lease.uuid: lease for lease in lease_obj.Lease.get_many(lease_uuids)}
+
+    result = []
+    for lease_uuid in lease_uuids:
+        lease = leases.get(lease_uuid)
+        if lease is None or (status_filters and lease.status not in status_filters):
+            raise exception.LeaseNotFound(lease_id=lease_uuid)
+        result.append(lease)
+
+    check_leases_policy(request, policy_name, result)
+    return result
+
+
 def check_offer_lessee(cdict, offer):
     project_id = cdict["project_id"]
 
@@ -154,31 +213,87 @@ def check_offer_lessee(cdict, offer):
         )
 
 
-def offer_get_dict_with_added_info(offer, project_list=None, node_list=None):
-    resource = offer.resource_object()
+def get_resource_node_list(objs):
+    """Return the Ironic nodes needed to describe leases or offers."""
+    return ironic.get_enrichment_nodes(
+        obj.resource_uuid
+        for obj in objs
+        if obj.resource_type == ironic_node.IronicNode.resource_type
+    )
+
+
+def fields_requested(fields, *names):
+    return fields is None or any(name in fields for name in names)
 
+
+def offer_get_dict_with_added_info(
+    offer, node_list=None, fields=None, availabilities=None
+):
+    """Return the offer as a dict along with its enriched fields.
+
+    If fields is given, only the enriched fields it names are computed.
+    availabilities may map offer uuids to precomputed availabilities, as
+    returned by Offer.get_availabilities_many.
+    """
     o = offer.to_dict()
-    o["availabilities"] = offer.get_availabilities()
-    o["project"] = keystone.get_project_name(offer.project_id, project_list)
-    o["lessee"] = keystone.get_project_name(offer.lessee_id, project_list)
-    o["resource"] = resource.get_name(node_list)
-    o["resource_class"] = resource.get_resource_class(node_list)
-    o["resource_properties"] = resource.get_properties(node_list)
+    if fields_requested(fields, "availabilities"):
+        if availabilities is not None:
+            o["availabilities"] = availabilities[offer.uuid]
+        else:
+            o["availabilities"] = offer.get_availabilities()
+    if fields_requested(fields, "project"):
+        o["project"] = keystone.get_project_name(offer.project_id)
+    if fields_requested(fields, "lessee"):
+        o["lessee"] = keystone.get_project_name(offer.lessee_id)
+    if fields_requested(fields, *RESOURCE_FIELDS):
+        resource = offer.resource_object()
+        o["resource"] = resource.get_name(node_list)
+        o["resource_class"] = resource.get_resource_class(node_list)
+        o["resource_properties"] = resource.get_properties(node_list)
     return o
 
 
-def lease_get_dict_with_added_info(lease, project_list=None, node_list=None):
-    resource = lease.resource_object()
+def lease_get_dict_with_added_info(lease, node_list=None, fields=None):
+    """Return the lease as a dict along with its enriched fields.
 
+    If fields is given, only the enriched fields it names are computed.
+    """
     lease_dict = lease.to_dict()
-    lease_dict["project"] = keystone.get_project_name(lease.project_id, project_list)
-    lease_dict["owner"] = keystone.get_project_name(lease.owner_id, project_list)
-    lease_dict["resource"] = resource.get_name(node_list)
-    lease_dict["resource_class"] = resource.get_resource_class(node_list)
-    lease_dict["resource_properties"] = resource.get_properties(node_list)
+    if fields_requested(fields, "project"):
+        lease_dict["project"] = keystone.get_project_name(lease.project_id)
+    if fields_requested(fields, "owner"):
+        lease_dict["owner"] = keystone.get_project_name(lease.owner_id)
+    if fields_requested(fields, *RESOURCE_FIELDS):
+        resource = lease.resource_object()
+        lease_dict["resource"] = resource.get_name(node_list)
+        lease_dict["resource_class"] = resource.get_resource_class(node_list)
+        lease_dict["resource_properties"] = resource.get_properties(node_list)
     return lease_dict
 
 
+def validate_fields(fields, api_type):
+    """Parse a comma-separated fields query parameter.
+
+    :param fields: the fields parameter, or None to return all fields
+    :param api_type: the API type the fields belong to
+    :returns: a list of field names, or None if fields is None
+    """
+    if fields is None:
+        return None
+    fields = [f.strip() for f in fields.split(",") if f.strip()]
+    allowed = [attr.name for attr in wtypes.list_attributes(api_type)]
+    invalid = [f for f in fields if f not in allowed]
+    if invalid:
+        raise exception.InvalidFields(fields=", ".join(invalid))
+    return fields
+
+
+def filter_fields(obj_dict, fields):
+    if fields is None:
+        return obj_dict
+    return {k: v for k, v in obj_dict.items() if k in fields}
+
+
 def check_lease_length(cdict, start_time, end_time, max_time):
     if (end_time - start_time) > datetime.timedelta(days=max_time):
         # Check if the current project is admin
@@ -187,3 +302,69 @@ def check_lease_length(cdict, start_time, end_time, max_time):
             policy_authorize("esi_leap:lease:lease_admin", cdict, cdict)
         except exception.HTTPForbidden:
             raise exception.LeaseExceedMaxTimeRange(max_time=max_time)
+
+
+def validate_limit(limit):
+    if limit is None:
+        return None
+    if limit <= 0:
+        raise exception.InvalidLimit(limit=limit)
+    return min(limit, CONF.api.max_limit)
+
+
+def get_next_link(collection, limit, objs, marker_attr="uuid", **kwargs):
+    """Return the next page link for a paginated list request.
+
+    The marker is taken from the last object returned by the database
+    rather than the last collection member, since some filters (such as
+    resource_class) are applied after the query.
+    """
+    if limit is None or len(objs) < limit:
+        return wtypes.Unset
+
+    kwargs = {
+        k: parse.quote(v.isoformat() if isinstance(v, datetime.datetime) else str(v))
+        for k, v in kwargs.items()
+        if v is not None
+    }
+    return collection.get_next(
+        limit,
+        url=pecan.request.host_url,
+        marker=getattr(objs[-1], marker_attr),
+        **kwargs,
+    )
+
+
+def get_manager_rpcapi():
+    global _manager_rpcapi
+    if _manager_rpcapi is None:
+        _manager_rpcapi = rpcapi.ManagerRPCAPI()
+    return _manager_rpcapi
+
+
+def schedule_lease(context, lease):
+    # the manager's periodic rescan picks the lease up if this fails
+    try:
+        get_manager_rpcapi().schedule_lease(context, lease.uuid)
+    except Exception as e:
+        LOG.warning(
+            "Error scheduling lease %s: %s: %s", lease.uuid, type(e).__name__, e
+        )
+
+
+def schedule_offer(context, offer):
+    # the manager's periodic rescan picks the offer up if this fails
+    try:
+        get_manager_rpcapi().schedule_offer(context, offer.uuid)
+    except Exception as e:
+        LOG.warning(
+            "Error scheduling offer %s: %s: %s", offer.uuid, type(e).__name__, e
+        )
+
+
+def cancel_leases(context):
+    # the manager's periodic job picks the leases up if this fails
+    try:
+        get_manager_rpcapi().cancel_leases(context)
+    except Exception as e:
+        LOG.warning("Error requesting lease cancellation: %s: %s", type(e).__name__, e)
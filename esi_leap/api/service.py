@@ -11,14 +11,43 @@
 #    under the License.
 
 from oslo_concurrency import processutils
+from oslo_log import log as logging
+import oslo_messaging as messaging
 from oslo_service import service
 from oslo_service import wsgi
 
 from esi_leap.api import app
+from esi_leap.common import api_rpcapi
+from esi_leap.common import ironic
+from esi_leap.common import notification_utils
+from esi_leap.common import rpc
 import esi_leap.conf
 
 
 CONF = esi_leap.conf.CONF
+LOG = logging.getLogger(__name__)
+
+
+class APIEndpoint(object):
+    target = api_rpcapi.get_target()
+
+    def invalidate_node(self, context, node_uuid):
+        ironic.invalidate_node(node_uuid)
+
+
+def get_rpc_server(executor="eventlet"):
+    """Return the RPC server keeping this process's caches up to date.
+
+    The manager patches Ironic nodes and publishes the invalidations
+    with fanout casts, which every API process receives.
+    """
+    return messaging.get_rpc_server(
+        target=api_rpcapi.get_target(),
+        transport=messaging.get_rpc_transport(CONF),
+        endpoints=[APIEndpoint()],
+        executor=executor,
+        serializer=rpc.RequestContextSerializer(None),
+    )
 
 
 class WSGIService(service.ServiceBase):
@@ -35,12 +64,23 @@ class WSGIService(service.ServiceBase):
             port=CONF.api.port,
             use_ssl=CONF.api.enable_ssl_api,
         )
+        self.rpc_server = None
 
     def start(self):
+        # started here rather than in __init__ so that each worker
+        # process gets its own fanout consumer
+        LOG.info("Starting esi-leap API RPC server")
+        self.rpc_server = get_rpc_server()
+        self.rpc_server.start()
         self.server.start()
 
     def stop(self):
         self.server.stop()
+        if self.rpc_server is not None:
+            LOG.info("Shutting down esi-leap API RPC server")
+            self.rpc_server.stop()
+        LOG.info("Sending queued notifications")
+        notification_utils.flush()
 
     def wait(self):
         self.server.wait()
@@ -10,12 +10,17 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import atexit
+import os
 import sys
+import threading
 
 from oslo_log import log as logging
 
 from esi_leap.api.app import WSGIApplication
+from esi_leap.api import service as api_service
 from esi_leap.common import i18n
+from esi_leap.common import notification_utils
 from esi_leap.common import service
 import esi_leap.conf
 
@@ -24,6 +29,38 @@ CONF = esi_leap.conf.CONF
 LOG = logging.getLogger(__name__)
 
 
+class RPCServerApplication(object):
+    """Start the API RPC server of a process on its first request.
+
+    WSGI servers may fork their workers after loading the application, and
+    a consumer started before the fork does not run in them, so each
+    worker process starts its own.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def __call__(self, environ, start_response):
+        if self._pid != os.getpid():
+            self._start_rpc_server()
+        return self.app(environ, start_response)
+
+    def _start_rpc_server(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            try:
+                api_service.get_rpc_server(executor="threading").start()
+            except Exception as e:
+                # the node cache falls back on its refresh interval
+                LOG.warning(
+                    "Error starting API RPC server: %s: %s", type(e).__name__, e
+                )
+
+
 def initialize_wsgi_app(argv=sys.argv):
     i18n.install("esi_leap")
 
@@ -32,4 +69,7 @@ def initialize_wsgi_app(argv=sys.argv):
     LOG.debug("Configuration:")
     CONF.log_opt_values(LOG, logging.DEBUG)
 
-    return WSGIApplication()
+    # there is no service stop hook when run by a WSGI server
+    atexit.register(notification_utils.flush)
+
+    return RPCServerApplication(WSGIApplication())
@@ -12,13 +12,17 @@
 
 from __future__ import print_function
 
+import datetime
 import sys
+import time
 
 from oslo_config import cfg
+from oslo_utils import timeutils
 
 from esi_leap.common.i18n import _
 from esi_leap.common import service
 import esi_leap.conf
+from esi_leap.db import api as dbapi
 from esi_leap.db import migration
 
 
@@ -44,6 +48,95 @@ class DBCommand(object):
     def version(self):
         print(migration.version())
 
+    def rebuild_busy_intervals(self):
+        count = dbapi.busy_interval_rebuild()
+        print(_("Rebuilt %d busy intervals.") % count)
+
+    def check_busy_intervals(self):
+        problems = dbapi.busy_interval_check()
+        for object_type, object_uuid, problem in problems:
+            print(
+                _("%(type)s %(uuid)s: %(problem)s")
+                % {"type": object_type, "uuid": object_uuid, "problem": problem}
+            )
+        if problems:
+            print(_("Found %d inconsistent busy intervals.") % len(problems))
+            sys.exit(1)
+        print(_("Busy intervals are consistent."))
+
+    def archive_events(self):
+        max_age = CONF.command.max_age
+        if max_age is None:
+            max_age = CONF.archive.event_max_age
+        batch_size = CONF.command.batch_size or CONF.archive.batch_size
+        before = datetime.datetime.now() - datetime.timedelta(days=max_age)
+
+        start = time.monotonic()
+        total = 0
+        while True:
+            count = dbapi.event_archive(before, batch_size, CONF.command.purge)
+            total += count
+            if count < batch_size:
+                break
+        elapsed = time.monotonic() - start
+
+        if CONF.command.purge:
+            message = _(
+                "Purged %(count)d events older than %(before)s in "
+                "%(elapsed).1f seconds (%(rate).1f rows/s)."
+            )
+        else:
+            message = _(
+                "Archived %(count)d events older than %(before)s in "
+                "%(elapsed).1f seconds (%(rate).1f rows/s)."
+            )
+        print(
+            message
+            % {
+                "count": total,
+                "before": before,
+                "elapsed": elapsed,
+                "rate": total / elapsed if elapsed else 0,
+            }
+        )
+
+    def archive_leases_and_offers(self):
+        max_age = CONF.command.max_age
+        if max_age is None:
+            max_age = CONF.archive.history_max_age
+        batch_size = CONF.command.batch_size or CONF.archive.batch_size
+        before = timeutils.utcnow() - datetime.timedelta(days=max_age)
+
+        start = time.monotonic()
+        leases = offers = 0
+        while True:
+            # a lease can only be archived once the leases and offers
+            # created from it are, and an offer once its leases are, so
+            # alternate until neither table has rows left to move
+            lease_count = dbapi.lease_archive(before, batch_size)
+            offer_count = dbapi.offer_archive(before, batch_size)
+            leases += lease_count
+            offers += offer_count
+            if not lease_count and not offer_count:
+                break
+        elapsed = time.monotonic() - start
+
+        total = leases + offers
+        print(
+            _(
+                "Archived %(leases)d leases and %(offers)d offers last "
+                "changed before %(before)s in %(elapsed).1f seconds "
+                "(%(rate).1f rows/s)."
+            )
+            % {
+                "leases": leases,
+                "offers": offers,
+                "before": before,
+                "elapsed": elapsed,
+                "rate": total / elapsed if elapsed else 0,
+            }
+        )
+
 
 def add_command_parsers(subparsers):
     command_object = DBCommand()
@@ -77,6 +170,59 @@ def add_command_parsers(subparsers):
     )
     parser.set_defaults(func=command_object.version)
 
+    parser = subparsers.add_parser(
+        "rebuild_busy_intervals",
+        help=_("Rebuild the busy interval index from the offers and leases."),
+    )
+    parser.set_defaults(func=command_object.rebuild_busy_intervals)
+
+    parser = subparsers.add_parser(
+        "check_busy_intervals",
+        help=_(
+            "Check the busy interval index against the offers and leases. "
+            "Exits with status 1 if they are inconsistent."
+        ),
+    )
+    parser.set_defaults(func=command_object.check_busy_intervals)
+
+    parser = subparsers.add_parser(
+        "archive_events",
+        help=_(
+            "Move events older than [archive]event_max_age days to the "
+            "events archive table, in batches of [archive]batch_size."
+        ),
+    )
+    parser.set_defaults(func=command_object.archive_events)
+    parser.add_argument(
+        "--max-age", type=int, help=_("Age in days of the events to archive.")
+    )
+    parser.add_argument(
+        "--batch-size", type=int, help=_("Number of events moved per transaction.")
+    )
+    parser.add_argument(
+        "--purge",
+        action="store_true",
+        help=_("Delete the events instead of archiving them."),
+    )
+
+    parser = subparsers.add_parser(
+        "archive_leases_and_offers",
+        help=_(
+            "Move expired and deleted leases and offers not changed for "
+            "[archive]history_max_age days to the history tables, in "
+            "batches of [archive]batch_size."
+        ),
+    )
+    parser.set_defaults(func=command_object.archive_leases_and_offers)
+    parser.add_argument(
+        "--max-age",
+        type=int,
+        help=_("Days since the last change of the leases and offers to archive."),
+    )
+    parser.add_argument(
+        "--batch-size", type=int, help=_("Number of rows moved per transaction.")
+    )
+
 
 def main():
     command_opt = cfg.SubCommandOpt(
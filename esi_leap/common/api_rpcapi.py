@@ -0,0 +1,48 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import oslo_messaging as messaging
+
+from esi_leap.common import rpc
+import esi_leap.conf
+
+CONF = esi_leap.conf.CONF
+NAMESPACE = "api.cache"
+RPC_API_VERSION = "1.0"
+TOPIC = "esi_leap.api"
+
+
+def get_target():
+    return messaging.Target(
+        topic=TOPIC, server=CONF.host, version=RPC_API_VERSION, namespace=NAMESPACE
+    )
+
+
+class APIRPCAPI(object):
+    """Client side of the API processes RPC API
+
+    API version history:
+
+    * 1.0 - Initial version, with invalidate_node.
+    """
+
+    def __init__(self):
+        self._client = messaging.RPCClient(
+            target=get_target(),
+            transport=messaging.get_rpc_transport(CONF),
+            serializer=rpc.RequestContextSerializer(None),
+        )
+
+    def invalidate_node(self, context, node_uuid):
+        """Ask every API process to drop a node from its node cache."""
+        cctxt = self._client.prepare(fanout=True, version="1.0")
+        cctxt.cast(context, "invalidate_node", node_uuid=node_uuid)
@@ -0,0 +1,80 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+
+LOG = logging.getLogger(__name__)
+
+
+class RefreshingCache(object):
+    """Base class for process-wide caches of data held by other services.
+
+    The data is loaded on first use. Once it is older than the interval
+    returned by _get_ttl, the cached data keeps being served while a
+    background thread reloads it. Subclasses implement _load, which
+    fetches the data and swaps in the new indexes while holding
+    self._lock, and _reset, which drops them.
+    """
+
+    name = "cache"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._updated_at = None
+        self._refreshing = False
+        self._reset()
+
+    def _get_ttl(self):
+        raise NotImplementedError()
+
+    def _load(self):
+        raise NotImplementedError()
+
+    def _reset(self):
+        raise NotImplementedError()
+
+    def _refresh(self):
+        try:
+            self._load()
+            self._updated_at = timeutils.utcnow()
+        finally:
+            self._refreshing = False
+
+    def _background_refresh(self):
+        try:
+            self._refresh()
+        except Exception as e:
+            LOG.warning(
+                "Error refreshing %s: %s: %s" % (self.name, type(e).__name__, e)
+            )
+
+    def _ensure_loaded(self):
+        if self._updated_at is None:
+            self._refresh()
+        elif timeutils.is_older_than(self._updated_at, self._get_ttl()):
+            with self._lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+            threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def is_loaded(self):
+        return self._updated_at is not None
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self._updated_at = None
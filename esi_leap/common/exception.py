@@ -61,6 +61,14 @@ class HTTPResourceForbidden(ESILeapException):
     msg_fmt = _("Access was denied to %(resource_type)s %(resource)s.")
 
 
+class LeaseInvalidSelection(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _(
+        "Leases must be selected either by lease_uuids or by at least one "
+        "of the project_id, owner_id and offer_uuid filters."
+    )
+
+
 class LeaseNoPermission(ESILeapException):
     msg_fmt = _("You do not have permissions on " "lease %(lease_uuid)s.")
 
@@ -109,6 +117,16 @@ class OfferNoTimeAvailabilities(ESILeapException):
     )
 
 
+class OfferDuplicateClaim(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _("Offer %(offer_uuid)s is claimed more than once.")
+
+
+class OfferEmptyClaim(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _("At least one offer must be claimed.")
+
+
 class OfferNotAvailable(ESILeapException):
     msg_fmt = _(
         "Offer %(offer_uuid)s does not have status "
@@ -142,6 +160,11 @@ class ResourceNoPermissionTime(ESILeapException):
     )
 
 
+class ResourceNotFound(ESILeapException):
+    code = http_client.NOT_FOUND
+    msg_fmt = _("%(resource_type)s %(resource_ident)s not found.")
+
+
 class ResourceTypeUnknown(ESILeapException):
     msg_fmt = _("%(resource_type)s resource type unknown.")
 
@@ -165,6 +188,21 @@ class InvalidAvailabilityAPICommand(ESILeapException):
     )
 
 
+class InvalidLimit(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _("Limit must be a positive integer. Got %(limit)s.")
+
+
+class InvalidMarker(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _("Marker %(marker)s not found.")
+
+
+class InvalidFields(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _("Unknown fields requested: %(fields)s.")
+
+
 class InvalidTimeRange(ESILeapException):
     msg_fmt = _(
         "Attempted to create %(resource)s resource with an invalid "
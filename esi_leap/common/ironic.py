@@ -10,50 +10,284 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import concurrent.futures
+import datetime
+import threading
+
 from keystoneauth1 import loading as ks_loading
 from keystoneauth1 import service_token
+from keystoneauth1 import session as ks_session
 from keystoneauth1 import token_endpoint
+import requests
 
+from ironicclient.common.apiclient import exceptions as ir_exception
 from ironicclient import client as ironic_client
+from oslo_log import log as logging
+from oslo_utils import timeutils
 
+from esi_leap.common import cache
 import esi_leap.conf
 
 
 CONF = esi_leap.conf.CONF
+LOG = logging.getLogger(__name__)
+_client_lock = threading.Lock()
+_http_session = None
+_service_auth = None
+_service_endpoint = None
 _cached_ironic_client = None
+_user_clients = {}
 
+# node fields used to add resource information to leases and offers
+ENRICHMENT_FIELDS = [
+    "uuid",
+    "name",
+    "resource_class",
+    "properties",
+    "owner",
+    "lessee",
+]
+# node fields shown by the node API
+NODE_LIST_FIELDS = ENRICHMENT_FIELDS + [
+    "provision_state",
+    "target_provision_state",
+    "power_state",
+    "target_power_state",
+    "maintenance",
+]
 
-def get_ironic_client(context=None):
-    session = ks_loading.load_session_from_conf_options(CONF, "ironic")
-    service_auth = ks_loading.load_auth_from_conf_options(CONF, "ironic")
 
-    # use user context if provided
-    user_auth = None
-    if context:
-        endpoint = ks_loading.load_adapter_from_conf_options(
-            CONF, "ironic", session=session, auth=service_auth
-        ).get_endpoint()
-        user_auth = service_token.ServiceTokenAuthWrapper(
-            user_auth=token_endpoint.Token(endpoint, context.auth_token),
-            service_auth=service_auth,
-        )
-    sess = ks_loading.load_session_from_conf_options(
-        CONF, "ironic", auth=user_auth or service_auth
+def _get_http_session():
+    global _http_session
+    if _http_session is None:
+        pool_size = CONF.ironic.connection_pool_size
+        if CONF.ironic.tcp_keepalive:
+            adapter = ks_session.TCPKeepAliveAdapter(
+                pool_connections=pool_size, pool_maxsize=pool_size
+            )
+        else:
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=pool_size, pool_maxsize=pool_size
+            )
+        http_session = requests.Session()
+        http_session.mount("http://", adapter)
+        http_session.mount("https://", adapter)
+        _http_session = http_session
+    return _http_session
+
+
+def _load_session(auth):
+    return ks_loading.load_session_from_conf_options(
+        CONF, "ironic", auth=auth, session=_get_http_session()
     )
 
+
+def _get_client(session):
     kwargs = {"os_ironic_api_version": "1.65"}
-    cli = ironic_client.get_client(1, session=sess, **kwargs)
-    return cli
+    return ironic_client.get_client(1, session=session, **kwargs)
+
+
+def _get_service_client():
+    global _service_auth, _service_endpoint, _cached_ironic_client
+    with _client_lock:
+        if _cached_ironic_client is None:
+            service_auth = ks_loading.load_auth_from_conf_options(CONF, "ironic")
+            session = _load_session(service_auth)
+            _service_endpoint = ks_loading.load_adapter_from_conf_options(
+                CONF, "ironic", session=session, auth=service_auth
+            ).get_endpoint()
+            _service_auth = service_auth
+            _cached_ironic_client = _get_client(session)
+        return _cached_ironic_client
+
 
+def _get_user_client(auth_token):
+    _get_service_client()
+    now = timeutils.utcnow()
+    with _client_lock:
+        cached = _user_clients.get(auth_token)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        user_auth = service_token.ServiceTokenAuthWrapper(
+            user_auth=token_endpoint.Token(_service_endpoint, auth_token),
+            service_auth=_service_auth,
+        )
+        client = _get_client(_load_session(user_auth))
 
-def get_node_list(context=None, **filter_args):
+        for token, (expires_at, _) in list(_user_clients.items()):
+            if expires_at <= now:
+                del _user_clients[token]
+        ttl = datetime.timedelta(seconds=CONF.ironic.user_client_cache_ttl)
+        _user_clients[auth_token] = (now + ttl, client)
+        return client
+
+
+def get_ironic_client(context=None):
+    """Return an Ironic client sharing a pooled HTTP session.
+
+    Without a context the service client is returned. With a context a
+    client authenticated with the user token is returned; these are
+    cached per token for [ironic]user_client_cache_ttl seconds.
+    """
+    # use user context if provided
+    if context:
+        return _get_user_client(context.auth_token)
+    return _get_service_client()
+
+
+def get_node_list(context=None, fields=None, **filter_args):
     client = get_ironic_client(context)
+    if fields:
+        return client.node.list(fields=fields, **filter_args)
     return client.node.list(detail=True, **filter_args)
 
 
+def get_nodes(node_uuids, fields=None):
+    """Fetch the given nodes from Ironic in parallel.
+
+    :param node_uuids: uuids of the nodes to fetch
+    :param fields: node fields to fetch; all fields if not set
+    :returns: a NodeIndex of the nodes that were found
+    """
+    node_uuids = set(node_uuids)
+    if not node_uuids:
+        return NodeIndex([])
+
+    client = get_ironic_client()
+
+    def get(node_uuid):
+        try:
+            return client.node.get(node_uuid, fields=fields)
+        except ir_exception.NotFound:
+            return None
+
+    max_workers = min(len(node_uuids), CONF.ironic.connection_pool_size)
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        nodes = executor.map(get, node_uuids)
+        return NodeIndex([node for node in nodes if node is not None])
+
+
+class NodeIndex(object):
+    """A list of Ironic nodes indexed by uuid and by name."""
+
+    def __init__(self, nodes):
+        self._nodes = list(nodes)
+        self._by_uuid = {n.uuid: n for n in self._nodes}
+        self._uuid_by_name = {n.name: n.uuid for n in self._nodes if n.name}
+        self._uuids_by_resource_class = {}
+        for n in self._nodes:
+            self._uuids_by_resource_class.setdefault(n.resource_class, []).append(
+                n.uuid
+            )
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def get(self, node_uuid):
+        return self._by_uuid.get(node_uuid)
+
+    def get_uuid(self, node_name):
+        return self._uuid_by_name.get(node_name)
+
+    def get_uuids_by_resource_class(self, resource_class):
+        return list(self._uuids_by_resource_class.get(resource_class, []))
+
+
+class NodeCache(cache.RefreshingCache):
+    """Process-wide cache of the detailed Ironic node list indexed by uuid.
+
+    The node list is reloaded in the background every
+    [ironic]node_cache_refresh_interval seconds. Nodes that esi-leap
+    updates are invalidated and fetched again individually on the next
+    lookup.
+    """
+
+    name = "node cache"
+
+    def _get_ttl(self):
+        return CONF.ironic.node_cache_refresh_interval
+
+    def _load(self):
+        nodes = get_ironic_client().node.list(fields=ENRICHMENT_FIELDS)
+        with self._lock:
+            self._index = NodeIndex(nodes)
+
+    def _reset(self):
+        self._index = NodeIndex([])
+        self._invalid = set()
+
+    def _revalidate(self):
+        with self._lock:
+            invalid = self._invalid
+            self._invalid = set()
+        for node_uuid in invalid:
+            try:
+                node = get_ironic_client().node.get(node_uuid, fields=ENRICHMENT_FIELDS)
+            except ir_exception.NotFound:
+                node = None
+            except Exception as e:
+                LOG.warning(
+                    "Error refreshing node %s in node cache: %s: %s"
+                    % (node_uuid, type(e).__name__, e)
+                )
+                with self._lock:
+                    self._invalid.add(node_uuid)
+                continue
+            with self._lock:
+                nodes = [n for n in self._index if n.uuid != node_uuid]
+                if node is not None:
+                    nodes.append(node)
+                self._index = NodeIndex(nodes)
+
+    def list(self):
+        self._ensure_loaded()
+        self._revalidate()
+        return self._index
+
+    def get(self, node_uuid):
+        return self.list().get(node_uuid)
+
+    def invalidate(self, node_uuid):
+        with self._lock:
+            self._invalid.add(node_uuid)
+
+
+_node_cache = NodeCache()
+
+
+def get_cached_node_list():
+    return _node_cache.list()
+
+
+def get_enrichment_nodes(node_uuids):
+    """Return a NodeIndex with the nodes needed to describe a result set.
+
+    Until the node cache is loaded, result sets that touch at most
+    [ironic]max_targeted_node_fetch nodes fetch just those nodes instead
+    of the full inventory.
+    """
+    node_uuids = set(node_uuids)
+    if (
+        not _node_cache.is_loaded()
+        and len(node_uuids) <= CONF.ironic.max_targeted_node_fetch
+    ):
+        return get_nodes(node_uuids, fields=ENRICHMENT_FIELDS)
+    return get_cached_node_list()
+
+
+def invalidate_node(node_uuid):
+    _node_cache.invalidate(node_uuid)
+
+
 def get_node(node_uuid, node_list=None):
     if node_list is None:
         node = get_ironic_client().node.get(node_uuid)
+    elif isinstance(node_list, NodeIndex):
+        node = node_list.get(node_uuid)
     else:
         node = next((n for n in node_list if n.uuid == node_uuid), None)
     return node
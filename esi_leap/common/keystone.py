@@ -10,17 +10,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from keystoneauth1 import exceptions as ks_exceptions
 from keystoneauth1 import loading as ks_loading
 from keystoneclient import client as keystone_client
 from oslo_utils import uuidutils
 
+from esi_leap.common import cache
 from esi_leap.common import exception
 import esi_leap.conf
 
 
 CONF = esi_leap.conf.CONF
 _cached_keystone_client = None
-_cached_project_list = None
 
 
 def get_keystone_client():
@@ -36,35 +37,114 @@ def get_keystone_client():
     return cli
 
 
+class ProjectCache(cache.RefreshingCache):
+    """Process-wide cache of Keystone projects indexed by id and by name.
+
+    The project list is reloaded in the background every
+    [keystone]project_cache_ttl seconds. Projects missing from the cache
+    are looked up in Keystone and added to it. The ancestry of each
+    project is computed from the cached projects and memoized until the
+    next reload.
+    """
+
+    name = "project cache"
+
+    def _get_ttl(self):
+        return CONF.keystone.project_cache_ttl
+
+    def _load(self):
+        projects = list(get_keystone_client().projects.list())
+        with self._lock:
+            self._projects = projects
+            self._by_id = {p.id: p for p in projects}
+            self._by_name = {p.name: p for p in projects}
+            self._ancestors = {}
+
+    def _reset(self):
+        self._projects = []
+        self._by_id = {}
+        self._by_name = {}
+        self._ancestors = {}
+
+    def _add(self, project):
+        with self._lock:
+            self._by_id[project.id] = project
+            self._by_name[project.name] = project
+
+    def list(self):
+        self._ensure_loaded()
+        return self._projects
+
+    def get_by_id(self, project_id):
+        self._ensure_loaded()
+        if project_id in self._by_id:
+            return self._by_id[project_id]
+        try:
+            project = get_keystone_client().projects.get(project_id)
+        except ks_exceptions.NotFound:
+            # remember missing projects until the next refresh
+            with self._lock:
+                self._by_id[project_id] = None
+            return None
+        self._add(project)
+        return project
+
+    def get_by_name(self, project_name):
+        self._ensure_loaded()
+        project = self._by_name.get(project_name)
+        if project is None:
+            projects = get_keystone_client().projects.list(name=project_name)
+            if len(projects) > 0:
+                # projects have unique names
+                project = projects[0]
+                self._add(project)
+        return project
+
+    def get_ancestors(self, project_id):
+        self._ensure_loaded()
+        ancestors = self._ancestors.get(project_id)
+        if ancestors is None:
+            ancestors = []
+            ancestor_id = project_id
+            while ancestor_id is not None:
+                project = self.get_by_id(ancestor_id)
+                if project is None:
+                    # as looking the project up in Keystone would
+                    raise ks_exceptions.NotFound(
+                        message="Could not find project: %s" % ancestor_id
+                    )
+                ancestors.append(project.id)
+                ancestor_id = project.parent_id
+            with self._lock:
+                self._ancestors[project_id] = ancestors
+        return list(ancestors)
+
+
+_project_cache = ProjectCache()
+
+
 def get_parent_project_id_tree(project_id):
-    ks_client = get_keystone_client()
-    project = ks_client.projects.get(project_id)
-    project_ids = [project.id]
-    while project.parent_id is not None:
-        project = ks_client.projects.get(project.parent_id)
-        project_ids.append(project.id)
-    return project_ids
+    return _project_cache.get_ancestors(project_id)
 
 
 def get_project_uuid_from_ident(project_ident):
     if uuidutils.is_uuid_like(project_ident):
         return project_ident
     else:
-        projects = get_keystone_client().projects.list(name=project_ident)
-        if len(projects) > 0:
-            # projects have unique names
-            return projects[0].id
+        project = _project_cache.get_by_name(project_ident)
+        if project is not None:
+            return project.id
         raise exception.ProjectNoSuchName(name=project_ident)
 
 
 def get_project_list():
-    return get_keystone_client().projects.list()
+    return _project_cache.list()
 
 
 def get_project_name(project_id, project_list=None):
     if project_id:
         if project_list is None:
-            project = get_keystone_client().projects.get(project_id)
+            project = _project_cache.get_by_id(project_id)
         else:
             project = next(
                 (p for p in project_list if getattr(p, "id") == project_id), None
@@ -11,6 +11,9 @@
 #    under the License.
 
 import contextlib
+import copy
+import queue
+import threading
 
 from oslo_config import cfg
 from oslo_log import log
@@ -20,8 +23,10 @@ from oslo_versionedobjects import exception as oslo_vo_exc
 
 from esi_leap.common import exception
 from esi_leap.common.i18n import _
+from esi_leap.objects import event as event_obj
 from esi_leap.objects import fields
 from esi_leap.objects import notification
+from esi_leap import resource_objects
 
 LOG = log.getLogger(__name__)
 CONF = cfg.CONF
@@ -74,7 +79,7 @@ def _emit_notification(context, obj, action, level, status, crud_notify_obj, **k
             )
         payload = payload_method(obj, **extra_args)
         event_type = "esi_leap.%s.%s.%s" % (resource, action, status)
-        notification_method(
+        notif = notification_method(
             publisher=notification.NotificationPublisher(
                 service="esi-leap-manager", host=CONF.host
             ),
@@ -83,7 +88,13 @@ def _emit_notification(context, obj, action, level, status, crud_notify_obj, **k
             ),
             level=level,
             payload=payload,
-        ).emit(context)
+        )
+        if CONF.notification.use_outbox:
+            entry = notif.get_outbox_entry()
+            if entry is not None:
+                _get_outbox_entries(obj).append(entry)
+        else:
+            notif.emit(context)
         LOG.info(
             "Emit esi_leap notification: host is %s "
             "event is %s ,"
@@ -110,6 +121,157 @@ def _emit_notification(context, obj, action, level, status, crud_notify_obj, **k
         LOG.exception(exception_message, exception_values)
 
 
+class AsyncEmitter(object):
+    """Send notifications from a background thread.
+
+    Notifications are put on a bounded queue and sent in order by a
+    daemon thread, so that callers holding resource locks do not wait for
+    the payload to be built, published and recorded as an event. If
+    [notification]async_emit is disabled or the queue is full, the
+    notification is sent by the caller instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._queue is None:
+                self._queue = queue.Queue(CONF.notification.emit_queue_size)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            return self._queue
+
+    def _run(self):
+        while True:
+            func, args, kwargs = self._queue.get()
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                LOG.exception(
+                    "Error sending notification: %s: %s" % (type(e).__name__, e)
+                )
+            finally:
+                self._queue.task_done()
+
+    def submit(self, func, *args, **kwargs):
+        if not CONF.notification.async_emit:
+            func(*args, **kwargs)
+            return
+
+        try:
+            self._ensure_worker().put_nowait((func, args, kwargs))
+        except queue.Full:
+            LOG.warning("Notification queue is full, sending notification inline")
+            func(*args, **kwargs)
+
+    def flush(self):
+        """Wait until every queued notification has been sent."""
+        if self._queue is not None:
+            self._ensure_worker()
+            self._queue.join()
+
+
+_emitter = AsyncEmitter()
+
+
+def flush():
+    """Send the queued notifications and create the buffered events."""
+    _emitter.flush()
+    event_obj.flush_events()
+
+
+def _get_outbox_entries(obj):
+    return obj.__dict__.setdefault("_outbox_entries", [])
+
+
+def pop_outbox_entries(obj):
+    """Return and forget the outbox entries queued for an object.
+
+    With [notification]use_outbox enabled, notifications about an object
+    are queued on it and written to the outbox when the object is saved.
+    """
+    return obj.__dict__.pop("_outbox_entries", [])
+
+
+class NodeSnapshot(object):
+    """The node fields of a notification payload, read when it is queued.
+
+    Payloads built in the background read these instead of the resource
+    object, which the caller keeps using and updating. Only a node the
+    caller already loaded is copied; otherwise the fields are read on
+    first use, by the background worker, so queueing the notification
+    never waits on the resource backend.
+    """
+
+    def __init__(self, node):
+        self._uuid = node.get_uuid()
+        self._resource_type = node.resource_type
+        self._fields = None
+        if getattr(node, "_node", None) is not None:
+            self._fields = self._read(node)
+
+    @staticmethod
+    def _read(node):
+        return {
+            "name": node.get_name(),
+            "provision_state": node.get_node_provision_state(),
+            "power_state": node.get_node_power_state(),
+            "properties": copy.deepcopy(node.get_properties()),
+        }
+
+    def _get(self, field):
+        if self._fields is None:
+            self._fields = self._read(
+                resource_objects.get_resource_object(self._resource_type, self._uuid)
+            )
+        return self._fields[field]
+
+    def get_uuid(self):
+        return self._uuid
+
+    def get_name(self, resource_list=None):
+        return self._get("name")
+
+    def get_node_provision_state(self):
+        return self._get("provision_state")
+
+    def get_node_power_state(self):
+        return self._get("power_state")
+
+    def get_properties(self, resource_list=None):
+        return self._get("properties")
+
+
+def _submit_notification(
+    context, obj, action, level, status, crud_notify_obj, **kwargs
+):
+    if CONF.notification.use_outbox:
+        # the entries are written when the object is saved
+        _emit_notification(
+            context, obj, action, level, status, crud_notify_obj, **kwargs
+        )
+        return
+
+    # the object and node may change once the caller releases its lock,
+    # so the payload is built from copies taken now
+    if kwargs.get("node") is not None:
+        kwargs["node"] = NodeSnapshot(kwargs["node"])
+    _emitter.submit(
+        _emit_notification,
+        context,
+        obj.obj_clone(),
+        action,
+        level,
+        status,
+        crud_notify_obj,
+        **kwargs,
+    )
+
+
 def emit_start_notification(context, obj, action, crud_notify_obj, **kwargs):
     """Helper for emitting API 'start' notifications.
 
@@ -118,7 +280,7 @@ def emit_start_notification(context, obj, action, crud_notify_obj, **kwargs):
     :param action: Action string to go in the EventType.
     :param kwargs: kwargs to use when creating the notification payload.
     """
-    _emit_notification(
+    _submit_notification(
         context,
         obj,
         action,
@@ -142,7 +304,7 @@ def handle_error_notification(context, obj, action, crud_notify_obj, **kwargs):
         yield
     except Exception:
         with excutils.save_and_reraise_exception():
-            _emit_notification(
+            _submit_notification(
                 context,
                 obj,
                 action,
@@ -161,7 +323,7 @@ def emit_end_notification(context, obj, action, crud_notify_obj, **kwargs):
     :param action: Action string to go in the EventType.
     :param kwargs: kwargs to use when creating the notification payload.
     """
-    _emit_notification(
+    _submit_notification(
         context,
         obj,
         action,
@@ -59,6 +59,8 @@ lease_policies = [
             {"path": "/leases/{lease_ident}", "method": "GET"},
             {"path": "/leases/{lease_ident}", "method": "DELETE"},
             {"path": "/leases/{lease_ident}", "method": "PATCH"},
+            {"path": "/leases/bulk_cancel", "method": "POST"},
+            {"path": "/leases/bulk_extend", "method": "POST"},
         ],
     ),
     policy.DocumentedRuleDefault(
@@ -71,7 +73,10 @@ lease_policies = [
         "esi_leap:lease:update",
         "rule:is_admin",
         "Update lease",
-        [{"path": "/leases/{lease_ident}", "method": "PATCH"}],
+        [
+            {"path": "/leases/{lease_ident}", "method": "PATCH"},
+            {"path": "/leases/bulk_extend", "method": "POST"},
+        ],
     ),
     policy.DocumentedRuleDefault(
         "esi_leap:lease:get",
@@ -89,7 +94,10 @@ lease_policies = [
         "esi_leap:lease:delete",
         "rule:is_admin or rule:is_lease_owner or rule:is_lease_lessee",
         "Delete lease",
-        [{"path": "/leases/{lease_ident}", "method": "DELETE"}],
+        [
+            {"path": "/leases/{lease_ident}", "method": "DELETE"},
+            {"path": "/leases/bulk_cancel", "method": "POST"},
+        ],
     ),
 ]
 
@@ -100,17 +108,22 @@ offer_policies = [
         "Complete permissions over offers",
         [
             {"path": "/offers", "method": "POST"},
+            {"path": "/offers/bulk_create", "method": "POST"},
             {"path": "/offers", "method": "GET"},
             {"path": "/offers/{offer_ident}", "method": "GET"},
             {"path": "/offers/{offer_ident}", "method": "DELETE"},
             {"path": "/offers/{offer_ident}/claim", "method": "POST"},
+            {"path": "/offers/bulk_claim", "method": "POST"},
         ],
     ),
     policy.DocumentedRuleDefault(
         "esi_leap:offer:create",
         "rule:is_admin or rule:is_owner",
         "Create offer",
-        [{"path": "/offers", "method": "POST"}],
+        [
+            {"path": "/offers", "method": "POST"},
+            {"path": "/offers/bulk_create", "method": "POST"},
+        ],
     ),
     policy.DocumentedRuleDefault(
         "esi_leap:offer:get",
@@ -134,7 +147,10 @@ offer_policies = [
         "esi_leap:offer:claim",
         "rule:is_admin or rule:is_owner or rule:is_lessee",
         "Claim an offer",
-        [{"path": "/offers/{offer_ident}/claim", "method": "POST"}],
+        [
+            {"path": "/offers/{offer_ident}/claim", "method": "POST"},
+            {"path": "/offers/bulk_claim", "method": "POST"},
+        ],
     ),
 ]
 
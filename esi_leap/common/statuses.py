@@ -22,3 +22,11 @@ WAIT_FULFILL = "wait fulfill"
 
 OFFER_CAN_DELETE = [AVAILABLE, ERROR]
 LEASE_CAN_DELETE = [ACTIVE, CREATED, ERROR, WAIT_FULFILL]
+LEASE_CAN_FULFILL = [CREATED, WAIT_FULFILL]
+LEASE_CAN_EXPIRE = [ACTIVE, CREATED, WAIT_EXPIRE, WAIT_FULFILL]
+OFFER_CAN_ARCHIVE = [DELETED, EXPIRED]
+LEASE_CAN_ARCHIVE = [DELETED, EXPIRED]
+# statuses in which offers and leases make their resource busy
+OFFER_BUSY = [AVAILABLE]
+# leases waiting for cancellation still hold their resource
+LEASE_BUSY = [ACTIVE, CREATED, WAIT_CANCEL]
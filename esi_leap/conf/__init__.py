@@ -12,9 +12,11 @@
 
 
 from esi_leap.conf import api
+from esi_leap.conf import archive
 from esi_leap.conf import dummy_node
 from esi_leap.conf import ironic
 from esi_leap.conf import keystone
+from esi_leap.conf import manager
 from esi_leap.conf import netconf
 from esi_leap.conf import notification
 from esi_leap.conf import pecan
@@ -26,9 +28,11 @@ CONF = cfg.CONF
 
 CONF.register_group(cfg.OptGroup(name="database"))
 api.register_opts(CONF)
+archive.register_opts(CONF)
 dummy_node.register_opts(CONF)
 ironic.register_opts(CONF)
 keystone.register_opts(CONF)
+manager.register_opts(CONF)
 netconf.register_opts(CONF)
 notification.register_opts(CONF)
 pecan.register_opts(CONF)
@@ -0,0 +1,61 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from esi_leap.common.i18n import _
+from oslo_config import cfg
+
+
+opts = [
+    cfg.IntOpt(
+        "event_max_age",
+        default=90,
+        min=0,
+        help=_(
+            "Age in days after which events are moved to the events "
+            "archive table by esi-leap-dbsync archive_events."
+        ),
+    ),
+    cfg.IntOpt(
+        "history_max_age",
+        default=30,
+        min=0,
+        help=_(
+            "Number of days after their last change that expired and "
+            "deleted leases and offers are moved to the history tables "
+            "by esi-leap-dbsync archive_leases_and_offers."
+        ),
+    ),
+    cfg.BoolOpt(
+        "query_history",
+        default=True,
+        help=_(
+            "Include the history tables when listing leases or offers "
+            "with status 'any', 'expired' or 'deleted'."
+        ),
+    ),
+    cfg.IntOpt(
+        "batch_size",
+        default=1000,
+        min=1,
+        help=_(
+            "Number of rows moved in each archive transaction. Smaller "
+            "batches hold locks on the live tables for less time."
+        ),
+    ),
+]
+
+
+archive_group = cfg.OptGroup("archive", title="Archive Options")
+
+
+def register_opts(conf):
+    conf.register_opts(opts, group=archive_group)
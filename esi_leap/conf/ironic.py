@@ -15,8 +15,53 @@ import copy
 from keystoneauth1 import loading
 from oslo_config import cfg
 
+from esi_leap.common.i18n import _
 
-opts = []
+
+opts = [
+    cfg.IntOpt(
+        "node_cache_refresh_interval",
+        default=60,
+        min=1,
+        help=_(
+            "Number of seconds after which the cached Ironic node list "
+            "is reloaded in the background. Nodes updated by esi-leap "
+            "are invalidated in every API and manager process and "
+            "refreshed in the cache on their next lookup. Changes made "
+            "outside esi-leap are seen after at most this interval."
+        ),
+    ),
+    cfg.IntOpt(
+        "max_targeted_node_fetch",
+        default=20,
+        min=0,
+        help=_(
+            "Maximum number of nodes fetched individually from Ironic to "
+            "describe the leases or offers in a response, instead of "
+            "loading the full node inventory into the node cache."
+        ),
+    ),
+    cfg.IntOpt(
+        "connection_pool_size",
+        default=10,
+        min=1,
+        help=_("Maximum number of HTTP connections to Ironic kept open for reuse."),
+    ),
+    cfg.BoolOpt(
+        "tcp_keepalive",
+        default=True,
+        help=_("Enable TCP keep-alive on pooled connections to Ironic."),
+    ),
+    cfg.IntOpt(
+        "user_client_cache_ttl",
+        default=60,
+        min=0,
+        help=_(
+            "Number of seconds an Ironic client authenticated with a "
+            "user token is reused for requests with the same token."
+        ),
+    ),
+]
 ironic_group = cfg.OptGroup("ironic", title="Ironic Options")
 
 
@@ -15,8 +15,21 @@ import copy
 from keystoneauth1 import loading
 from oslo_config import cfg
 
+from esi_leap.common.i18n import _
 
-opts = []
+
+opts = [
+    cfg.IntOpt(
+        "project_cache_ttl",
+        default=300,
+        min=1,
+        help=_(
+            "Number of seconds the Keystone project list is cached for. "
+            "Once expired, the cached list keeps being served while it is "
+            "refreshed in the background."
+        ),
+    ),
+]
 keystone_group = cfg.OptGroup("keystone", title="Keystone Options")
 
 
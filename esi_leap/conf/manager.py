@@ -0,0 +1,65 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from esi_leap.common.i18n import _
+from oslo_config import cfg
+
+
+opts = [
+    cfg.IntOpt(
+        "deadline_check_interval",
+        default=1,
+        min=1,
+        help=_(
+            "Interval in seconds at which the manager checks for lease "
+            "and offer deadlines that have been reached."
+        ),
+    ),
+    cfg.IntOpt(
+        "rescan_interval",
+        default=600,
+        min=1,
+        help=_(
+            "Interval in seconds at which the manager scans the database "
+            "for leases to fulfill and leases and offers to expire. This "
+            "is a safety net for deadlines missed by the scheduler and "
+            "retries leases in a wait status."
+        ),
+    ),
+    cfg.IntOpt(
+        "retry_interval",
+        default=15,
+        min=1,
+        help=_(
+            "Interval in seconds after which the manager retries a lease "
+            "fulfillment or expiry that failed. The interval doubles with "
+            "each failure of the same lease, up to rescan_interval."
+        ),
+    ),
+    cfg.IntOpt(
+        "transition_workers",
+        default=8,
+        min=1,
+        help=_(
+            "Maximum number of lease and offer transitions the manager "
+            "processes concurrently. Transitions on the same resource "
+            "are always processed one at a time."
+        ),
+    ),
+]
+
+
+manager_group = cfg.OptGroup("manager", title="Manager Options")
+
+
+def register_opts(conf):
+    conf.register_opts(opts, group=manager_group)
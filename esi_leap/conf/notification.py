@@ -38,6 +38,83 @@ opts = [
             "the versioned notifications issued by esi-leap."
         ),
     ),
+    cfg.BoolOpt(
+        "async_emit",
+        default=True,
+        help=_(
+            "Send notifications from a background thread instead of "
+            "while the resource lock is held."
+        ),
+    ),
+    cfg.IntOpt(
+        "emit_queue_size",
+        default=1000,
+        min=1,
+        help=_(
+            "Maximum number of notifications waiting to be sent. When "
+            "the queue is full, notifications are sent synchronously."
+        ),
+    ),
+    cfg.IntOpt(
+        "event_buffer_size",
+        default=100,
+        min=1,
+        help=_(
+            "Number of events buffered before they are written to the "
+            "database together. Set to 1 to write each event immediately."
+        ),
+    ),
+    cfg.FloatOpt(
+        "event_flush_interval",
+        default=1.0,
+        min=0,
+        help=_(
+            "Maximum number of seconds an event stays buffered before it "
+            "is written to the database."
+        ),
+    ),
+    cfg.IntOpt(
+        "event_write_attempts",
+        default=3,
+        min=1,
+        help=_(
+            "Number of times a buffered event is written to the database "
+            "before it is dropped. Events that fail are put back in the "
+            "buffer and written with the next batch."
+        ),
+    ),
+    cfg.BoolOpt(
+        "use_outbox",
+        default=False,
+        help=_(
+            "Write lease notifications and their events to an outbox "
+            "table in the same transaction as the lease update. The "
+            "manager then publishes the outbox messages in batches. Only "
+            "lease events go through the outbox; offers do not send "
+            "notifications."
+        ),
+    ),
+    cfg.IntOpt(
+        "outbox_relay_interval",
+        default=5,
+        min=1,
+        help=_("Interval in seconds between publishing outbox messages."),
+    ),
+    cfg.IntOpt(
+        "outbox_batch_size",
+        default=100,
+        min=1,
+        help=_("Maximum number of outbox messages read in one query."),
+    ),
+    cfg.IntOpt(
+        "outbox_retention",
+        default=86400,
+        min=0,
+        help=_(
+            "Number of seconds published outbox messages are kept before "
+            "they are deleted."
+        ),
+    ),
 ]
 
 
@@ -15,9 +15,11 @@ import esi_leap.conf
 _opts = [
     ("DEFAULT", esi_leap.conf.netconf.opts),
     ("api", esi_leap.conf.api.opts),
+    ("archive", esi_leap.conf.archive.opts),
     ("dummy_node", esi_leap.conf.dummy_node.opts),
     ("ironic", esi_leap.conf.ironic.list_opts()),
     ("keystone", esi_leap.conf.keystone.list_opts()),
+    ("manager", esi_leap.conf.manager.opts),
     ("pecan", esi_leap.conf.pecan.opts),
     ("notification", esi_leap.conf.notification.opts),
 ]
@@ -75,6 +75,11 @@ def offer_get_by_uuid(offer_uuid):
     return IMPL.offer_get_by_uuid(offer_uuid)
 
 
+@to_dict
+def offer_get_by_uuids(offer_uuids):
+    return IMPL.offer_get_by_uuids(offer_uuids)
+
+
 @to_dict
 def offer_get_by_name(offer_name):
     return IMPL.offer_get(offer_name)
@@ -85,11 +90,29 @@ def offer_get_all():
     return IMPL.offer_get_all()
 
 
+@to_dict
+def offer_search(
+    start, end, resource_type=None, resource_uuids=None, lessee_id=None, limit=None
+):
+    return IMPL.offer_search(
+        start, end, resource_type, resource_uuids, lessee_id, limit
+    )
+
+
+@to_dict
+def offer_get_all_due_for_expiry(now):
+    return IMPL.offer_get_all_due_for_expiry(now)
+
+
 @to_dict
 def offer_get_conflict_times(offer_ref):
     return IMPL.offer_get_conflict_times(offer_ref)
 
 
+def offer_get_conflict_times_many(offer_uuids):
+    return IMPL.offer_get_conflict_times_many(offer_uuids)
+
+
 def offer_get_next_lease_start_time(offer_uuid, start):
     return IMPL.offer_get_next_lease_start_time(offer_uuid, start)
 
@@ -98,14 +121,31 @@ def offer_verify_availability(offer_ref, start, end):
     return IMPL.offer_verify_availability(offer_ref, start, end)
 
 
+def offer_verify_availability_many(claims):
+    return IMPL.offer_verify_availability_many(claims)
+
+
+def offer_get_descendants(offer_uuid):
+    return IMPL.offer_get_descendants(offer_uuid)
+
+
 def offer_create(values):
     return IMPL.offer_create(values)
 
 
+@to_dict
+def offer_create_many(values_list):
+    return IMPL.offer_create_many(values_list)
+
+
 def offer_update(context, offer_uuid, values):
     return IMPL.offer_update(context, offer_uuid, values)
 
 
+def offer_archive(before, batch_size):
+    return IMPL.offer_archive(before, batch_size)
+
+
 def offer_destroy(offer_uuid):
     return IMPL.offer_destroy(offer_uuid)
 
@@ -116,6 +156,11 @@ def lease_get_by_uuid(lease_uuid):
     return IMPL.lease_get(lease_uuid)
 
 
+@to_dict
+def lease_get_by_uuids(lease_uuids):
+    return IMPL.lease_get_by_uuids(lease_uuids)
+
+
 @to_dict
 def lease_get_by_name(lease_name):
     return IMPL.lease_get(lease_name)
@@ -126,12 +171,39 @@ def lease_get_all():
     return IMPL.lease_get_all()
 
 
+@to_dict
+def lease_get_all_due_for_fulfillment(now):
+    return IMPL.lease_get_all_due_for_fulfillment(now)
+
+
+@to_dict
+def lease_get_all_due_for_expiry(now):
+    return IMPL.lease_get_all_due_for_expiry(now)
+
+
+def lease_get_descendants(lease_uuid):
+    return IMPL.lease_get_descendants(lease_uuid)
+
+
 def lease_create(values):
     return IMPL.lease_create(values)
 
 
-def lease_update(lease_uuid, values):
-    return IMPL.lease_update(lease_uuid, values)
+@to_dict
+def lease_create_many(values_list):
+    return IMPL.lease_create_many(values_list)
+
+
+def lease_update(lease_uuid, values, outbox=None):
+    return IMPL.lease_update(lease_uuid, values, outbox)
+
+
+def lease_update_many(lease_uuids, values, status=None):
+    return IMPL.lease_update_many(lease_uuids, values, status)
+
+
+def lease_archive(before, batch_size):
+    return IMPL.lease_archive(before, batch_size)
 
 
 def lease_destroy(lease_uuid):
@@ -147,6 +219,10 @@ def resource_verify_availability(r_type, r_uuid, start, end):
     return IMPL.resource_verify_availability(r_type, r_uuid, start, end)
 
 
+def resource_get_conflicts_many(claims):
+    return IMPL.resource_get_conflicts_many(claims)
+
+
 def resource_check_admin(
     resource_type,
     resource_uuid,
@@ -165,6 +241,15 @@ def resource_check_admin(
     )
 
 
+# Busy interval
+def busy_interval_rebuild():
+    return IMPL.busy_interval_rebuild()
+
+
+def busy_interval_check():
+    return IMPL.busy_interval_check()
+
+
 # Event
 @to_dict
 def event_get_all():
@@ -175,6 +260,32 @@ def event_create(values):
     return IMPL.event_create(values)
 
 
+def event_create_many(values_list):
+    return IMPL.event_create_many(values_list)
+
+
+def event_archive(before, batch_size, purge=False):
+    return IMPL.event_archive(before, batch_size, purge)
+
+
+# Outbox
+def outbox_create(entries):
+    return IMPL.outbox_create(entries)
+
+
+@to_dict
+def outbox_get_undelivered(limit):
+    return IMPL.outbox_get_undelivered(limit)
+
+
+def outbox_mark_delivered(message_ids, delivered_at):
+    return IMPL.outbox_mark_delivered(message_ids, delivered_at)
+
+
+def outbox_purge_delivered(before):
+    return IMPL.outbox_purge_delivered(before)
+
+
 # Console Auth Token
 def console_auth_token_create(values):
     return IMPL.console_auth_token_create(values)
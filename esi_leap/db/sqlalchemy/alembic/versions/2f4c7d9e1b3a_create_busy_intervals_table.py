@@ -0,0 +1,109 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""Create busy intervals table
+
+Revision ID: 2f4c7d9e1b3a
+Revises: 8c3d2b6a4e10
+Create Date: 2026-10-18 14:36:52.180433
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from esi_leap.common import statuses
+
+
+# revision identifiers, used by Alembic.
+revision = "2f4c7d9e1b3a"
+down_revision = "8c3d2b6a4e10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "busy_intervals",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("object_type", sa.String(length=36), nullable=False),
+        sa.Column("object_uuid", sa.String(length=36), nullable=False),
+        sa.Column("resource_type", sa.String(length=36), nullable=False),
+        sa.Column("resource_uuid", sa.String(length=36), nullable=False),
+        sa.Column("offer_uuid", sa.String(length=36), nullable=True),
+        sa.Column("parent_lease_uuid", sa.String(length=36), nullable=True),
+        sa.Column("start_time", sa.DateTime(), nullable=True),
+        sa.Column("end_time", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "object_type", "object_uuid", name="uniq_busy_intervals0object"
+        ),
+    )
+
+    op.create_index(
+        "busy_interval_resource_time_idx",
+        "busy_intervals",
+        ["resource_type", "resource_uuid", "start_time", "end_time"],
+        unique=False,
+    )
+    op.create_index(
+        "busy_interval_offer_time_idx",
+        "busy_intervals",
+        ["offer_uuid", "start_time", "end_time"],
+        unique=False,
+    )
+    op.create_index(
+        "busy_interval_parent_lease_time_idx",
+        "busy_intervals",
+        ["parent_lease_uuid", "start_time", "end_time"],
+        unique=False,
+    )
+
+    # conflict checks read busy_intervals now, so the offer and lease
+    # resource indexes only serve listings, which filter on the resource
+    # alone. The other conflict check indexes are still used:
+    # lease_offer_status_time_idx by the available offer listing and the
+    # lookups of the leases of an offer, and the two parent lease indexes
+    # by the walk of lease descendants and the archive child checks.
+    op.drop_index("offer_resource_status_time_idx", table_name="offers")
+    op.drop_index("lease_resource_status_time_idx", table_name="leases")
+    op.create_index(
+        "lease_resource_idx",
+        "leases",
+        ["resource_type", "resource_uuid"],
+        unique=False,
+    )
+
+    # populate the index from the existing offers and leases
+    offer_busy = ", ".join("'%s'" % status for status in statuses.OFFER_BUSY)
+    lease_busy = ", ".join("'%s'" % status for status in statuses.LEASE_BUSY)
+    op.execute(
+        "INSERT INTO busy_intervals (object_type, object_uuid, resource_type, "
+        "resource_uuid, offer_uuid, parent_lease_uuid, start_time, end_time) "
+        "SELECT 'offer', uuid, resource_type, resource_uuid, NULL, "
+        "parent_lease_uuid, start_time, end_time FROM offers "
+        "WHERE status IN (%s)" % offer_busy
+    )
+    op.execute(
+        "INSERT INTO busy_intervals (object_type, object_uuid, resource_type, "
+        "resource_uuid, offer_uuid, parent_lease_uuid, start_time, end_time) "
+        "SELECT 'lease', uuid, resource_type, resource_uuid, offer_uuid, "
+        "parent_lease_uuid, start_time, end_time FROM leases "
+        "WHERE status IN (%s)" % lease_busy
+    )
+
+
+def downgrade():
+    pass
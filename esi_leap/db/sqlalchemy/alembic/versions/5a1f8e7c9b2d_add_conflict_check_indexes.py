@@ -0,0 +1,66 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""Add conflict check indexes
+
+Revision ID: 5a1f8e7c9b2d
+Revises: 11e06aea1af5
+Create Date: 2026-10-18 09:12:41.318504
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "5a1f8e7c9b2d"
+down_revision = "11e06aea1af5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "offer_resource_status_time_idx",
+        "offers",
+        ["resource_type", "resource_uuid", "status", "start_time", "end_time"],
+        unique=False,
+    )
+    op.create_index(
+        "offer_parent_lease_status_time_idx",
+        "offers",
+        ["parent_lease_uuid", "status", "start_time", "end_time"],
+        unique=False,
+    )
+    op.create_index(
+        "lease_resource_status_time_idx",
+        "leases",
+        ["resource_type", "resource_uuid", "status", "start_time", "end_time"],
+        unique=False,
+    )
+    op.create_index(
+        "lease_offer_status_time_idx",
+        "leases",
+        ["offer_uuid", "status", "start_time", "end_time"],
+        unique=False,
+    )
+    op.create_index(
+        "lease_parent_lease_status_time_idx",
+        "leases",
+        ["parent_lease_uuid", "status", "start_time", "end_time"],
+        unique=False,
+    )
+
+
+def downgrade():
+    pass
@@ -0,0 +1,54 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""Add due time indexes
+
+Revision ID: 8c3d2b6a4e10
+Revises: 5a1f8e7c9b2d
+Create Date: 2026-10-18 10:02:17.694215
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "8c3d2b6a4e10"
+down_revision = "5a1f8e7c9b2d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "lease_status_start_time_idx",
+        "leases",
+        ["status", "start_time"],
+        unique=False,
+    )
+    op.create_index(
+        "lease_status_end_time_idx",
+        "leases",
+        ["status", "end_time"],
+        unique=False,
+    )
+    op.create_index(
+        "offer_status_end_time_idx",
+        "offers",
+        ["status", "end_time"],
+        unique=False,
+    )
+
+
+def downgrade():
+    pass
@@ -0,0 +1,56 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Create events archive table
+
+Revision ID: 9d4a7c1e5f82
+Revises: 6b9e2d4f7a31
+Create Date: 2026-10-18 17:22:40.913586
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9d4a7c1e5f82"
+down_revision = "6b9e2d4f7a31"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "events_archive",
+        sa.Column("archive_id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("event_type", sa.String(length=36), nullable=False),
+        sa.Column("event_time", sa.DateTime(), nullable=False),
+        sa.Column("object_type", sa.String(length=36), nullable=True),
+        sa.Column("object_uuid", sa.String(length=36), nullable=True),
+        sa.Column("resource_type", sa.String(length=36), nullable=True),
+        sa.Column("resource_uuid", sa.String(length=36), nullable=True),
+        sa.Column("lessee_id", sa.String(length=255), nullable=True),
+        sa.Column("owner_id", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("archive_id"),
+    )
+
+    op.create_index(
+        "event_archive_time_idx", "events_archive", ["event_time"], unique=False
+    )
+
+
+def downgrade():
+    pass
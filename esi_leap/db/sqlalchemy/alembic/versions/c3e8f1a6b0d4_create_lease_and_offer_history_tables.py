@@ -0,0 +1,113 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Create lease and offer history tables
+
+Revision ID: c3e8f1a6b0d4
+Revises: 9d4a7c1e5f82
+Create Date: 2026-10-18 18:40:07.265139
+
+"""
+
+from alembic import op
+from oslo_db.sqlalchemy import types as db_types
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c3e8f1a6b0d4"
+down_revision = "9d4a7c1e5f82"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "offers_history",
+        sa.Column("history_id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("uuid", sa.String(length=36), nullable=False),
+        sa.Column("name", sa.String(length=35), nullable=True),
+        sa.Column("project_id", sa.String(length=255), nullable=False),
+        sa.Column("lessee_id", sa.String(length=255), nullable=True),
+        sa.Column("resource_type", sa.String(length=36), nullable=False),
+        sa.Column("resource_uuid", sa.String(length=36), nullable=False),
+        sa.Column("start_time", sa.DateTime(), nullable=True),
+        sa.Column("end_time", sa.DateTime(), nullable=True),
+        sa.Column("status", sa.String(length=15), nullable=False),
+        sa.Column("properties", db_types.JsonEncodedDict(), nullable=True),
+        sa.Column("parent_lease_uuid", sa.String(length=36), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("history_id"),
+        sa.UniqueConstraint("uuid"),
+    )
+    op.create_index("offer_history_uuid_idx", "offers_history", ["uuid"], unique=False)
+    op.create_index("offer_history_id_idx", "offers_history", ["id"], unique=False)
+    op.create_index(
+        "offer_history_project_id_idx",
+        "offers_history",
+        ["project_id"],
+        unique=False,
+    )
+    op.create_index(
+        "offer_history_resource_idx",
+        "offers_history",
+        ["resource_type", "resource_uuid"],
+        unique=False,
+    )
+
+    op.create_table(
+        "leases_history",
+        sa.Column("history_id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("uuid", sa.String(length=36), nullable=False),
+        sa.Column("name", sa.String(length=35), nullable=True),
+        sa.Column("project_id", sa.String(length=255), nullable=False),
+        sa.Column("owner_id", sa.String(length=255), nullable=False),
+        sa.Column("purpose", sa.String(length=255), nullable=True),
+        sa.Column("resource_type", sa.String(length=36), nullable=False),
+        sa.Column("resource_uuid", sa.String(length=36), nullable=False),
+        sa.Column("start_time", sa.DateTime(), nullable=True),
+        sa.Column("end_time", sa.DateTime(), nullable=True),
+        sa.Column("fulfill_time", sa.DateTime(), nullable=True),
+        sa.Column("expire_time", sa.DateTime(), nullable=True),
+        sa.Column("status", sa.String(length=15), nullable=False),
+        sa.Column("properties", db_types.JsonEncodedDict(), nullable=True),
+        sa.Column("offer_uuid", sa.String(length=36), nullable=True),
+        sa.Column("parent_lease_uuid", sa.String(length=36), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("history_id"),
+        sa.UniqueConstraint("uuid"),
+    )
+    op.create_index("lease_history_uuid_idx", "leases_history", ["uuid"], unique=False)
+    op.create_index("lease_history_id_idx", "leases_history", ["id"], unique=False)
+    op.create_index(
+        "lease_history_project_id_idx",
+        "leases_history",
+        ["project_id"],
+        unique=False,
+    )
+    op.create_index(
+        "lease_history_owner_id_idx", "leases_history", ["owner_id"], unique=False
+    )
+    op.create_index(
+        "lease_history_resource_idx",
+        "leases_history",
+        ["resource_type", "resource_uuid"],
+        unique=False,
+    )
+
+
+def downgrade():
+    pass
@@ -10,6 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
 import sys
 import threading
 
@@ -57,6 +58,76 @@ def model_query(model, *args):
         return query
 
 
+def paginate_query(model, query, limit=None, marker=None):
+    """Apply keyset pagination ordered by primary key.
+
+    :param model: base model of the query
+    :param query: query to paginate
+    :param limit: maximum number of rows to return
+    :param marker: id of the last row of the previous page
+    """
+    if marker is not None:
+        query = query.filter(model.id > marker)
+    query = query.order_by(model.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def _get_marker_id(model, marker):
+    if marker is None:
+        return None
+    marker_ref = model_query(model).filter_by(uuid=marker).one_or_none()
+    if marker_ref is None:
+        raise exception.InvalidMarker(marker=marker)
+    return marker_ref.id
+
+
+def _get_history_marker(model, history_model, marker):
+    if marker is None:
+        return None
+    marker_ref = model_query(model).filter_by(uuid=marker).one_or_none()
+    if marker_ref is None:
+        marker_ref = model_query(history_model).filter_by(uuid=marker).one_or_none()
+    if marker_ref is None:
+        raise exception.InvalidMarker(marker=marker)
+    return marker_ref.id, marker_ref.uuid
+
+
+def _paginate_history_query(model, query, limit=None, marker=None):
+    """Apply keyset pagination ordered by id and uuid.
+
+    A live row can reuse the id of an archived row, so rows of a table
+    and of its history table are ordered by id, then uuid.
+
+    :param marker: (id, uuid) of the last row of the previous page
+    """
+    if marker is not None:
+        marker_id, marker_uuid = marker
+        query = query.filter(
+            (model.id > marker_id)
+            | ((model.id == marker_id) & (model.uuid > marker_uuid))
+        )
+    query = query.order_by(model.id, model.uuid)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def _can_match_archived(status, archivable):
+    return not status or any(s in archivable for s in status)
+
+
+def _merge_pages(limit, *queries):
+    """Merge pages of a table and of its history table.
+
+    Archived rows keep their ids, which live rows can reuse, so the pages
+    are merged by id and uuid like _paginate_history_query orders them.
+    """
+    rows = sorted(itertools.chain(*queries), key=lambda row: (row.id, row.uuid))
+    return rows[:limit] if limit is not None else rows
+
+
 # Helpers for building constraints / equality checks
 
 
@@ -106,6 +177,11 @@ def offer_get_by_uuid(offer_uuid):
     return offer_ref
 
 
+def offer_get_by_uuids(offer_uuids):
+    query = model_query(models.Offer)
+    return query.filter(models.Offer.uuid.in_(offer_uuids)).all()
+
+
 def offer_get_by_name(name):
     query = model_query(models.Offer)
     offers = query.filter_by(name=name).all()
@@ -113,8 +189,12 @@ def offer_get_by_name(name):
 
 
 def offer_get_all(filters):
-    query = model_query(models.Offer)
+    """Return the offers matching the filters.
 
+    With the include_history filter set, archived offers are returned
+    too, unless the filters only match offers that cannot be archived.
+    """
+    include_history = filters.pop("include_history", False)
     lessee_id = filters.pop("lessee_id", None)
     start = filters.pop("start_time", None)
     end = filters.pop("end_time", None)
@@ -122,43 +202,129 @@ def offer_get_all(filters):
     a_start = filters.pop("available_start_time", None)
     status = filters.pop("status", None)
     a_end = filters.pop("available_end_time", None)
+    limit = filters.pop("limit", None)
+    marker = filters.pop("marker", None)
+
+    def build_query(model):
+        query = model_query(model).filter_by(**filters)
+
+        if status:
+            query = query.filter((model.status.in_(status)))
+
+        if lessee_id:
+            query = _add_offer_lessee_filter(query, lessee_id, model)
+
+        if start and end:
+            if time_filter_type == constants.WITHIN_TIME_FILTER:
+                query = query.filter(
+                    ((start <= model.start_time) & (end >= model.start_time))
+                    | ((start <= model.end_time) & (end >= model.end_time))
+                )
+            else:
+                query = query.filter(
+                    (start >= model.start_time) & (end <= model.end_time)
+                )
+        return query
 
-    query = query.filter_by(**filters)
+    query = build_query(models.Offer)
+    if a_start and a_end:
+        # exclude offers with a conflicting lease using a correlated
+        # NOT EXISTS, so the query does not grow with the number of offers
+        lease_conflict = sa.exists().where(
+            models.Lease.offer_uuid == models.Offer.uuid,
+            models.Lease.status.in_(statuses.LEASE_BUSY),
+            lease_conflict_clause(a_start, a_end),
+        )
+        query = query.filter(
+            models.Offer.start_time <= a_start,
+            models.Offer.end_time >= a_end,
+            ~lease_conflict,
+        )
 
-    if status:
-        query = query.filter((models.Offer.status.in_(status)))
+    # archived offers are never available
+    include_history = (
+        include_history
+        and not (a_start and a_end)
+        and _can_match_archived(status, statuses.OFFER_CAN_ARCHIVE)
+    )
+    if not include_history:
+        marker_id = _get_marker_id(models.Offer, marker)
+        return paginate_query(models.Offer, query, limit, marker_id)
+
+    marker = _get_history_marker(models.Offer, models.OfferHistory, marker)
+    return _merge_pages(
+        limit,
+        _paginate_history_query(models.Offer, query, limit, marker),
+        _paginate_history_query(
+            models.OfferHistory, build_query(models.OfferHistory), limit, marker
+        ),
+    )
 
-    if lessee_id:
-        lessee_id_list = keystone.get_parent_project_id_tree(lessee_id)
-        query = query.filter(
-            or_(
-                models.Offer.project_id == lessee_id,
-                models.Offer.lessee_id.__eq__(None),
-                models.Offer.lessee_id.in_(lessee_id_list),
-            )
+
+def _add_offer_lessee_filter(query, lessee_id, model=models.Offer):
+    lessee_id_list = keystone.get_parent_project_id_tree(lessee_id)
+    return query.filter(
+        or_(
+            model.project_id == lessee_id,
+            model.lessee_id.__eq__(None),
+            model.lessee_id.in_(lessee_id_list),
         )
+    )
 
-    if start and end:
-        if time_filter_type == constants.WITHIN_TIME_FILTER:
-            query = query.filter(
-                ((start <= models.Offer.start_time) & (end >= models.Offer.start_time))
-                | ((start <= models.Offer.end_time) & (end >= models.Offer.end_time))
-            )
-        else:
-            query = query.filter(
-                (start >= models.Offer.start_time) & (end <= models.Offer.end_time)
-            )
 
-    if a_start and a_end:
-        for o in query:
-            try:
-                offer_verify_availability(o, a_start, a_end)
-            except exception.OfferNoTimeAvailabilities:
-                query = query.filter(models.Offer.uuid != o.uuid)
+def offer_search(
+    start, end, resource_type=None, resource_uuids=None, lessee_id=None, limit=None
+):
+    """Return the available offers that are free for a whole time window.
+
+    Offers are ranked by fit: offers that end soonest after the window,
+    then offers that start latest before it, come first. This leaves
+    longer offers free for longer requests.
+
+    :param start: start of the window
+    :param end: end of the window
+    :param resource_type: only return offers for this resource type
+    :param resource_uuids: only return offers for these resources
+    :param lessee_id: only return offers visible to this project
+    :param limit: maximum number of offers to return
+    """
+    query = model_query(models.Offer)
+
+    busy = sa.exists().where(
+        models.BusyInterval.offer_uuid == models.Offer.uuid,
+        models.BusyInterval.start_time < end,
+        models.BusyInterval.end_time > start,
+    )
+    query = query.filter(
+        models.Offer.status == statuses.AVAILABLE,
+        models.Offer.start_time <= start,
+        models.Offer.end_time >= end,
+        ~busy,
+    )
 
+    if resource_type is not None:
+        query = query.filter(models.Offer.resource_type == resource_type)
+    if resource_uuids is not None:
+        query = query.filter(models.Offer.resource_uuid.in_(resource_uuids))
+    if lessee_id:
+        query = _add_offer_lessee_filter(query, lessee_id)
+
+    query = query.order_by(
+        models.Offer.end_time, models.Offer.start_time.desc(), models.Offer.id
+    )
+    if limit is not None:
+        query = query.limit(limit)
     return query
 
 
+def offer_get_all_due_for_expiry(now):
+    query = model_query(models.Offer)
+    return query.filter(
+        models.Offer.status.in_(statuses.OFFER_CAN_DELETE),
+        models.Offer.end_time <= now,
+    ).order_by(models.Offer.id)
+
+
 def offer_get_conflict_times(offer_ref):
     l_query = model_query(models.Lease)
 
@@ -175,6 +341,32 @@ def offer_get_conflict_times(offer_ref):
     )
 
 
+def offer_get_conflict_times_many(offer_uuids):
+    """Return the conflict times of several offers in one query.
+
+    :param offer_uuids: uuids of the offers
+    :returns: (offer_uuid, start_time, end_time) rows ordered by offer
+        uuid and start time
+    """
+    if not offer_uuids:
+        return []
+
+    l_query = model_query(models.Lease)
+
+    return (
+        l_query.with_entities(
+            models.Lease.offer_uuid, models.Lease.start_time, models.Lease.end_time
+        )
+        .filter(
+            models.Lease.offer_uuid.in_(offer_uuids),
+            (models.Lease.status != statuses.EXPIRED)
+            & (models.Lease.status != statuses.DELETED),
+        )
+        .order_by(models.Lease.offer_uuid, models.Lease.start_time)
+        .all()
+    )
+
+
 def offer_get_next_lease_start_time(offer_uuid, start):
     l_query = model_query(models.Lease)
 
@@ -197,17 +389,9 @@ def offer_verify_availability(offer_ref, start, end):
             offer_uuid=offer_ref.uuid, start_time=start, end_time=end
         )
 
-    l_query = model_query(models.Lease)
-
-    leases = l_query.with_entities(
-        models.Lease.start_time, models.Lease.end_time
-    ).filter(
-        (models.Lease.offer_uuid == offer_ref.uuid),
-        (models.Lease.status == statuses.CREATED)
-        | (models.Lease.status == statuses.ACTIVE),
-    )
-    leases = add_lease_conflict_filter(leases, start, end)
-    conflict = leases.first()
+    conflict = _busy_interval_query(
+        start, end, models.BusyInterval.offer_uuid == offer_ref.uuid
+    ).first()
 
     if conflict:
         raise exception.OfferNoTimeAvailabilities(
@@ -215,6 +399,45 @@ def offer_verify_availability(offer_ref, start, end):
         )
 
 
+def offer_verify_availability_many(claims):
+    """Verify that several offers are available for the given times.
+
+    :param claims: a list of (offer_ref, start, end) tuples
+    :raises: OfferNoTimeAvailabilities for the first claim that conflicts
+    """
+    if not claims:
+        return
+
+    for offer_ref, start, end in claims:
+        if start < offer_ref.start_time or end > offer_ref.end_time:
+            raise exception.OfferNoTimeAvailabilities(
+                offer_uuid=offer_ref.uuid, start_time=start, end_time=end
+            )
+
+    conflict = (
+        model_query(models.BusyInterval)
+        .with_entities(models.BusyInterval.offer_uuid)
+        .filter(
+            or_(
+                *[
+                    (models.BusyInterval.offer_uuid == offer_ref.uuid)
+                    & (models.BusyInterval.start_time < end)
+                    & (models.BusyInterval.end_time > start)
+                    for offer_ref, start, end in claims
+                ]
+            )
+        )
+        .first()
+    )
+
+    if conflict:
+        for offer_ref, start, end in claims:
+            if offer_ref.uuid == conflict.offer_uuid:
+                raise exception.OfferNoTimeAvailabilities(
+                    offer_uuid=offer_ref.uuid, start_time=start, end_time=end
+                )
+
+
 def offer_create(values):
     offer_ref = models.Offer()
     offer_ref.update(values)
@@ -222,9 +445,25 @@ def offer_create(values):
     with _session_for_write() as session:
         session.add(offer_ref)
         session.flush()
+        _busy_interval_sync(session, "offer", offer_ref)
         return offer_ref
 
 
+def offer_create_many(values_list):
+    """Create several offers in one transaction."""
+    offer_refs = []
+    with _session_for_write() as session:
+        for values in values_list:
+            offer_ref = models.Offer()
+            offer_ref.update(values)
+            session.add(offer_ref)
+            offer_refs.append(offer_ref)
+        session.flush()
+        for offer_ref in offer_refs:
+            _busy_interval_sync(session, "offer", offer_ref)
+        return offer_refs
+
+
 def offer_update(offer_uuid, values):
     with _session_for_write() as session:
         query = model_query(models.Offer)
@@ -246,6 +485,7 @@ def offer_update(offer_uuid, values):
 
         offer_ref.update(values)
         session.flush()
+        _busy_interval_sync(session, "offer", offer_ref)
         return offer_ref
 
 
@@ -258,6 +498,7 @@ def offer_destroy(offer_uuid):
             raise exception.OfferNotFound(offer_uuid=offer_uuid)
 
         model_query(models.Offer).filter_by(uuid=offer_uuid).delete()
+        _busy_interval_delete(session, "offer", offer_uuid)
         session.flush()
 
 
@@ -278,6 +519,11 @@ def lease_get_by_uuid(lease_uuid):
     return result
 
 
+def lease_get_by_uuids(lease_uuids):
+    query = model_query(models.Lease)
+    return query.filter(models.Lease.uuid.in_(lease_uuids)).all()
+
+
 def lease_get_by_name(name):
     query = model_query(models.Lease)
     leases = query.filter_by(name=name).all()
@@ -285,39 +531,141 @@ def lease_get_by_name(name):
 
 
 def lease_get_all(filters):
-    query = model_query(models.Lease)
+    """Return the leases matching the filters.
 
+    With the include_history filter set, archived leases are returned
+    too, unless the filters only match leases that cannot be archived.
+    """
+    include_history = filters.pop("include_history", False)
     start = filters.pop("start_time", None)
     end = filters.pop("end_time", None)
     time_filter_type = filters.pop("time_filter_type", None)
     status = filters.pop("status", None)
     project_or_owner_id = filters.pop("project_or_owner_id", None)
+    limit = filters.pop("limit", None)
+    marker = filters.pop("marker", None)
 
-    query = query.filter_by(**filters)
+    def build_query(model):
+        query = model_query(model).filter_by(**filters)
 
-    if status:
-        query = query.filter((models.Lease.status.in_(status)))
+        if status:
+            query = query.filter((model.status.in_(status)))
 
-    if start and end:
-        if time_filter_type == constants.WITHIN_TIME_FILTER:
-            query = query.filter(
-                ((start <= models.Lease.start_time) & (end >= models.Lease.start_time))
-                | ((start <= models.Lease.end_time) & (end >= models.Lease.end_time))
-                | ((start >= models.Lease.start_time) & (end <= models.Lease.end_time))
-            )
+        if start and end:
+            if time_filter_type == constants.WITHIN_TIME_FILTER:
+                query = query.filter(
+                    ((start <= model.start_time) & (end >= model.start_time))
+                    | ((start <= model.end_time) & (end >= model.end_time))
+                    | ((start >= model.start_time) & (end <= model.end_time))
+                )
 
-        else:
+            else:
+                query = query.filter(
+                    (start >= model.start_time) & (end <= model.end_time)
+                )
+
+        if project_or_owner_id:
             query = query.filter(
-                (start >= models.Lease.start_time) & (end <= models.Lease.end_time)
+                (project_or_owner_id == model.project_id)
+                | (project_or_owner_id == model.owner_id)
             )
+        return query
 
-    if project_or_owner_id:
-        query = query.filter(
-            (project_or_owner_id == models.Lease.project_id)
-            | (project_or_owner_id == models.Lease.owner_id)
+    include_history = include_history and _can_match_archived(
+        status, statuses.LEASE_CAN_ARCHIVE
+    )
+    if not include_history:
+        marker_id = _get_marker_id(models.Lease, marker)
+        return paginate_query(models.Lease, build_query(models.Lease), limit, marker_id)
+
+    marker = _get_history_marker(models.Lease, models.LeaseHistory, marker)
+    return _merge_pages(
+        limit,
+        _paginate_history_query(models.Lease, build_query(models.Lease), limit, marker),
+        _paginate_history_query(
+            models.LeaseHistory, build_query(models.LeaseHistory), limit, marker
+        ),
+    )
+
+
+def lease_get_all_due_for_fulfillment(now):
+    query = model_query(models.Lease)
+    return query.filter(
+        models.Lease.status.in_(statuses.LEASE_CAN_FULFILL),
+        models.Lease.start_time <= now,
+        models.Lease.end_time >= now,
+    ).order_by(models.Lease.id)
+
+
+def lease_get_all_due_for_expiry(now):
+    query = model_query(models.Lease)
+    return query.filter(
+        models.Lease.status.in_(statuses.LEASE_CAN_EXPIRE),
+        models.Lease.end_time <= now,
+    ).order_by(models.Lease.id)
+
+
+def _get_descendants(anchor):
+    """Return the leases and offers below the leases selected by anchor.
+
+    Descendants are walked in a single recursive CTE over leases: a lease
+    is a child of a lease in the tree if its parent_lease_uuid points at
+    it, or if it was claimed from an offer whose parent_lease_uuid points
+    at it. Only leases and offers that can still be deleted are followed.
+
+    :param anchor: select of the uuids of the leases at the top of the tree
+    :returns: a tuple of the lease tree and the offers created on it
+    """
+    tree = anchor.cte(name="lease_tree", recursive=True)
+    child_lease = sa.orm.aliased(models.Lease)
+    child_offer = sa.orm.aliased(models.Offer)
+    tree = tree.union(
+        sa.select(child_lease.uuid)
+        .select_from(tree)
+        .outerjoin(
+            child_offer,
+            (child_offer.parent_lease_uuid == tree.c.uuid)
+            & child_offer.status.in_(statuses.OFFER_CAN_DELETE),
+        )
+        .join(
+            child_lease,
+            (child_lease.parent_lease_uuid == tree.c.uuid)
+            | (child_lease.offer_uuid == child_offer.uuid),
         )
+        .where(child_lease.status.in_(statuses.LEASE_CAN_DELETE))
+    )
+    tree_uuids = sa.select(tree.c.uuid)
 
-    return query
+    leases = (
+        model_query(models.Lease)
+        .filter(models.Lease.uuid.in_(tree_uuids))
+        .order_by(models.Lease.id)
+        .all()
+    )
+    offers = (
+        model_query(models.Offer)
+        .filter(
+            models.Offer.parent_lease_uuid.in_(tree_uuids),
+            models.Offer.status.in_(statuses.OFFER_CAN_DELETE),
+        )
+        .order_by(models.Offer.id)
+        .all()
+    )
+    return leases, offers
+
+
+def lease_get_descendants(lease_uuid):
+    anchor = sa.select(models.Lease.uuid).where(models.Lease.uuid == lease_uuid)
+    leases, offers = _get_descendants(anchor)
+    return [lease for lease in leases if lease.uuid != lease_uuid], offers
+
+
+def offer_get_descendants(offer_uuid):
+    anchor = sa.select(models.Lease.uuid).where(
+        models.Lease.offer_uuid == offer_uuid,
+        models.Lease.status.in_(statuses.LEASE_CAN_DELETE),
+    )
+    return _get_descendants(anchor)
 
 
 def lease_create(values):
@@ -327,10 +675,31 @@ def lease_create(values):
     with _session_for_write() as session:
         session.add(lease_ref)
         session.flush()
+        _busy_interval_sync(session, "lease", lease_ref)
         return lease_ref
 
 
-def lease_update(lease_uuid, values):
+def lease_create_many(values_list):
+    """Create several leases in one transaction."""
+    lease_refs = []
+    with _session_for_write() as session:
+        for values in values_list:
+            lease_ref = models.Lease()
+            lease_ref.update(values)
+            session.add(lease_ref)
+            lease_refs.append(lease_ref)
+        session.flush()
+        for lease_ref in lease_refs:
+            _busy_interval_sync(session, "lease", lease_ref)
+        return lease_refs
+
+
+def lease_update(lease_uuid, values, outbox=None):
+    """Update a lease.
+
+    :param outbox: notifications about the update, written to the outbox
+        in the same transaction
+    """
     with _session_for_write() as session:
         query = model_query(models.Lease)
         lease_ref = query.filter_by(uuid=lease_uuid).one_or_none()
@@ -351,9 +720,54 @@ def lease_update(lease_uuid, values):
 
         lease_ref.update(values)
         session.flush()
+        _busy_interval_sync(session, "lease", lease_ref)
+        if outbox:
+            _outbox_add(session, outbox)
         return lease_ref
 
 
+def lease_update_many(lease_uuids, values, status=None):
+    """Update several leases with one statement.
+
+    When the status changes, the busy interval of each lease is synced
+    with its new status.
+
+    :param lease_uuids: uuids of the leases to update
+    :param values: values to set on every lease
+    :param status: if set, only leases with one of these statuses are
+        updated
+    :returns: the uuids of the updated leases
+    """
+    with _session_for_write() as session:
+        query = model_query(models.Lease).filter(models.Lease.uuid.in_(lease_uuids))
+        if status is not None:
+            query = query.filter(models.Lease.status.in_(status))
+        updated = [row.uuid for row in query.with_entities(models.Lease.uuid)]
+        if not updated:
+            return []
+
+        model_query(models.Lease).filter(models.Lease.uuid.in_(updated)).update(
+            values, synchronize_session=False
+        )
+
+        if "status" in values:
+            # the new status may make the resources busy or free them
+            leases = model_query(models.Lease).filter(models.Lease.uuid.in_(updated))
+            for lease_ref in leases:
+                _busy_interval_sync(session, "lease", lease_ref)
+            return updated
+
+        interval_values = {
+            k: values[k] for k in ("start_time", "end_time") if k in values
+        }
+        if interval_values:
+            model_query(models.BusyInterval).filter(
+                models.BusyInterval.object_type == "lease",
+                models.BusyInterval.object_uuid.in_(updated),
+            ).update(interval_values, synchronize_session=False)
+        return updated
+
+
 def lease_destroy(lease_uuid):
     with _session_for_write() as session:
         query = model_query(models.Lease)
@@ -362,6 +776,7 @@ def lease_destroy(lease_uuid):
         if not lease_ref:
             raise exception.LeaseNotFound(lease_uuid=lease_uuid)
         query.delete()
+        _busy_interval_delete(session, "lease", lease_uuid)
         session.flush()
 
 
@@ -371,83 +786,212 @@ def lease_verify_child_availability(lease_ref, start, end):
             lease_uuid=lease_ref.uuid, start_time=start, end_time=end
         )
 
-    # check lease conflicts
-    l_query = model_query(models.Lease)
-    leases = l_query.with_entities(
-        models.Lease.start_time, models.Lease.end_time
-    ).filter(
-        (models.Lease.parent_lease_uuid == lease_ref.uuid),
-        (models.Lease.status == statuses.CREATED)
-        | (models.Lease.status == statuses.ACTIVE),
-    )
-    leases = add_lease_conflict_filter(leases, start, end)
-    lease_conflict = leases.first()
+    conflict = _busy_interval_query(
+        start, end, models.BusyInterval.parent_lease_uuid == lease_ref.uuid
+    ).first()
 
-    if lease_conflict:
+    if conflict:
         raise exception.LeaseNoTimeAvailabilities(
             lease_uuid=lease_ref.uuid, start_time=start, end_time=end
         )
 
-    # check offer conflicts
-    o_query = model_query(models.Offer)
-    offers = o_query.with_entities(
-        models.Offer.start_time, models.Offer.end_time
-    ).filter(
-        (models.Offer.parent_lease_uuid == lease_ref.uuid),
-        (models.Offer.status == statuses.AVAILABLE),
+
+def lease_conflict_clause(start, end):
+    return (
+        ((start >= models.Lease.start_time) & (start < models.Lease.end_time))
+        | ((end > models.Lease.start_time) & (end <= models.Lease.end_time))
+        | ((start <= models.Lease.start_time) & (end >= models.Lease.end_time))
     )
-    offers = add_offer_conflict_filter(offers, start, end)
-    offer_conflict = offers.first()
 
-    if offer_conflict:
-        raise exception.LeaseNoTimeAvailabilities(
-            lease_uuid=lease_ref.uuid, start_time=start, end_time=end
+
+def add_lease_conflict_filter(query, start, end):
+    return query.filter(lease_conflict_clause(start, end))
+
+
+# Resources
+def resource_verify_availability(r_type, r_uuid, start, end):
+    conflict = _busy_interval_query(
+        start,
+        end,
+        models.BusyInterval.resource_type == r_type,
+        models.BusyInterval.resource_uuid == r_uuid,
+    ).first()
+
+    if conflict:
+        raise exception.ResourceTimeConflict(resource_uuid=r_uuid, resource_type=r_type)
+
+
+def resource_get_conflicts_many(claims):
+    """Find which of several claims conflict with busy intervals.
+
+    :param claims: a list of (resource_type, resource_uuid,
+        parent_lease_uuid, start, end) tuples. A claim with a parent
+        lease is checked against the other children of that lease, and
+        any other claim against its resource.
+    :returns: the indexes of the conflicting claims
+    """
+    if not claims:
+        return []
+
+    def matches(interval, r_type, r_uuid, parent_lease_uuid):
+        if parent_lease_uuid:
+            return interval.parent_lease_uuid == parent_lease_uuid
+        return (interval.resource_type == r_type) & (interval.resource_uuid == r_uuid)
+
+    intervals = (
+        model_query(models.BusyInterval)
+        .with_entities(
+            models.BusyInterval.resource_type,
+            models.BusyInterval.resource_uuid,
+            models.BusyInterval.parent_lease_uuid,
+            models.BusyInterval.start_time,
+            models.BusyInterval.end_time,
+        )
+        .filter(
+            or_(
+                *[
+                    matches(models.BusyInterval, r_type, r_uuid, parent)
+                    & (models.BusyInterval.start_time < end)
+                    & (models.BusyInterval.end_time > start)
+                    for r_type, r_uuid, parent, start, end in claims
+                ]
+            )
         )
+        .all()
+    )
 
+    return [
+        i
+        for i, (r_type, r_uuid, parent, start, end) in enumerate(claims)
+        if any(
+            matches(interval, r_type, r_uuid, parent)
+            and interval.start_time < end
+            and interval.end_time > start
+            for interval in intervals
+        )
+    ]
 
-def add_lease_conflict_filter(query, start, end):
-    return query.filter(
-        (
-            ((start >= models.Lease.start_time) & (start < models.Lease.end_time))
-            | ((end > models.Lease.start_time) & (end <= models.Lease.end_time))
-            | ((start <= models.Lease.start_time) & (end >= models.Lease.end_time))
+
+# Busy intervals
+def _busy_interval_query(start, end, *criteria):
+    return (
+        model_query(models.BusyInterval)
+        .with_entities(models.BusyInterval.start_time, models.BusyInterval.end_time)
+        .filter(
+            *criteria,
+            models.BusyInterval.start_time < end,
+            models.BusyInterval.end_time > start,
         )
     )
 
 
-# Resources
-def resource_verify_availability(r_type, r_uuid, start, end):
-    # check conflict with offers
-    o_query = model_query(models.Offer)
-
-    offers = o_query.with_entities(
-        models.Offer.start_time, models.Offer.end_time
-    ).filter(
-        (models.Offer.resource_uuid == r_uuid),
-        (models.Offer.resource_type == r_type),
-        (models.Offer.status == statuses.AVAILABLE),
+def _busy_interval_values(object_type, ref):
+    """Return the busy interval of an offer or lease.
+
+    :returns: the busy interval values, or None if the offer or lease
+        does not make its resource busy
+    """
+    if object_type == "offer":
+        if ref.status not in statuses.OFFER_BUSY:
+            return None
+        offer_uuid = None
+    else:
+        if ref.status not in statuses.LEASE_BUSY:
+            return None
+        offer_uuid = ref.offer_uuid
+
+    return {
+        "object_type": object_type,
+        "object_uuid": ref.uuid,
+        "resource_type": ref.resource_type,
+        "resource_uuid": ref.resource_uuid,
+        "offer_uuid": offer_uuid,
+        "parent_lease_uuid": ref.parent_lease_uuid,
+        "start_time": ref.start_time,
+        "end_time": ref.end_time,
+    }
+
+
+def _busy_interval_sync(session, object_type, ref):
+    values = _busy_interval_values(object_type, ref)
+    interval_ref = (
+        session.query(models.BusyInterval)
+        .filter_by(object_type=object_type, object_uuid=ref.uuid)
+        .one_or_none()
     )
-    offers = add_offer_conflict_filter(offers, start, end)
-    offer_conflict = offers.first()
 
-    if offer_conflict:
-        raise exception.ResourceTimeConflict(resource_uuid=r_uuid, resource_type=r_type)
+    if values is None:
+        if interval_ref is not None:
+            session.delete(interval_ref)
+    elif interval_ref is None:
+        interval_ref = models.BusyInterval()
+        interval_ref.update(values)
+        session.add(interval_ref)
+    else:
+        interval_ref.update(values)
+    session.flush()
 
-    # check conflict with leases
-    l_query = model_query(models.Lease)
 
-    leases = l_query.with_entities(
-        models.Lease.start_time, models.Lease.end_time
-    ).filter(
-        (models.Lease.resource_uuid == r_uuid),
-        (models.Lease.resource_type == r_type),
-        (models.Lease.status.in_([statuses.CREATED, statuses.ACTIVE])),
+def _busy_interval_delete(session, object_type, object_uuid):
+    session.query(models.BusyInterval).filter_by(
+        object_type=object_type, object_uuid=object_uuid
+    ).delete()
+
+
+def _busy_interval_expected():
+    expected = {}
+    offers = model_query(models.Offer).filter(
+        models.Offer.status.in_(statuses.OFFER_BUSY)
+    )
+    for offer_ref in offers:
+        expected[("offer", offer_ref.uuid)] = _busy_interval_values("offer", offer_ref)
+    leases = model_query(models.Lease).filter(
+        models.Lease.status.in_(statuses.LEASE_BUSY)
     )
-    leases = add_lease_conflict_filter(leases, start, end)
-    lease_conflict = leases.first()
+    for lease_ref in leases:
+        expected[("lease", lease_ref.uuid)] = _busy_interval_values("lease", lease_ref)
+    return expected
 
-    if lease_conflict:
-        raise exception.ResourceTimeConflict(resource_uuid=r_uuid, resource_type=r_type)
+
+def busy_interval_rebuild():
+    """Rebuild the busy interval index from the offers and leases.
+
+    :returns: the number of busy intervals
+    """
+    with _session_for_write() as session:
+        session.query(models.BusyInterval).delete()
+        expected = _busy_interval_expected()
+        for values in expected.values():
+            interval_ref = models.BusyInterval()
+            interval_ref.update(values)
+            session.add(interval_ref)
+        session.flush()
+        return len(expected)
+
+
+def busy_interval_check():
+    """Compare the busy interval index with the offers and leases.
+
+    :returns: a list of (object_type, object_uuid, problem) tuples, where
+        problem is one of 'missing', 'stale' or 'mismatch'; empty if the
+        index is consistent
+    """
+    with _session_for_read():
+        expected = _busy_interval_expected()
+        actual = {}
+        for interval_ref in model_query(models.BusyInterval):
+            key = (interval_ref.object_type, interval_ref.object_uuid)
+            actual[key] = {k: interval_ref[k] for k in expected.get(key, {})}
+
+    problems = []
+    for key in sorted(set(expected) | set(actual)):
+        if key not in actual:
+            problems.append(key + ("missing",))
+        elif key not in expected:
+            problems.append(key + ("stale",))
+        elif actual[key] != expected[key]:
+            problems.append(key + ("mismatch",))
+    return problems
 
 
 # Events
@@ -459,6 +1003,8 @@ def event_get_all(filters):
     last_event_time = filters.pop("last_event_time", None)
     last_event_id = filters.pop("last_event_id", None)
     lessee_or_owner_id = filters.pop("lessee_or_owner_id", None)
+    limit = filters.pop("limit", None)
+    marker = filters.pop("marker", None)
 
     query = query.filter_by(**filters)
 
@@ -472,7 +1018,7 @@ def event_get_all(filters):
             | (lessee_or_owner_id == models.Event.owner_id)
         )
 
-    return query
+    return paginate_query(models.Event, query, limit, marker)
 
 
 def event_create(values):
@@ -485,6 +1031,158 @@ def event_create(values):
         return event_ref
 
 
+def event_create_many(values_list):
+    """Create several events with one multi-row insert."""
+    if not values_list:
+        return
+    keys = set().union(*values_list)
+    rows = [{key: values.get(key) for key in keys} for values in values_list]
+    with _session_for_write() as session:
+        session.execute(models.Event.__table__.insert(), rows)
+
+
+def _archive_batch(
+    model, archive_model, criteria, batch_size, purge=False, object_type=None
+):
+    # copy and delete one batch of rows, selected by id, in a short
+    # transaction so the live table is never locked for long
+    with _session_for_write() as session:
+        query = model_query(model.id).filter(*criteria)
+        ids = [row.id for row in query.order_by(model.id).limit(batch_size)]
+        if not ids:
+            return 0
+        if not purge:
+            # the archive table numbers the copies with its own primary key
+            columns = [c.name for c in model.__table__.columns]
+            select = sa.select(*[model.__table__.c[c] for c in columns]).where(
+                model.id.in_(ids)
+            )
+            session.execute(
+                archive_model.__table__.insert().from_select(columns, select)
+            )
+        if object_type is not None:
+            # archived offers and leases do not make their resource busy,
+            # but drop any interval left behind so the index stays exact
+            session.query(models.BusyInterval).filter(
+                models.BusyInterval.object_type == object_type,
+                models.BusyInterval.object_uuid.in_(
+                    sa.select(model.uuid).where(model.id.in_(ids))
+                ),
+            ).delete(synchronize_session=False)
+        session.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        return len(ids)
+
+
+def event_archive(before, batch_size, purge=False):
+    """Move one batch of events older than a date to the events archive.
+
+    :param before: events with an earlier event time are archived
+    :param batch_size: maximum number of events to move
+    :param purge: delete the events instead of archiving them
+    :returns: the number of events moved
+    """
+    return _archive_batch(
+        models.Event,
+        models.EventArchive,
+        [models.Event.event_time < before],
+        batch_size,
+        purge,
+    )
+
+
+def offer_archive(before, batch_size):
+    """Move one batch of expired and deleted offers to the history table.
+
+    Only offers that have not changed since the given date and that no
+    lease in the leases table was claimed from are moved.
+
+    :returns: the number of offers moved
+    """
+    lease_exists = sa.exists().where(models.Lease.offer_uuid == models.Offer.uuid)
+    return _archive_batch(
+        models.Offer,
+        models.OfferHistory,
+        [
+            models.Offer.status.in_(statuses.OFFER_CAN_ARCHIVE),
+            sa.func.coalesce(models.Offer.updated_at, models.Offer.created_at) < before,
+            ~lease_exists,
+        ],
+        batch_size,
+        object_type="offer",
+    )
+
+
+def lease_archive(before, batch_size):
+    """Move one batch of expired and deleted leases to the history table.
+
+    Only leases that have not changed since the given date and that are
+    not the parent of a lease or offer in the live tables are moved.
+
+    :returns: the number of leases moved
+    """
+    child_lease = sa.orm.aliased(models.Lease)
+    child_lease_exists = sa.exists().where(
+        child_lease.parent_lease_uuid == models.Lease.uuid
+    )
+    child_offer_exists = sa.exists().where(
+        models.Offer.parent_lease_uuid == models.Lease.uuid
+    )
+    return _archive_batch(
+        models.Lease,
+        models.LeaseHistory,
+        [
+            models.Lease.status.in_(statuses.LEASE_CAN_ARCHIVE),
+            sa.func.coalesce(models.Lease.updated_at, models.Lease.created_at) < before,
+            ~child_lease_exists,
+            ~child_offer_exists,
+        ],
+        batch_size,
+        object_type="lease",
+    )
+
+
+# Outbox
+
+
+def _outbox_add(session, entries):
+    for entry in entries:
+        event_ref = models.Event()
+        event_ref.update(entry["event"])
+        session.add(event_ref)
+
+        message_ref = models.OutboxMessage()
+        message_ref.update(entry["message"])
+        session.add(message_ref)
+    session.flush()
+
+
+def outbox_create(entries):
+    with _session_for_write() as session:
+        _outbox_add(session, entries)
+
+
+def outbox_get_undelivered(limit):
+    query = model_query(models.OutboxMessage)
+    query = query.filter(models.OutboxMessage.delivered_at.is_(None))
+    return query.order_by(models.OutboxMessage.id).limit(limit).all()
+
+
+def outbox_mark_delivered(message_ids, delivered_at):
+    with _session_for_write():
+        query = model_query(models.OutboxMessage)
+        query.filter(models.OutboxMessage.id.in_(message_ids)).update(
+            {"delivered_at": delivered_at}, synchronize_session=False
+        )
+
+
+def outbox_purge_delivered(before):
+    with _session_for_write():
+        query = model_query(models.OutboxMessage)
+        return query.filter(models.OutboxMessage.delivered_at < before).delete(
+            synchronize_session=False
+        )
+
+
 # Console Auth Tokens
 
 
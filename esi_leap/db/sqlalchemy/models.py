@@ -18,6 +18,7 @@ from sqlalchemy.orm import declarative_base
 from sqlalchemy import orm
 from sqlalchemy import Column, DateTime, ForeignKey
 from sqlalchemy import Index, Integer, String
+from sqlalchemy import schema
 
 from esi_leap.common import statuses
 
@@ -49,6 +50,14 @@ class Offer(Base):
         Index("offer_project_id_idx", "project_id"),
         Index("offer_resource_idx", "resource_type", "resource_uuid"),
         Index("offer_status_idx", "status"),
+        Index("offer_status_end_time_idx", "status", "end_time"),
+        Index(
+            "offer_parent_lease_status_time_idx",
+            "parent_lease_uuid",
+            "status",
+            "start_time",
+            "end_time",
+        ),
     )
 
     id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
@@ -78,6 +87,23 @@ class Lease(Base):
         Index("lease_project_id_idx", "project_id"),
         Index("lease_owner_id_idx", "owner_id"),
         Index("lease_status_idx", "status"),
+        Index("lease_resource_idx", "resource_type", "resource_uuid"),
+        Index("lease_status_start_time_idx", "status", "start_time"),
+        Index("lease_status_end_time_idx", "status", "end_time"),
+        Index(
+            "lease_offer_status_time_idx",
+            "offer_uuid",
+            "status",
+            "start_time",
+            "end_time",
+        ),
+        Index(
+            "lease_parent_lease_status_time_idx",
+            "parent_lease_uuid",
+            "status",
+            "start_time",
+            "end_time",
+        ),
     )
 
     id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
@@ -108,6 +134,115 @@ class Lease(Base):
     )
 
 
+class OfferHistory(Base):
+    """Represents an archived offer.
+
+    Expired and deleted offers are moved here from the offers table once
+    they have not changed for [archive]history_max_age days, keeping
+    their ids. The offers table can reuse the id of a moved offer, so
+    the history table has its own primary key.
+    """
+
+    __tablename__ = "offers_history"
+    __table_args__ = (
+        Index("offer_history_uuid_idx", "uuid"),
+        Index("offer_history_id_idx", "id"),
+        Index("offer_history_project_id_idx", "project_id"),
+        Index("offer_history_resource_idx", "resource_type", "resource_uuid"),
+    )
+
+    history_id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
+    id = Column(Integer, nullable=False)
+    uuid = Column(String(36), nullable=False, unique=True)
+    name = Column(String(35), nullable=True, unique=False)
+    project_id = Column(String(255), nullable=False)
+    lessee_id = Column(String(255), nullable=True)
+    resource_type = Column(String(36), nullable=False)
+    resource_uuid = Column(String(36), nullable=False)
+    start_time = Column(DateTime)
+    end_time = Column(DateTime)
+    status = Column(String(15), nullable=False)
+    properties = Column(db_types.JsonEncodedDict, nullable=True)
+    parent_lease_uuid = Column(String(36), nullable=True)
+
+
+class LeaseHistory(Base):
+    """Represents an archived lease.
+
+    Expired and deleted leases are moved here from the leases table once
+    they have not changed for [archive]history_max_age days, keeping
+    their ids. The leases table can reuse the id of a moved lease, so
+    the history table has its own primary key.
+    """
+
+    __tablename__ = "leases_history"
+    __table_args__ = (
+        Index("lease_history_uuid_idx", "uuid"),
+        Index("lease_history_id_idx", "id"),
+        Index("lease_history_project_id_idx", "project_id"),
+        Index("lease_history_owner_id_idx", "owner_id"),
+        Index("lease_history_resource_idx", "resource_type", "resource_uuid"),
+    )
+
+    history_id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
+    id = Column(Integer, nullable=False)
+    uuid = Column(String(36), nullable=False, unique=True)
+    name = Column(String(35), nullable=True, unique=False)
+    project_id = Column(String(255), nullable=False)
+    owner_id = Column(String(255), nullable=False)
+    purpose = Column(String(255), nullable=True)
+    resource_type = Column(String(36), nullable=False)
+    resource_uuid = Column(String(36), nullable=False)
+    start_time = Column(DateTime)
+    end_time = Column(DateTime)
+    fulfill_time = Column(DateTime)
+    expire_time = Column(DateTime)
+    status = Column(String(15), nullable=False)
+    properties = Column(db_types.JsonEncodedDict, nullable=True)
+    offer_uuid = Column(String(36), nullable=True)
+    parent_lease_uuid = Column(String(36), nullable=True)
+
+
+class BusyInterval(Base):
+    """Represents a time interval during which a resource is busy.
+
+    Each available offer and each created, active or cancelling lease
+    has one busy interval. The intervals are kept up to date by the offer and lease
+    database API functions.
+    """
+
+    __tablename__ = "busy_intervals"
+    __table_args__ = (
+        schema.UniqueConstraint(
+            "object_type", "object_uuid", name="uniq_busy_intervals0object"
+        ),
+        Index(
+            "busy_interval_resource_time_idx",
+            "resource_type",
+            "resource_uuid",
+            "start_time",
+            "end_time",
+        ),
+        Index("busy_interval_offer_time_idx", "offer_uuid", "start_time", "end_time"),
+        Index(
+            "busy_interval_parent_lease_time_idx",
+            "parent_lease_uuid",
+            "start_time",
+            "end_time",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
+    object_type = Column(String(36), nullable=False)
+    object_uuid = Column(String(36), nullable=False)
+    resource_type = Column(String(36), nullable=False)
+    resource_uuid = Column(String(36), nullable=False)
+    offer_uuid = Column(String(36), nullable=True)
+    parent_lease_uuid = Column(String(36), nullable=True)
+    start_time = Column(DateTime)
+    end_time = Column(DateTime)
+
+
 class Event(Base):
     """Represents an event."""
 
@@ -131,6 +266,29 @@ class Event(Base):
     owner_id = Column(String(255), nullable=True)
 
 
+class EventArchive(Base):
+    """Represents an archived event.
+
+    Events are moved here from the events table once they are older than
+    [archive]event_max_age days, keeping their ids. The events table can
+    reuse the id of a moved event, so the archive has its own primary key.
+    """
+
+    __tablename__ = "events_archive"
+    __table_args__ = (Index("event_archive_time_idx", "event_time"),)
+
+    archive_id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
+    id = Column(Integer, nullable=False)
+    event_type = Column(String(36), nullable=False)
+    event_time = Column(DateTime, nullable=False)
+    object_type = Column(String(36), nullable=True)
+    object_uuid = Column(String(36), nullable=True)
+    resource_type = Column(String(36), nullable=True)
+    resource_uuid = Column(String(36), nullable=True)
+    lessee_id = Column(String(255), nullable=True)
+    owner_id = Column(String(255), nullable=True)
+
+
 class ConsoleAuthToken(Base):
     """Represents a console auth token."""
 
@@ -141,3 +299,21 @@ class ConsoleAuthToken(Base):
     node_uuid = Column(String(255), nullable=False)
     token_hash = Column(String(255), nullable=False)
     expires = Column(Integer, nullable=False)
+
+
+class OutboxMessage(Base):
+    """Represents a notification waiting to be published.
+
+    Outbox messages are written in the same transaction as the status
+    change they describe and are published by the manager.
+    """
+
+    __tablename__ = "outbox_messages"
+    __table_args__ = (Index("outbox_message_delivered_at_idx", "delivered_at", "id"),)
+
+    id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
+    publisher_id = Column(String(255), nullable=False)
+    event_type = Column(String(255), nullable=False)
+    priority = Column(String(36), nullable=False)
+    payload = Column(db_types.JsonEncodedDict, nullable=False)
+    delivered_at = Column(DateTime, nullable=True)
@@ -12,6 +12,7 @@
 
 import oslo_messaging as messaging
 
+from esi_leap.common import rpc
 import esi_leap.conf
 from esi_leap.manager import utils
 
@@ -24,9 +25,28 @@ class ManagerRPCAPI(object):
     API version history:
 
     * 1.0 - Initial version.
+    * 1.1 - Added schedule_lease and schedule_offer.
+    * 1.2 - Added cancel_leases.
     """
 
     def __init__(self):
         self._client = messaging.RPCClient(
-            target=utils.get_target(), transport=messaging.get_rpc_transport(CONF)
+            target=utils.get_target(),
+            transport=messaging.get_rpc_transport(CONF),
+            serializer=rpc.RequestContextSerializer(None),
         )
+
+    def schedule_lease(self, context, lease_uuid):
+        """Ask the manager to track the deadlines of a lease."""
+        cctxt = self._client.prepare(fanout=True, version="1.1")
+        cctxt.cast(context, "schedule_lease", lease_uuid=lease_uuid)
+
+    def schedule_offer(self, context, offer_uuid):
+        """Ask the manager to track the deadlines of an offer."""
+        cctxt = self._client.prepare(fanout=True, version="1.1")
+        cctxt.cast(context, "schedule_offer", offer_uuid=offer_uuid)
+
+    def cancel_leases(self, context):
+        """Ask a manager to cancel the leases waiting for cancellation."""
+        cctxt = self._client.prepare(version="1.2")
+        cctxt.cast(context, "cancel_leases")
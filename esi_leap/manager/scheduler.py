@@ -0,0 +1,61 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import heapq
+import threading
+
+
+FULFILL_LEASE = "fulfill_lease"
+EXPIRE_LEASE = "expire_lease"
+EXPIRE_OFFER = "expire_offer"
+
+
+class DeadlineScheduler(object):
+    """Min-heap of upcoming lease and offer deadlines.
+
+    Entries are (deadline, action, uuid) tuples. A deadline is only a hint
+    that an object may need work at that time; callers re-read the object
+    and check its current state before acting, so stale entries left behind
+    by updates are harmless.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._entries = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, deadline, action, uuid):
+        if deadline is None:
+            return
+        entry = (deadline, action, uuid)
+        with self._lock:
+            if entry in self._entries:
+                return
+            self._entries.add(entry)
+            heapq.heappush(self._heap, entry)
+
+    def next_deadline(self):
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Remove and return all entries with a deadline at or before now."""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                self._entries.discard(entry)
+                due.append(entry)
+        return due
@@ -10,13 +10,22 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import concurrent.futures
+import datetime
+import threading
 
+from esi_leap.common import notification_utils
+from esi_leap.common import rpc
 from esi_leap.common import statuses
+from esi_leap.common import utils as common_utils
 import esi_leap.conf
+from esi_leap.manager import scheduler
 from esi_leap.manager import utils
 from esi_leap.objects import console_auth_token as cat_obj
 from esi_leap.objects import lease as lease_obj
 from esi_leap.objects import offer as offer_obj
+from esi_leap.objects import outbox as outbox_obj
 from oslo_context import context as ctx
 from oslo_log import log as logging
 import oslo_messaging as messaging
@@ -25,6 +34,8 @@ from oslo_utils import timeutils
 
 CONF = esi_leap.conf.CONF
 EVENT_INTERVAL = 60
+# bounds the retry backoff exponent; the delay is capped anyway
+MAX_RETRY_DOUBLINGS = 16
 LOG = logging.getLogger(__name__)
 
 
@@ -32,11 +43,17 @@ class ManagerService(service.Service):
     def __init__(self):
         super(ManagerService, self).__init__()
         LOG.info("Creating esi-leap manager RPC server")
+        self._scheduler = scheduler.DeadlineScheduler()
+        self._retries = {}
+        self._retries_lock = threading.Lock()
+        self._cancel_lock = threading.Lock()
+        self._cancel_pending = False
         self._server = messaging.get_rpc_server(
             target=utils.get_target(),
             transport=messaging.get_rpc_transport(CONF),
-            endpoints=[ManagerEndpoint()],
+            endpoints=[ManagerEndpoint(self)],
             executor="eventlet",
+            serializer=rpc.RequestContextSerializer(None),
         )
         self._context = ctx.RequestContext(
             auth_token=None, project_id=None, overwrite=False
@@ -46,104 +63,278 @@ class ManagerService(service.Service):
         super(ManagerService, self).start()
         LOG.info("Starting esi-leap manager RPC server")
         self.tg.add_thread(self._server.start)
+        LOG.info("Loading lease and offer deadlines")
+        self._load_deadlines()
+        LOG.info("Starting _process_deadlines periodic job")
+        self.tg.add_timer(CONF.manager.deadline_check_interval, self._process_deadlines)
         LOG.info("Starting _fulfill_leases periodic job")
-        self.tg.add_timer(EVENT_INTERVAL, self._fulfill_leases)
+        self.tg.add_timer(CONF.manager.rescan_interval, self._fulfill_leases)
         LOG.info("Starting _expire_leases periodic job")
-        self.tg.add_timer(EVENT_INTERVAL, self._expire_leases)
+        self.tg.add_timer(CONF.manager.rescan_interval, self._expire_leases)
         LOG.info("Starting _cancel_leases periodic job")
         self.tg.add_timer(EVENT_INTERVAL, self._cancel_leases)
         LOG.info("Starting _expire_offers periodic job")
-        self.tg.add_timer(EVENT_INTERVAL, self._expire_offers)
+        self.tg.add_timer(CONF.manager.rescan_interval, self._expire_offers)
         LOG.info("Starting _clean_expired_console_tokens periodic job")
         self.tg.add_timer(EVENT_INTERVAL, self._clean_expired_console_tokens)
+        if CONF.notification.use_outbox:
+            LOG.info("Starting _relay_outbox periodic job")
+            self.tg.add_timer(
+                CONF.notification.outbox_relay_interval, self._relay_outbox
+            )
 
     def stop(self):
         super(ManagerService, self).stop()
         LOG.info("Shutting down esi-leap manager RPC server")
         self._server.stop()
+        LOG.info("Sending queued notifications")
+        notification_utils.flush()
 
-    def _fulfill_leases(self):
-        LOG.info("Checking for leases to fulfill")
+    def schedule_lease(self, lease):
+        if lease.status in statuses.LEASE_CAN_FULFILL:
+            self._scheduler.add(lease.start_time, scheduler.FULFILL_LEASE, lease.uuid)
+        if lease.status in statuses.LEASE_CAN_EXPIRE:
+            self._scheduler.add(lease.end_time, scheduler.EXPIRE_LEASE, lease.uuid)
+
+    def schedule_offer(self, offer):
+        if offer.status in statuses.OFFER_CAN_DELETE:
+            self._scheduler.add(offer.end_time, scheduler.EXPIRE_OFFER, offer.uuid)
+
+    def _track_retry(self, lease, wait_status, action):
+        """Schedule a retry of a lease transition left in a wait status.
+
+        The delay starts at [manager]retry_interval and doubles with each
+        consecutive failure of the lease, up to [manager]rescan_interval.
+        """
+        with self._retries_lock:
+            if lease.status != wait_status:
+                self._retries.pop(lease.uuid, None)
+                return
+            failures = self._retries.get(lease.uuid, 0)
+            self._retries[lease.uuid] = failures + 1
+
+        delay = min(
+            CONF.manager.retry_interval * 2 ** min(failures, MAX_RETRY_DOUBLINGS),
+            CONF.manager.rescan_interval,
+        )
+        LOG.info("Retrying lease %s in %d seconds", lease.uuid, delay)
+        self._scheduler.add(
+            timeutils.utcnow() + datetime.timedelta(seconds=delay), action, lease.uuid
+        )
+
+    def _load_deadlines(self):
         leases = lease_obj.Lease.get_all(
-            {"status": [statuses.CREATED, statuses.WAIT_FULFILL]}, self._context
+            {"status": statuses.LEASE_CAN_EXPIRE}, self._context
         )
-        now = timeutils.utcnow()
         for lease in leases:
-            if lease.start_time <= now and now <= lease.end_time:
+            self.schedule_lease(lease)
+        offers = offer_obj.Offer.get_all(
+            {"status": statuses.OFFER_CAN_DELETE}, self._context
+        )
+        for offer in offers:
+            self.schedule_offer(offer)
+
+    def _process_deadlines(self):
+        now = timeutils.utcnow()
+        jobs = []
+        for deadline, action, uuid in self._scheduler.pop_due(now):
+            if action == scheduler.EXPIRE_OFFER:
+                offer = offer_obj.Offer.get(uuid, self._context)
+                if (
+                    offer is not None
+                    and offer.status in statuses.OFFER_CAN_DELETE
+                    and offer.end_time <= now
+                ):
+                    jobs.append((offer, self._expire_offer))
+                continue
+
+            lease = lease_obj.Lease.get(uuid, self._context)
+            if lease is None:
+                continue
+            if action == scheduler.FULFILL_LEASE:
+                if (
+                    lease.status in statuses.LEASE_CAN_FULFILL
+                    and lease.start_time <= now
+                    and now <= lease.end_time
+                ):
+                    jobs.append((lease, self._fulfill_lease))
+            elif action == scheduler.EXPIRE_LEASE:
+                if lease.status in statuses.LEASE_CAN_EXPIRE and lease.end_time <= now:
+                    jobs.append((lease, self._expire_lease))
+        self._run_transitions(jobs)
+
+    def _run_transitions(self, jobs):
+        """Run (object, function) transitions in a bounded worker pool.
+
+        Jobs are grouped by resource lock name so that transitions on the
+        same resource run one after another in a single worker, while
+        transitions on different resources run in parallel.
+        """
+        if not jobs:
+            return
+
+        groups = collections.OrderedDict()
+        for obj, func in jobs:
+            lock_name = common_utils.get_resource_lock_name(
+                obj.resource_type, obj.resource_uuid
+            )
+            groups.setdefault(lock_name, []).append((obj, func))
+
+        def run_group(group):
+            for obj, func in group:
+                func(obj)
+
+        max_workers = min(CONF.manager.transition_workers, len(groups))
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = [executor.submit(run_group, g) for g in groups.values()]
+            for future in concurrent.futures.as_completed(futures):
                 try:
-                    LOG.info("Fulfilling lease %s", lease.uuid)
-                    lease.fulfill(self._context)
+                    future.result()
                 except Exception as e:
-                    LOG.info("Error fulfilling lease: %s: %s" % (type(e).__name__, e))
-                    LOG.info("Setting lease status to ERROR")
-                    lease.status = statuses.ERROR
-                    lease.save()
+                    LOG.info(
+                        "Error running transitions: %s: %s" % (type(e).__name__, e)
+                    )
+
+    def _cancel_lease(self, lease):
+        try:
+            LOG.info("Cancelling lease %s", lease.uuid)
+            lease.cancel()
+        except Exception as e:
+            LOG.info("Error cancelling lease: %s: %s" % (type(e).__name__, e))
+            LOG.info("Setting lease status to ERROR")
+            lease.status = statuses.ERROR
+            lease.save()
+
+    def _fulfill_lease(self, lease):
+        try:
+            LOG.info("Fulfilling lease %s", lease.uuid)
+            lease.fulfill(self._context)
+        except Exception as e:
+            LOG.info("Error fulfilling lease: %s: %s" % (type(e).__name__, e))
+            LOG.info("Setting lease status to ERROR")
+            lease.status = statuses.ERROR
+            lease.save()
+        self._track_retry(lease, statuses.WAIT_FULFILL, scheduler.FULFILL_LEASE)
+
+    def _expire_lease(self, lease):
+        try:
+            LOG.info("Expiring lease %s", lease.uuid)
+            lease.expire(self._context)
+        except Exception as e:
+            LOG.info("Error expiring lease: %s: %s" % (type(e).__name__, e))
+            LOG.info("Setting lease status to ERROR")
+            lease.status = statuses.ERROR
+            lease.save()
+        self._track_retry(lease, statuses.WAIT_EXPIRE, scheduler.EXPIRE_LEASE)
+
+    def _expire_offer(self, offer):
+        try:
+            LOG.info(
+                "Expiring offer %s for %s %s",
+                offer.uuid,
+                offer.resource_type,
+                offer.resource_uuid,
+            )
+            offer.expire(self._context)
+        except Exception as e:
+            LOG.info("Error expiring offer: %s: %s" % (type(e).__name__, e))
+            offer.status = statuses.ERROR
+            offer.save()
+
+    def _fulfill_leases(self):
+        LOG.info("Checking for leases to fulfill")
+        leases = lease_obj.Lease.get_all_due_for_fulfillment(
+            timeutils.utcnow(), self._context
+        )
+        self._run_transitions([(lease, self._fulfill_lease) for lease in leases])
 
     def _expire_leases(self):
         LOG.info("Checking for expiring leases")
-        leases = lease_obj.Lease.get_all(
-            {
-                "status": [
-                    statuses.ACTIVE,
-                    statuses.CREATED,
-                    statuses.WAIT_EXPIRE,
-                    statuses.WAIT_FULFILL,
-                ]
-            },
-            self._context,
+        leases = lease_obj.Lease.get_all_due_for_expiry(
+            timeutils.utcnow(), self._context
         )
-        now = timeutils.utcnow()
-        for lease in leases:
-            if lease.end_time <= now:
-                try:
-                    LOG.info("Expiring lease %s", lease.uuid)
-                    lease.expire(self._context)
-                except Exception as e:
-                    LOG.info("Error expiring lease: %s: %s" % (type(e).__name__, e))
-                    LOG.info("Setting lease status to ERROR")
-                    lease.status = statuses.ERROR
-                    lease.save()
+        self._run_transitions([(lease, self._expire_lease) for lease in leases])
 
     def _cancel_leases(self):
-        LOG.info("Checking for leases to cancel")
-        leases = lease_obj.Lease.get_all(
-            {"status": [statuses.WAIT_CANCEL]}, self._context
-        )
-        for lease in leases:
+        """Cancel the leases waiting for cancellation.
+
+        Only one pass runs at a time. A call made during a pass returns
+        at once and makes the running pass check again when it is done.
+        """
+        self._cancel_pending = True
+        while self._cancel_pending:
+            if not self._cancel_lock.acquire(blocking=False):
+                return
             try:
-                LOG.info("Cancelling lease %s", lease.uuid)
-                lease.cancel()
-            except Exception as e:
-                LOG.info("Error cancelling lease: %s: %s" % (type(e).__name__, e))
-                LOG.info("Setting lease status to ERROR")
-                lease.status = statuses.ERROR
-                lease.save()
+                self._cancel_pending = False
+                LOG.info("Checking for leases to cancel")
+                leases = lease_obj.Lease.get_all(
+                    {"status": [statuses.WAIT_CANCEL]}, self._context
+                )
+                self._run_transitions([(lease, self._cancel_lease) for lease in leases])
+            finally:
+                self._cancel_lock.release()
 
     def _expire_offers(self):
         LOG.info("Checking for expiring offers")
-        offers = offer_obj.Offer.get_all(
-            {"status": statuses.OFFER_CAN_DELETE}, self._context
+        offers = offer_obj.Offer.get_all_due_for_expiry(
+            timeutils.utcnow(), self._context
         )
-
-        for offer in offers:
-            if offer.end_time and offer.end_time <= timeutils.utcnow():
-                try:
-                    LOG.info(
-                        "Expiring offer %s for %s %s",
-                        offer.uuid,
-                        offer.resource_type,
-                        offer.resource_uuid,
-                    )
-                    offer.expire(self._context)
-                except Exception as e:
-                    LOG.info("Error expiring offer: %s: %s" % (type(e).__name__, e))
-                    offer.status = statuses.ERROR
-                    offer.save()
+        self._run_transitions([(offer, self._expire_offer) for offer in offers])
 
     def _clean_expired_console_tokens(self):
         LOG.info("Cleaning expired console tokens")
         cat_obj.ConsoleAuthToken.clean_expired_console_tokens()
 
+    def _relay_outbox(self):
+        """Publish the undelivered outbox messages in order.
+
+        Messages are read in batches and marked delivered once per batch.
+        Publishing stops at the first failure and resumes from that
+        message on the next run.
+        """
+        batch_size = CONF.notification.outbox_batch_size
+        while True:
+            messages = outbox_obj.OutboxMessage.get_undelivered(
+                batch_size, self._context
+            )
+            delivered = []
+            try:
+                for message in messages:
+                    message.publish(self._context)
+                    delivered.append(message.id)
+            except Exception as e:
+                LOG.warning(
+                    "Error publishing outbox message %s: %s: %s"
+                    % (message.id, type(e).__name__, e)
+                )
+            finally:
+                if delivered:
+                    outbox_obj.OutboxMessage.mark_delivered(delivered)
+                    LOG.info("Published %d outbox messages", len(delivered))
+
+            if len(delivered) < batch_size:
+                break
+
+        retention = datetime.timedelta(seconds=CONF.notification.outbox_retention)
+        outbox_obj.OutboxMessage.purge_delivered(timeutils.utcnow() - retention)
+
 
 class ManagerEndpoint(object):
     target = utils.get_target()
+
+    def __init__(self, manager):
+        self._manager = manager
+
+    def schedule_lease(self, context, lease_uuid):
+        lease = lease_obj.Lease.get(lease_uuid, context)
+        if lease is not None:
+            self._manager.schedule_lease(lease)
+
+    def schedule_offer(self, context, offer_uuid):
+        offer = offer_obj.Offer.get(offer_uuid, context)
+        if offer is not None:
+            self._manager.schedule_offer(offer)
+
+    def cancel_leases(self, context):
+        self._manager._cancel_leases()
@@ -10,6 +10,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+
 from esi_leap.db import api as dbapi
 from esi_leap.objects import base
 from esi_leap.objects import fields
@@ -49,3 +51,110 @@ class Event(base.ESILEAPObject):
         LOG.info("Creating event")
         db_event = self.dbapi.event_create(updates)
         self._from_db_object(context, self, db_event)
+
+    @classmethod
+    def create_many(cls, events):
+        """Create several events with one insert.
+
+        The events are not reloaded, so their ids are not set.
+        """
+        LOG.info("Creating %d events", len(events))
+        cls.dbapi.event_create_many([e.obj_get_changes() for e in events])
+        for e in events:
+            e.obj_reset_changes()
+
+
+class EventBuffer(object):
+    """Buffer of events waiting to be created.
+
+    Buffered events are created together once [notification]
+    event_buffer_size of them are waiting, or [notification]
+    event_flush_interval seconds after the first one was buffered,
+    whichever comes first. If a batch cannot be created, its events are
+    created one by one, and those that still fail are put back in the
+    buffer until they have been tried [notification]event_write_attempts
+    times.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (event, failed attempts) pairs
+        self._events = []
+        self._timer = None
+
+    def add(self, event):
+        with self._lock:
+            self._events.append((event, 0))
+            if len(self._events) < CONF.notification.event_buffer_size:
+                self._start_timer()
+                return
+            entries = self._take()
+        self._write(entries)
+
+    def flush(self):
+        with self._lock:
+            entries = self._take()
+        self._write(entries)
+
+    def clear(self):
+        with self._lock:
+            self._take()
+
+    def _start_timer(self):
+        if self._timer is None:
+            self._timer = threading.Timer(
+                CONF.notification.event_flush_interval, self.flush
+            )
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _take(self):
+        entries = self._events
+        self._events = []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return entries
+
+    def _write(self, entries):
+        if not entries:
+            return
+        try:
+            Event.create_many([event for event, _ in entries])
+            return
+        except Exception as e:
+            LOG.warning(
+                "Error creating %d events, creating them one at a time: %s: %s"
+                % (len(entries), type(e).__name__, e)
+            )
+
+        retries = []
+        for event, failures in entries:
+            try:
+                Event.create_many([event])
+            except Exception as e:
+                failures += 1
+                if failures < CONF.notification.event_write_attempts:
+                    retries.append((event, failures))
+                    continue
+                LOG.error(
+                    "Dropping event %s after %d attempts: %s: %s"
+                    % (event.obj_to_primitive(), failures, type(e).__name__, e)
+                )
+
+        if retries:
+            LOG.warning("Putting %d events back in the buffer", len(retries))
+            with self._lock:
+                self._events[:0] = retries
+                self._start_timer()
+
+
+_event_buffer = EventBuffer()
+
+
+def buffer_event(event):
+    _event_buffer.add(event)
+
+
+def flush_events():
+    _event_buffer.flush()
@@ -10,6 +10,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import contextlib
 import datetime
 
 from esi_leap.common import exception
@@ -31,6 +33,39 @@ CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
 
+def get_cascade_order(root_uuid, leases, offers):
+    """Order a lease and offer tree bottom-up for a cascade.
+
+    :param root_uuid: uuid of the lease or offer at the top of the tree
+    :param leases: leases in the tree, excluding the root
+    :param offers: offers in the tree, excluding the root
+    :returns: the leases and offers ordered so that every lease or offer
+        comes after all of its descendants
+    """
+    children = collections.defaultdict(list)
+    for lease in leases:
+        if lease.parent_lease_uuid is not None:
+            children[lease.parent_lease_uuid].append(lease)
+        if lease.offer_uuid is not None:
+            children[lease.offer_uuid].append(lease)
+    # offers are processed after the child leases of a lease
+    for offer in offers:
+        children[offer.parent_lease_uuid].append(offer)
+
+    ordered = []
+    visited = set()
+
+    def visit(uuid):
+        for child in children[uuid]:
+            if child.uuid not in visited:
+                visited.add(child.uuid)
+                visit(child.uuid)
+                ordered.append(child)
+
+    visit(root_uuid)
+    return ordered
+
+
 @versioned_objects_base.VersionedObjectRegistry.register
 class LeaseCRUDNotification(notification.NotificationBase):
     """Notification emitted when a lease is created or deleted."""
@@ -154,11 +189,38 @@ class Lease(base.ESILEAPObject):
         if db_lease:
             return cls._from_db_object(context, cls(), db_lease)
 
+    @classmethod
+    def get_many(cls, lease_uuids, context=None):
+        db_leases = cls.dbapi.lease_get_by_uuids(lease_uuids)
+        return cls._from_db_object_list(context, db_leases)
+
     @classmethod
     def get_all(cls, filters, context=None):
         db_leases = cls.dbapi.lease_get_all(filters)
         return cls._from_db_object_list(context, db_leases)
 
+    @classmethod
+    def get_all_due_for_fulfillment(cls, now, context=None):
+        db_leases = cls.dbapi.lease_get_all_due_for_fulfillment(now)
+        return cls._from_db_object_list(context, db_leases)
+
+    @classmethod
+    def get_all_due_for_expiry(cls, now, context=None):
+        db_leases = cls.dbapi.lease_get_all_due_for_expiry(now)
+        return cls._from_db_object_list(context, db_leases)
+
+    @classmethod
+    def get_descendants(cls, lease_uuid, context=None):
+        db_leases, db_offers = cls.dbapi.lease_get_descendants(lease_uuid)
+        return (
+            cls._from_db_object_list(context, db_leases),
+            offer_obj.Offer._from_db_object_list(context, db_offers),
+        )
+
+    def get_cascade(self, context=None):
+        leases, offers = Lease.get_descendants(self.uuid, context)
+        return get_cascade_order(self.uuid, leases, offers)
+
     def create(self, context=None):
         updates = self.obj_get_changes()
         resource_type = updates["resource_type"]
@@ -180,6 +242,22 @@ class Lease(base.ESILEAPObject):
             db_lease = self.dbapi.lease_create(updates)
             self._from_db_object(context, self, db_lease)
 
+    @classmethod
+    def create_many(cls, leases, context=None):
+        """Create leases on offers, either all of them or none.
+
+        The resources are locked in a deterministic order so concurrent
+        calls cannot deadlock, the offers are verified with batched
+        queries and the leases are inserted in one transaction.
+        """
+        updates_list = [lease.obj_get_changes() for lease in leases]
+        with cls._lock_resources(leases):
+            cls.verify_offer_time_ranges(updates_list)
+            db_leases = cls.dbapi.lease_create_many(updates_list)
+
+        for lease, db_lease in zip(leases, db_leases):
+            cls._from_db_object(context, lease, db_lease)
+
     def update(self, updates, context=None):
         # only allow updates to end_time right now
         if "end_time" not in updates:
@@ -212,18 +290,159 @@ class Lease(base.ESILEAPObject):
             self.end_time = new_end_time
             self.save(context)
 
-    def cancel(self, context=None):
-        leases = Lease.get_all(
-            {"parent_lease_uuid": self.uuid, "status": statuses.LEASE_CAN_DELETE}, None
+    @classmethod
+    def extend_many(cls, leases, end_time, context=None):
+        """Set the end time of several leases, either all of them or none.
+
+        The resources are locked in a deterministic order, the extended
+        time ranges are verified with batched queries and the leases are
+        updated with one statement.
+        """
+        with cls._lock_resources(leases):
+            offer_claims = []
+            resource_claims = []
+            for lease in leases:
+                if lease.start_time >= end_time:
+                    raise exception.InvalidTimeRange(
+                        resource="lease",
+                        start_time=str(lease.start_time),
+                        end_time=str(end_time),
+                    )
+                # only need to check availabilities if the lease is extended
+                if end_time <= lease.end_time:
+                    continue
+                if lease.offer_uuid:
+                    offer_claims.append(lease)
+                else:
+                    resource_claims.append(lease)
+
+            cls._verify_offer_extensions(offer_claims, end_time)
+            cls._verify_resource_extensions(resource_claims, end_time)
+
+            cls.dbapi.lease_update_many(
+                [lease.uuid for lease in leases], {"end_time": end_time}
+            )
+
+        for lease in leases:
+            lease.end_time = end_time
+            lease.obj_reset_changes(["end_time"])
+
+    @staticmethod
+    def _verify_offer_extensions(leases, end_time):
+        if not leases:
+            return
+
+        offers = {
+            o.uuid: o
+            for o in offer_obj.Offer.get_many({lease.offer_uuid for lease in leases})
+        }
+        claims = []
+        for lease in leases:
+            offer = offers.get(lease.offer_uuid)
+            if offer is None:
+                raise exception.OfferNotFound(offer_uuid=lease.offer_uuid)
+            if offer.status != statuses.AVAILABLE:
+                raise exception.OfferNotAvailable(
+                    offer_uuid=offer.uuid, status=offer.status
+                )
+            claims.append((offer, lease.end_time, end_time))
+        offer_obj.Offer.verify_availability_many(claims)
+
+    @classmethod
+    def _verify_resource_extensions(cls, leases, end_time):
+        if not leases:
+            return
+
+        parent_uuids = {
+            lease.parent_lease_uuid for lease in leases if lease.parent_lease_uuid
+        }
+        parents = {p.uuid: p for p in cls.get_many(parent_uuids)}
+        for lease in leases:
+            if not lease.parent_lease_uuid:
+                continue
+            parent_lease = parents.get(lease.parent_lease_uuid)
+            if parent_lease is None or parent_lease.status != statuses.ACTIVE:
+                raise exception.LeaseNotActive(lease_id=lease.parent_lease_uuid)
+            if end_time > parent_lease.end_time:
+                raise exception.LeaseNoTimeAvailabilities(
+                    lease_uuid=parent_lease.uuid,
+                    start_time=lease.end_time,
+                    end_time=end_time,
+                )
+
+        conflicts = cls.dbapi.resource_get_conflicts_many(
+            [
+                (
+                    lease.resource_type,
+                    lease.resource_uuid,
+                    lease.parent_lease_uuid,
+                    lease.end_time,
+                    end_time,
+                )
+                for lease in leases
+            ]
         )
+        if conflicts:
+            lease = leases[conflicts[0]]
+            if lease.parent_lease_uuid:
+                raise exception.LeaseNoTimeAvailabilities(
+                    lease_uuid=lease.parent_lease_uuid,
+                    start_time=lease.end_time,
+                    end_time=end_time,
+                )
+            raise exception.ResourceTimeConflict(
+                resource_type=lease.resource_type, resource_uuid=lease.resource_uuid
+            )
+
+    @classmethod
+    def cancel_many(cls, leases, context=None):
+        """Mark several leases for cancellation with one statement.
+
+        The leases are set to WAIT_CANCEL and left for the manager to
+        cancel, which releases their resources and cancels their
+        descendants.
+
+        :returns: the leases that were marked
+        """
+        with cls._lock_resources(leases):
+            marked = set(
+                cls.dbapi.lease_update_many(
+                    [lease.uuid for lease in leases],
+                    {"status": statuses.WAIT_CANCEL},
+                    statuses.LEASE_CAN_DELETE,
+                )
+            )
+
+        result = []
         for lease in leases:
-            lease.cancel()
-        offers = offer_obj.Offer.get_all(
-            {"parent_lease_uuid": self.uuid, "status": statuses.OFFER_CAN_DELETE}, None
+            if lease.uuid in marked:
+                LOG.info("Marking lease %s for cancellation", lease.uuid)
+                lease.status = statuses.WAIT_CANCEL
+                lease.obj_reset_changes(["status"])
+                result.append(lease)
+        return result
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _lock_resources(leases):
+        # sorting the lock names keeps concurrent callers from deadlocking
+        lock_names = sorted(
+            {
+                utils.get_resource_lock_name(lease.resource_type, lease.resource_uuid)
+                for lease in leases
+            }
         )
-        for offer in offers:
-            offer.cancel()
+        with contextlib.ExitStack() as stack:
+            for lock_name in lock_names:
+                stack.enter_context(utils.lock(lock_name, external=True))
+            yield
 
+    def cancel(self, context=None):
+        for obj in self.get_cascade():
+            obj._cancel()
+        self._cancel(context)
+
+    def _cancel(self, context=None):
         with utils.lock(
             utils.get_resource_lock_name(self.resource_type, self.resource_uuid),
             external=True,
@@ -247,7 +466,9 @@ class Lease(base.ESILEAPObject):
 
     def save(self, context=None):
         updates = self.obj_get_changes()
-        db_lease = self.dbapi.lease_update(self.uuid, updates)
+        db_lease = self.dbapi.lease_update(
+            self.uuid, updates, outbox=notify.pop_outbox_entries(self)
+        )
         self._from_db_object(context, self, db_lease)
 
     def fulfill(self, context=None):
@@ -255,6 +476,9 @@ class Lease(base.ESILEAPObject):
             utils.get_resource_lock_name(self.resource_type, self.resource_uuid),
             external=True,
         ):
+            if self._status_changed():
+                return
+
             LOG.info("Fulfilling lease %s", self.uuid)
             try:
                 resource = self.resource_object()
@@ -280,21 +504,18 @@ class Lease(base.ESILEAPObject):
             self.save(context)
 
     def expire(self, context=None):
-        leases = Lease.get_all(
-            {"parent_lease_uuid": self.uuid, "status": statuses.LEASE_CAN_DELETE}, None
-        )
-        for lease in leases:
-            lease.expire(context)
-        offers = offer_obj.Offer.get_all(
-            {"parent_lease_uuid": self.uuid, "status": statuses.OFFER_CAN_DELETE}, None
-        )
-        for offer in offers:
-            offer.expire(context)
+        for obj in self.get_cascade(context):
+            obj._expire(context)
+        self._expire(context)
 
+    def _expire(self, context=None):
         with utils.lock(
             utils.get_resource_lock_name(self.resource_type, self.resource_uuid),
             external=True,
         ):
+            if self._status_changed():
+                return
+
             LOG.info("Expiring lease %s", self.uuid)
             try:
                 # expire lease
@@ -309,6 +530,18 @@ class Lease(base.ESILEAPObject):
                 self.status = statuses.WAIT_EXPIRE
             self.save(context)
 
+    def _status_changed(self):
+        """Return whether the lease status changed since it was loaded.
+
+        Called with the resource lock held, so that a lease picked up by
+        several manager jobs at once is only transitioned by the first.
+        """
+        db_lease = self.dbapi.lease_get_by_uuid(self.uuid)
+        if db_lease is None or db_lease.status != self.status:
+            LOG.info("Lease %s changed since it was loaded, skipping", self.uuid)
+            return True
+        return False
+
     def resource_object(self):
         return get_resource_object(self.resource_type, self.resource_uuid)
 
@@ -334,6 +567,35 @@ class Lease(base.ESILEAPObject):
             context, self, "delete", CRUD_NOTIFY_OBJ, node=resource
         )
 
+    @staticmethod
+    def verify_offer_time_ranges(updates_list):
+        offer_uuids = []
+        for updates in updates_list:
+            if not updates.get("offer_uuid"):
+                raise exception.LeaseNoOfferUUID()
+            if updates["start_time"] >= updates["end_time"]:
+                raise exception.InvalidTimeRange(
+                    resource="lease",
+                    start_time=str(updates["start_time"]),
+                    end_time=str(updates["end_time"]),
+                )
+            if updates["offer_uuid"] in offer_uuids:
+                raise exception.OfferDuplicateClaim(offer_uuid=updates["offer_uuid"])
+            offer_uuids.append(updates["offer_uuid"])
+
+        offers = {o.uuid: o for o in offer_obj.Offer.get_many(offer_uuids)}
+        claims = []
+        for updates in updates_list:
+            offer = offers.get(updates["offer_uuid"])
+            if offer is None:
+                raise exception.OfferNotFound(offer_uuid=updates["offer_uuid"])
+            if offer.status != statuses.AVAILABLE:
+                raise exception.OfferNotAvailable(
+                    offer_uuid=offer.uuid, status=offer.status
+                )
+            claims.append((offer, updates["start_time"], updates["end_time"]))
+        offer_obj.Offer.verify_availability_many(claims)
+
     @staticmethod
     def verify_time_range(
         start_time,
@@ -123,8 +123,35 @@ class NotificationBase(base.ESILEAPObject):
         notify(context, event_type=event_type, payload=payload)
 
         event_dict = self.payload.get_event_dict(event_type)
-        event = event_obj.Event(**event_dict)
-        event.create()
+        event_obj.buffer_event(event_obj.Event(**event_dict))
+
+    def get_outbox_entry(self):
+        """Return the notification as an outbox entry.
+
+        The entry holds the message to publish and the matching event,
+        and is meant to be written in the transaction that changes the
+        object the notification is about.
+
+        :raises: NotificationPayloadError
+        :returns: the outbox entry, or None if the notification should
+                  not be sent
+        """
+        if not self._should_notify():
+            return None
+        if not self.payload.populated:
+            raise exception.NotificationPayloadError(class_name=self.__class__.__name__)
+
+        self.payload.obj_reset_changes()
+        event_type = self.event_type.to_event_type_field()
+        return {
+            "message": {
+                "publisher_id": "%s.%s" % (self.publisher.service, self.publisher.host),
+                "event_type": event_type,
+                "priority": self.level,
+                "payload": self.payload.obj_to_primitive(),
+            },
+            "event": self.payload.get_event_dict(event_type),
+        }
 
 
 class NotificationPayloadBase(base.ESILEAPObject):
@@ -10,6 +10,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import contextlib
 import datetime
 
 from esi_leap.common import exception
@@ -54,17 +56,66 @@ class Offer(base.ESILEAPObject):
         if db_offer:
             return cls._from_db_object(context, cls(), db_offer)
 
+    @classmethod
+    def get_many(cls, offer_uuids, context=None):
+        db_offers = cls.dbapi.offer_get_by_uuids(offer_uuids)
+        return cls._from_db_object_list(context, db_offers)
+
     @classmethod
     def get_all(cls, filters, context=None):
         db_offers = cls.dbapi.offer_get_all(filters)
         return cls._from_db_object_list(context, db_offers)
 
+    @classmethod
+    def search(
+        cls,
+        start,
+        end,
+        resource_type=None,
+        resource_uuids=None,
+        lessee_id=None,
+        limit=None,
+        context=None,
+    ):
+        db_offers = cls.dbapi.offer_search(
+            start, end, resource_type, resource_uuids, lessee_id, limit
+        )
+        return cls._from_db_object_list(context, db_offers)
+
+    @classmethod
+    def get_all_due_for_expiry(cls, now, context=None):
+        db_offers = cls.dbapi.offer_get_all_due_for_expiry(now)
+        return cls._from_db_object_list(context, db_offers)
+
     def get_availabilities(self):
         if self.status != statuses.AVAILABLE:
             return []
 
         conflicts = self.dbapi.offer_get_conflict_times(self)
+        return self._get_availabilities(conflicts, datetime.datetime.now())
+
+    @classmethod
+    def get_availabilities_many(cls, offers):
+        """Return the availabilities of several offers keyed by offer uuid.
+
+        The conflict times of all the offers are fetched in one query.
+        """
+        avails = {o.uuid: [] for o in offers}
+        available = [o for o in offers if o.status == statuses.AVAILABLE]
+        if not available:
+            return avails
+
+        rows = cls.dbapi.offer_get_conflict_times_many([o.uuid for o in available])
+        conflicts = collections.defaultdict(list)
+        for offer_uuid, start_time, end_time in rows:
+            conflicts[offer_uuid].append((start_time, end_time))
+
         now = datetime.datetime.now()
+        for o in available:
+            avails[o.uuid] = o._get_availabilities(conflicts[o.uuid], now)
+        return avails
+
+    def _get_availabilities(self, conflicts, now):
         start_time = self.start_time if self.start_time >= now else now
 
         if conflicts:
@@ -151,14 +202,136 @@ class Offer(base.ESILEAPObject):
             db_offer = self.dbapi.offer_create(updates)
             self._from_db_object(context, self, db_offer)
 
-    def cancel(self):
-        LOG.info("Deleting offer %s", self.uuid)
-        leases = lease_obj.Lease.get_all(
-            {"offer_uuid": self.uuid, "status": statuses.LEASE_CAN_DELETE}, None
+    @classmethod
+    def create_many(cls, offers, context=None):
+        """Create several offers, each independently of the others.
+
+        The resources are locked in a deterministic order, conflicts are
+        checked with one busy interval query and the offers that pass are
+        inserted in one transaction.
+
+        :returns: a list holding, for each offer, None if it was created
+            or the exception that prevented its creation
+        """
+        updates_list = [o.obj_get_changes() for o in offers]
+        errors = [None] * len(offers)
+        lock_names = sorted(
+            {
+                utils.get_resource_lock_name(u["resource_type"], u["resource_uuid"])
+                for u in updates_list
+            }
         )
-        for lease in leases:
-            lease.cancel()
 
+        with contextlib.ExitStack() as stack:
+            for lock_name in lock_names:
+                stack.enter_context(utils.lock(lock_name, external=True))
+
+            LOG.info("Creating %d offers", len(offers))
+            parent_leases = {}
+            for i, updates in enumerate(updates_list):
+                try:
+                    cls._verify_create(updates, parent_leases)
+                except exception.ESILeapException as e:
+                    errors[i] = e
+
+            valid = [i for i, e in enumerate(errors) if e is None]
+            claims = [
+                (
+                    updates_list[i]["resource_type"],
+                    updates_list[i]["resource_uuid"],
+                    updates_list[i].get("parent_lease_uuid"),
+                    updates_list[i]["start_time"],
+                    updates_list[i]["end_time"],
+                )
+                for i in valid
+            ]
+            conflicts = set(cls.dbapi.resource_get_conflicts_many(claims))
+
+            # offers in the same request must not overlap each other either
+            accepted = []
+            for j, i in enumerate(valid):
+                r_type, r_uuid, parent, start, end = claims[j]
+                if j in conflicts or any(
+                    claims[k][:3] == (r_type, r_uuid, parent)
+                    and claims[k][3] < end
+                    and claims[k][4] > start
+                    for k in accepted
+                ):
+                    errors[i] = cls._conflict_error(updates_list[i])
+                else:
+                    accepted.append(j)
+
+            db_offers = cls.dbapi.offer_create_many(
+                [updates_list[valid[j]] for j in accepted]
+            )
+
+        for j, db_offer in zip(accepted, db_offers):
+            cls._from_db_object(context, offers[valid[j]], db_offer)
+        return errors
+
+    @staticmethod
+    def _verify_create(updates, parent_leases):
+        if updates["start_time"] >= updates["end_time"]:
+            raise exception.InvalidTimeRange(
+                resource="offer",
+                start_time=str(updates["start_time"]),
+                end_time=str(updates["end_time"]),
+            )
+
+        parent_lease_uuid = updates.get("parent_lease_uuid")
+        if parent_lease_uuid:
+            if parent_lease_uuid not in parent_leases:
+                parent_leases[parent_lease_uuid] = lease_obj.Lease.get(
+                    parent_lease_uuid
+                )
+            parent_lease = parent_leases[parent_lease_uuid]
+
+            if parent_lease is None:
+                raise exception.LeaseNotFound(lease_id=parent_lease_uuid)
+            if parent_lease.status != statuses.ACTIVE:
+                raise exception.LeaseNotActive(lease_id=parent_lease_uuid)
+            if (
+                updates["start_time"] < parent_lease.start_time
+                or updates["end_time"] > parent_lease.end_time
+            ):
+                raise exception.LeaseNoTimeAvailabilities(
+                    lease_uuid=parent_lease_uuid,
+                    start_time=updates["start_time"],
+                    end_time=updates["end_time"],
+                )
+
+    @staticmethod
+    def _conflict_error(updates):
+        if updates.get("parent_lease_uuid"):
+            return exception.LeaseNoTimeAvailabilities(
+                lease_uuid=updates["parent_lease_uuid"],
+                start_time=updates["start_time"],
+                end_time=updates["end_time"],
+            )
+        return exception.ResourceTimeConflict(
+            resource_type=updates["resource_type"],
+            resource_uuid=updates["resource_uuid"],
+        )
+
+    @classmethod
+    def get_descendants(cls, offer_uuid, context=None):
+        db_leases, db_offers = cls.dbapi.offer_get_descendants(offer_uuid)
+        return (
+            lease_obj.Lease._from_db_object_list(context, db_leases),
+            cls._from_db_object_list(context, db_offers),
+        )
+
+    def get_cascade(self, context=None):
+        leases, offers = Offer.get_descendants(self.uuid, context)
+        return lease_obj.get_cascade_order(self.uuid, leases, offers)
+
+    def cancel(self):
+        for obj in self.get_cascade():
+            obj._cancel()
+        self._cancel()
+
+    def _cancel(self):
+        LOG.info("Deleting offer %s", self.uuid)
         with utils.lock(
             utils.get_resource_lock_name(self.resource_type, self.resource_uuid),
             external=True,
@@ -167,13 +340,12 @@ class Offer(base.ESILEAPObject):
             self.save(None)
 
     def expire(self, context=None):
-        LOG.info("Expiring offer %s", self.uuid)
-        leases = lease_obj.Lease.get_all(
-            {"offer_uuid": self.uuid, "status": statuses.LEASE_CAN_DELETE}, None
-        )
-        for lease in leases:
-            lease.expire(context)
+        for obj in self.get_cascade(context):
+            obj._expire(context)
+        self._expire(context)
 
+    def _expire(self, context=None):
+        LOG.info("Expiring offer %s", self.uuid)
         with utils.lock(
             utils.get_resource_lock_name(self.resource_type, self.resource_uuid),
             external=True,
@@ -184,6 +356,10 @@ class Offer(base.ESILEAPObject):
     def verify_availability(self, start_time, end_time):
         return self.dbapi.offer_verify_availability(self, start_time, end_time)
 
+    @classmethod
+    def verify_availability_many(cls, claims):
+        return cls.dbapi.offer_verify_availability_many(claims)
+
     def destroy(self):
         self.dbapi.offer_destroy(self.uuid)
         self.obj_reset_changes()
@@ -0,0 +1,56 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from esi_leap.common import rpc
+from esi_leap.db import api as dbapi
+from esi_leap.objects import base
+from esi_leap.objects import fields
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import timeutils
+from oslo_versionedobjects import base as versioned_objects_base
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+
+@versioned_objects_base.VersionedObjectRegistry.register
+class OutboxMessage(base.ESILEAPObject):
+    dbapi = dbapi.get_instance()
+
+    fields = {
+        "id": fields.IntegerField(),
+        "publisher_id": fields.StringField(),
+        "event_type": fields.StringField(),
+        "priority": fields.StringField(),
+        "payload": fields.FlexibleDictField(),
+        "delivered_at": fields.DateTimeField(nullable=True),
+    }
+
+    @classmethod
+    def get_undelivered(cls, limit, context=None):
+        db_messages = cls.dbapi.outbox_get_undelivered(limit)
+        return cls._from_db_object_list(context, db_messages)
+
+    @classmethod
+    def mark_delivered(cls, message_ids):
+        cls.dbapi.outbox_mark_delivered(message_ids, timeutils.utcnow())
+
+    @classmethod
+    def purge_delivered(cls, before):
+        return cls.dbapi.outbox_purge_delivered(before)
+
+    def publish(self, context):
+        notifier = rpc.get_versioned_notifier(self.publisher_id)
+        notify = getattr(notifier, self.priority)
+        notify(context, event_type=self.event_type, payload=self.payload)
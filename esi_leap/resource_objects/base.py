@@ -64,6 +64,24 @@ class ResourceObjectInterface(object, metaclass=abc.ABCMeta):
     def remove_lease(self, lease):
         """Disassociates a lease from the resource"""
 
+    @classmethod
+    def get_many(cls, idents):
+        """Return the resources with the given identifiers
+
+        Returns a dict keyed by identifier. Identifiers that do not match
+        a resource are left out.
+        """
+        return {ident: cls(ident) for ident in idents}
+
+    @classmethod
+    def get_uuids_by_resource_class(cls, resource_class):
+        """Return the uuids of the resources of a class, if known
+
+        Returns None if resources of this type cannot be looked up by
+        class, in which case each resource's class must be checked.
+        """
+        return None
+
     def verify_availability(self, start_time, end_time):
         self.dbapi.resource_verify_availability(
             self.resource_type,
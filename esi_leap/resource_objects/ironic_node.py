@@ -11,9 +11,11 @@
 #    under the License.
 
 from ironicclient.common.apiclient import exceptions as ir_exception
+from oslo_context import context as ctx
 from oslo_log import log as logging
 from oslo_utils.uuidutils import is_uuid_like
 
+from esi_leap.common import api_rpcapi
 from esi_leap.common import exception
 from esi_leap.common import ironic
 import esi_leap.conf
@@ -24,6 +26,7 @@ from esi_leap.resource_objects import error
 
 CONF = esi_leap.conf.CONF
 _cached_ironic_client = None
+_api_rpcapi = None
 
 LOG = logging.getLogger(__name__)
 
@@ -35,11 +38,39 @@ def get_ironic_client():
     return _cached_ironic_client
 
 
+def get_api_rpcapi():
+    global _api_rpcapi
+    if _api_rpcapi is None:
+        _api_rpcapi = api_rpcapi.APIRPCAPI()
+    return _api_rpcapi
+
+
+def invalidate_node(node_uuid):
+    """Drop a node from the node cache of this process and the API's."""
+    ironic.invalidate_node(node_uuid)
+    # the API processes fall back on the cache refresh if this fails
+    try:
+        get_api_rpcapi().invalidate_node(
+            ctx.RequestContext(auth_token=None, project_id=None, overwrite=False),
+            node_uuid,
+        )
+    except Exception as e:
+        LOG.warning(
+            "Error publishing invalidation of node %s: %s: %s",
+            node_uuid,
+            type(e).__name__,
+            e,
+        )
+
+
 class IronicNode(base.ResourceObjectInterface):
     resource_type = "ironic_node"
 
-    def __init__(self, ident):
-        if not is_uuid_like(ident):
+    def __init__(self, ident, node=None):
+        if node is not None:
+            self._node = node
+            self._uuid = node.uuid
+        elif not is_uuid_like(ident):
             self._node = get_ironic_client().node.get(ident)
             self._uuid = self._node.uuid
         else:
@@ -49,6 +80,20 @@ class IronicNode(base.ResourceObjectInterface):
     def get_uuid(self):
         return self._uuid
 
+    @classmethod
+    def get_many(cls, idents):
+        nodes = ironic.NodeIndex(ironic.get_node_list(fields=ironic.ENRICHMENT_FIELDS))
+        resources = {}
+        for ident in idents:
+            node = nodes.get(ident) or nodes.get(nodes.get_uuid(ident))
+            if node is not None:
+                resources[ident] = cls(ident, node=node)
+        return resources
+
+    @classmethod
+    def get_uuids_by_resource_class(cls, resource_class):
+        return ironic.get_cached_node_list().get_uuids_by_resource_class(resource_class)
+
     def get_name(self, resource_list=None):
         return self._get_node_attr(
             "name",
@@ -135,6 +180,7 @@ class IronicNode(base.ResourceObjectInterface):
             }
         )
         get_ironic_client().node.update(self._uuid, patches)
+        invalidate_node(self._uuid)
 
     def remove_lease(self, lease):
         patches = []
@@ -165,6 +211,7 @@ class IronicNode(base.ResourceObjectInterface):
         if len(patches) > 0:
             # remove lease information and instance_info
             get_ironic_client().node.update(self._uuid, patches)
+            invalidate_node(self._uuid)
 
         # disable console and any console tokens
         get_ironic_client().node.set_console_mode(self._uuid, False)
@@ -181,6 +228,7 @@ class IronicNode(base.ResourceObjectInterface):
             "adopt failed",
         ]:
             get_ironic_client().node.set_provision_state(self._uuid, "deleted")
+            invalidate_node(self._uuid)
         else:
             vifs = get_ironic_client().node.vif_list(self._uuid)
             for vif in vifs:
@@ -11,6 +11,7 @@
 #    under the License.
 
 import mock
+from oslo_messaging import conffixture
 import pecan
 import pecan.testing
 import tempfile
@@ -29,6 +30,8 @@ class APITestCase(base.DBTestCase):
         super(APITestCase, self).setUp()
 
         CONF.set_override("auth_enable", False, group="pecan")
+        self.messaging_conf = self.useFixture(conffixture.ConfFixture(CONF))
+        self.messaging_conf.transport_url = "fake:/"
 
         self.app = pecan.testing.load_test_app(dict(app.get_pecan_config()))
 
@@ -38,3 +38,7 @@ class TestCollection(unittest.TestCase):
         )
         self.assertEqual(self.test_collection.get_next(2, kwargs), wtypes.Unset)
         self.assertEqual(self.test_collection.get_next(3, kwargs), link)
+
+    def test_get_next_marker(self):
+        link = "url/v1/stuff?limit=5&marker=zzzzz"
+        self.assertEqual(self.test_collection.get_next(5, "url", "zzzzz"), link)
@@ -93,3 +93,37 @@ class TestEventsController(test_api_base.APITestCase):
         mock_ega.assert_called_once_with(expected_filters, self.context)
 
         self.assertEqual(data["events"][0]["id"], 1)
+
+    @mock.patch("esi_leap.api.controllers.v1.utils.policy_authorize")
+    @mock.patch("esi_leap.objects.event.Event.get_all")
+    def test_get_all_pagination(self, mock_ega, mock_pa):
+        fake_event = FakeEvent()
+        expected_filters = {"limit": 1, "marker": 5}
+        mock_pa.side_effect = None
+        mock_ega.return_value = [fake_event]
+
+        data = self.get_json("/events?limit=1&marker=5")
+
+        mock_ega.assert_called_once_with(expected_filters, self.context)
+        self.assertEqual(data["events"][0]["id"], 1)
+        self.assertEqual(data["next"], "http://localhost/v1/events?limit=1&marker=1")
+
+    @mock.patch("esi_leap.api.controllers.v1.utils.policy_authorize")
+    @mock.patch("esi_leap.objects.event.Event.get_all")
+    def test_get_all_pagination_last_page(self, mock_ega, mock_pa):
+        mock_pa.side_effect = None
+        mock_ega.return_value = [FakeEvent()]
+
+        data = self.get_json("/events?limit=2")
+
+        self.assertNotIn("next", data)
+
+    @mock.patch("esi_leap.api.controllers.v1.utils.policy_authorize")
+    @mock.patch("esi_leap.objects.event.Event.get_all")
+    def test_get_all_invalid_limit(self, mock_ega, mock_pa):
+        mock_pa.side_effect = None
+
+        request = self.get_json("/events?limit=0", expect_errors=True)
+
+        mock_ega.assert_not_called()
+        self.assertEqual(400, request.status_int)
@@ -66,23 +66,87 @@ class TestLeasesController(test_api_base.APITestCase):
         data = self.get_json("/leases")
         self.assertEqual([], data["leases"])
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.utils." "lease_get_dict_with_added_info")
     @mock.patch("esi_leap.objects.lease.Lease.get_all")
-    def test_one(self, mock_ga, mock_lgdwai, mock_gpl, mock_gnl):
+    def test_one(self, mock_ga, mock_lgdwai, mock_gnl):
         mock_ga.return_value = [self.test_lease]
         mock_lgdwai.return_value = self.test_lease.to_dict()
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
 
         data = self.get_json("/leases")
 
         self.assertEqual(self.test_lease.uuid, data["leases"][0]["uuid"])
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         mock_lgdwai.assert_called_once()
 
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
+    @mock.patch("esi_leap.api.controllers.v1.utils." "lease_get_dict_with_added_info")
+    @mock.patch("esi_leap.objects.lease.Lease.get_all")
+    def test_get_all_pagination(self, mock_ga, mock_lgdwai, mock_gnl):
+        mock_ga.return_value = [self.test_lease, self.test_lease_1]
+        mock_lgdwai.side_effect = [
+            self.test_lease.to_dict(),
+            self.test_lease_1.to_dict(),
+        ]
+        mock_gnl.return_value = []
+
+        data = self.get_json("/leases?limit=2&marker=%s" % self.test_lease.uuid)
+
+        self.assertEqual(2, mock_ga.call_args[0][0]["limit"])
+        self.assertEqual(self.test_lease.uuid, mock_ga.call_args[0][0]["marker"])
+        self.assertEqual(
+            "http://localhost/v1/leases?limit=2&marker=%s" % self.test_lease_1.uuid,
+            data["next"],
+        )
+
+    @mock.patch("esi_leap.common.keystone.get_project_name")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
+    @mock.patch("esi_leap.objects.lease.Lease.get_all")
+    def test_get_all_fields(self, mock_ga, mock_gnl, mock_gpn):
+        mock_ga.return_value = [self.test_lease, self.test_lease_1]
+
+        data = self.get_json("/leases?fields=uuid,status,end_time&limit=2")
+
+        self.assertEqual(
+            [
+                {"uuid": self.test_lease.uuid, "end_time": "2016-08-16T19:20:30"},
+                {"uuid": self.test_lease_1.uuid, "end_time": "2016-08-16T19:20:30"},
+            ],
+            data["leases"],
+        )
+        self.assertIn("fields=uuid%2Cstatus%2Cend_time", data["next"])
+        mock_gnl.assert_not_called()
+        mock_gpn.assert_not_called()
+
+    @mock.patch("esi_leap.common.keystone.get_project_name")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
+    @mock.patch("esi_leap.objects.lease.Lease.get_all")
+    def test_get_all_fields_resource_class_filter(self, mock_ga, mock_gnl, mock_gpn):
+        mock_ga.return_value = [self.test_lease, self.test_lease_with_parent]
+        mock_gnl.return_value = []
+
+        data = self.get_json("/leases?fields=uuid&resource_class=fake")
+        self.assertEqual(
+            [
+                {"uuid": self.test_lease.uuid},
+                {"uuid": self.test_lease_with_parent.uuid},
+            ],
+            data["leases"],
+        )
+
+        data = self.get_json("/leases?fields=uuid&resource_class=baremetal")
+        self.assertEqual([], data["leases"])
+        self.assertEqual(2, mock_gnl.call_count)
+        mock_gpn.assert_not_called()
+
+    @mock.patch("esi_leap.objects.lease.Lease.get_all")
+    def test_get_all_invalid_fields(self, mock_ga):
+        response = self.get_json("/leases?fields=uuid,bogus", expect_errors=True)
+
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+        mock_ga.assert_not_called()
+
     @mock.patch("esi_leap.api.controllers.v1.utils." "lease_get_dict_with_added_info")
     @mock.patch("esi_leap.api.controllers.v1.lease.get_resource_object")
     @mock.patch("esi_leap.common.keystone.get_project_uuid_from_ident")
@@ -333,19 +397,103 @@ class TestLeasesController(test_api_base.APITestCase):
         mock_lgdwai.assert_not_called()
         self.assertEqual(http_client.INTERNAL_SERVER_ERROR, request.status_int)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.api.controllers.v1.utils.cancel_leases")
+    @mock.patch("esi_leap.objects.lease.Lease.cancel_many")
+    @mock.patch("esi_leap.api.controllers.v1.utils.check_leases_policy_and_retrieve")
+    @mock.patch("esi_leap.api.controllers.v1.utils.lease_get_dict_with_added_info")
+    def test_bulk_cancel(self, mock_lgdwai, mock_clpar, mock_cm, mock_cl):
+        leases = [self.test_lease, self.test_lease_with_parent]
+        mock_clpar.return_value = leases
+        mock_cm.return_value = leases
+        mock_lgdwai.return_value = {}
+
+        data = {"lease_uuids": [lease.uuid for lease in leases]}
+        request = self.post_json("/leases/bulk_cancel", data)
+
+        mock_clpar.assert_called_once_with(
+            self.context,
+            "esi_leap:lease:delete",
+            data["lease_uuids"],
+            statuses.LEASE_CAN_DELETE,
+        )
+        mock_cm.assert_called_once_with(leases, self.context)
+        mock_cl.assert_called_once_with(self.context)
+        self.assertEqual(2, len(request.json["leases"]))
+
+    @mock.patch("esi_leap.api.controllers.v1.utils.cancel_leases")
+    @mock.patch("esi_leap.objects.lease.Lease.cancel_many")
+    @mock.patch("esi_leap.api.controllers.v1.utils.check_leases_policy")
+    @mock.patch("esi_leap.objects.lease.Lease.get_all")
+    def test_bulk_cancel_filter(self, mock_ga, mock_clp, mock_cm, mock_cl):
+        mock_ga.return_value = []
+        mock_cm.return_value = []
+
+        request = self.post_json("/leases/bulk_cancel", {"offer_uuid": "offer-uuid"})
+
+        expected_filters = {
+            "status": statuses.LEASE_CAN_DELETE,
+            "offer_uuid": "offer-uuid",
+            "time_filter_type": constants.WITHIN_TIME_FILTER,
+            "project_or_owner_id": self.context.project_id,
+        }
+        mock_ga.assert_called_once_with(expected_filters, self.context)
+        mock_clp.assert_called_once_with(self.context, "esi_leap:lease:delete", [])
+        mock_cm.assert_called_once_with([], self.context)
+        mock_cl.assert_not_called()
+        self.assertEqual({"leases": []}, request.json)
+
+    @mock.patch("esi_leap.objects.lease.Lease.cancel_many")
+    def test_bulk_cancel_invalid_selection(self, mock_cm):
+        for data in ({}, {"lease_uuids": ["a"], "project_id": "b"}):
+            request = self.post_json("/leases/bulk_cancel", data, expect_errors=True)
+            self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+        mock_cm.assert_not_called()
+
+    @mock.patch("esi_leap.api.controllers.v1.utils.schedule_lease")
+    @mock.patch("esi_leap.objects.lease.Lease.extend_many")
+    @mock.patch("esi_leap.api.controllers.v1.utils.check_leases_policy_and_retrieve")
+    @mock.patch("esi_leap.api.controllers.v1.utils.lease_get_dict_with_added_info")
+    def test_bulk_extend(self, mock_lgdwai, mock_clpar, mock_em, mock_sl):
+        leases = [self.test_lease, self.test_lease_with_parent]
+        mock_clpar.return_value = leases
+        mock_lgdwai.return_value = {}
+
+        data = {
+            "lease_uuids": [lease.uuid for lease in leases],
+            "end_time": "2016-09-16T19:20:30",
+        }
+        request = self.post_json("/leases/bulk_extend", data)
+
+        mock_clpar.assert_called_once_with(
+            self.context,
+            "esi_leap:lease:update",
+            data["lease_uuids"],
+            statuses.LEASE_CAN_EXPIRE,
+        )
+        mock_em.assert_called_once_with(
+            leases, datetime.datetime(2016, 9, 16, 19, 20, 30), self.context
+        )
+        self.assertEqual(2, mock_sl.call_count)
+        self.assertEqual(2, len(request.json["leases"]))
+
+    @mock.patch("esi_leap.objects.lease.Lease.extend_many")
+    def test_bulk_extend_no_end_time(self, mock_em):
+        request = self.post_json(
+            "/leases/bulk_extend", {"lease_uuids": ["a"]}, expect_errors=True
+        )
+
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+        mock_em.assert_not_called()
+
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.utils." "lease_get_dict_with_added_info")
     @mock.patch(
         "esi_leap.api.controllers.v1.lease.LeasesController."
         "_lease_get_all_authorize_filters"
     )
     @mock.patch("esi_leap.objects.lease.Lease.get_all")
-    def test_get_nofilters(
-        self, mock_get_all, mock_lgaaf, mock_lgdwai, mock_gpl, mock_gnl
-    ):
+    def test_get_nofilters(self, mock_get_all, mock_lgaaf, mock_lgdwai, mock_gnl):
         mock_get_all.return_value = [self.test_lease, self.test_lease]
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
 
         self.get_json("/leases")
@@ -363,12 +511,10 @@ class TestLeasesController(test_api_base.APITestCase):
             resource_uuid=None,
         )
         mock_get_all.assert_called_once()
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         self.assertEqual(2, mock_lgdwai.call_count)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.utils." "lease_get_dict_with_added_info")
     @mock.patch("esi_leap.common.keystone.get_project_uuid_from_ident")
     @mock.patch(
@@ -377,11 +523,10 @@ class TestLeasesController(test_api_base.APITestCase):
     )
     @mock.patch("esi_leap.objects.lease.Lease.get_all")
     def test_get_project_filter(
-        self, mock_get_all, mock_lgaaf, mock_gpufi, mock_lgdwai, mock_gpl, mock_gnl
+        self, mock_get_all, mock_lgaaf, mock_gpufi, mock_lgdwai, mock_gnl
     ):
         mock_gpufi.return_value = "12345"
         mock_get_all.return_value = [self.test_lease, self.test_lease]
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
         self.get_json("/leases?project_id=12345")
 
@@ -399,12 +544,10 @@ class TestLeasesController(test_api_base.APITestCase):
             resource_uuid=None,
         )
         mock_get_all.assert_called_once()
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         self.assertEqual(2, mock_lgdwai.call_count)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.utils." "lease_get_dict_with_added_info")
     @mock.patch("esi_leap.common.keystone.get_project_uuid_from_ident")
     @mock.patch(
@@ -413,11 +556,10 @@ class TestLeasesController(test_api_base.APITestCase):
     )
     @mock.patch("esi_leap.objects.lease.Lease.get_all")
     def test_get_owner_filter(
-        self, mock_get_all, mock_lgaaf, mock_gpufi, mock_lgdwai, mock_gpl, mock_gnl
+        self, mock_get_all, mock_lgaaf, mock_gpufi, mock_lgdwai, mock_gnl
     ):
         mock_gpufi.return_value = "54321"
         mock_get_all.return_value = [self.test_lease, self.test_lease]
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
 
         self.get_json("/leases?owner_id=54321")
@@ -437,12 +579,10 @@ class TestLeasesController(test_api_base.APITestCase):
         )
 
         mock_get_all.assert_called_once()
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         self.assertEqual(2, mock_lgdwai.call_count)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.utils." "lease_get_dict_with_added_info")
     @mock.patch("esi_leap.api.controllers.v1.lease.get_resource_object")
     @mock.patch(
@@ -451,11 +591,10 @@ class TestLeasesController(test_api_base.APITestCase):
     )
     @mock.patch("esi_leap.objects.lease.Lease.get_all")
     def test_get_resource_filter(
-        self, mock_get_all, mock_lgaaf, mock_gro, mock_lgdwai, mock_gpl, mock_gnl
+        self, mock_get_all, mock_lgaaf, mock_gro, mock_lgdwai, mock_gnl
     ):
         mock_gro.return_value = FakeNode("54321")
         mock_get_all.return_value = [self.test_lease, self.test_lease]
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
 
         self.get_json("/leases?resource_uuid=54321&resource_type=test_node")
@@ -475,12 +614,10 @@ class TestLeasesController(test_api_base.APITestCase):
         )
 
         mock_get_all.assert_called_once()
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         self.assertEqual(2, mock_lgdwai.call_count)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.utils." "lease_get_dict_with_added_info")
     @mock.patch(
         "esi_leap.api.controllers.v1.lease.LeasesController."
@@ -488,7 +625,7 @@ class TestLeasesController(test_api_base.APITestCase):
     )
     @mock.patch("esi_leap.objects.lease.Lease.get_all")
     def test_get_resource_class_filter(
-        self, mock_get_all, mock_lgaaf, mock_lgdwai, mock_gpl, mock_gnl
+        self, mock_get_all, mock_lgaaf, mock_lgdwai, mock_gnl
     ):
         def _get_lease_response(lease, use_datetime=False):
             if use_datetime:
@@ -516,7 +653,6 @@ class TestLeasesController(test_api_base.APITestCase):
             }
 
         mock_get_all.return_value = [self.test_lease, self.test_lease]
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
         mock_lgdwai.side_effect = [
             _get_lease_response(self.test_lease, use_datetime=True),
@@ -540,13 +676,11 @@ class TestLeasesController(test_api_base.APITestCase):
         )
 
         mock_get_all.assert_called_once()
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         self.assertEqual(2, mock_lgdwai.call_count)
         self.assertEqual(response, expected_resp)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.utils." "lease_get_dict_with_added_info")
     @mock.patch("esi_leap.api.controllers.v1.lease.get_resource_object")
     @mock.patch(
@@ -555,12 +689,11 @@ class TestLeasesController(test_api_base.APITestCase):
     )
     @mock.patch("esi_leap.objects.lease.Lease.get_all")
     def test_get_resource_filter_default_resource_type(
-        self, mock_get_all, mock_lgaaf, mock_gro, mock_lgdwai, mock_gpl, mock_gnl
+        self, mock_get_all, mock_lgaaf, mock_gro, mock_lgdwai, mock_gnl
     ):
         fake_uuid = uuidutils.generate_uuid()
         mock_gro.return_value = IronicNode(fake_uuid)
         mock_get_all.return_value = [self.test_lease, self.test_lease]
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
 
         self.get_json("/leases?resource_uuid=%s" % fake_uuid)
@@ -580,7 +713,6 @@ class TestLeasesController(test_api_base.APITestCase):
         )
 
         mock_get_all.assert_called_once()
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         self.assertEqual(2, mock_lgdwai.call_count)
 
@@ -858,7 +990,22 @@ class TestLeaseControllersGetAllFilters(testtools.TestCase):
         self.assertEqual(expected_filters, filters)
 
         del expected_filters["status"]
+        expected_filters["include_history"] = True
         filters = LeasesController._lease_get_all_authorize_filters(
             self.admin_ctx.to_policy_values(), status="any"
         )
         self.assertEqual(expected_filters, filters)
+
+        expected_filters["status"] = [statuses.EXPIRED]
+        filters = LeasesController._lease_get_all_authorize_filters(
+            self.admin_ctx.to_policy_values(), status=statuses.EXPIRED
+        )
+        self.assertEqual(expected_filters, filters)
+
+        del expected_filters["include_history"]
+        with mock.patch("esi_leap.api.controllers.v1.lease.CONF") as mock_conf:
+            mock_conf.archive.query_history = False
+            filters = LeasesController._lease_get_all_authorize_filters(
+                self.admin_ctx.to_policy_values(), status=statuses.EXPIRED
+            )
+        self.assertEqual(expected_filters, filters)
@@ -14,6 +14,7 @@ from datetime import datetime
 
 import mock
 
+from esi_leap.common import ironic
 from esi_leap.tests.api import base as test_api_base
 
 
@@ -59,8 +60,8 @@ class TestNodesController(test_api_base.APITestCase):
     @mock.patch("esi_leap.common.ironic.get_node_list")
     @mock.patch("esi_leap.objects.offer.Offer.get_all")
     @mock.patch("esi_leap.objects.lease.Lease.get_all")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
-    def test_get_all(self, mock_gpl, mock_lga, mock_oga, mock_gnl):
+    @mock.patch("esi_leap.common.keystone.get_keystone_client")
+    def test_get_all(self, mock_gkc, mock_lga, mock_oga, mock_gnl):
         fake_node = FakeIronicNode()
         fake_project = FakeProject()
         fake_offer = FakeOffer(
@@ -73,14 +74,14 @@ class TestNodesController(test_api_base.APITestCase):
         mock_gnl.return_value = [fake_node]
         mock_oga.return_value = [fake_offer, fake_future_offer]
         mock_lga.return_value = [fake_future_lease]
-        mock_gpl.return_value = [fake_project]
+        mock_gkc.return_value.projects.list.return_value = [fake_project]
 
         data = self.get_json("/nodes")
 
-        mock_gnl.assert_called_once_with(self.context)
+        mock_gnl.assert_called_once_with(self.context, fields=ironic.NODE_LIST_FIELDS)
         mock_oga.assert_called_once()
         mock_lga.assert_called_once()
-        mock_gpl.assert_called_once()
+        mock_gkc.return_value.projects.list.assert_called_once_with()
 
         self.assertEqual(data["nodes"][0]["name"], "fake-node")
         self.assertEqual(data["nodes"][0]["uuid"], "fake-uuid")
@@ -94,52 +95,58 @@ class TestNodesController(test_api_base.APITestCase):
         self.assertEqual(data["nodes"][0]["future_leases"], ["fake-future-lease-uuid"])
 
     @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
-    def test_get_all_resource_class_filter(self, mock_gpl, mock_gnl):
+    @mock.patch("esi_leap.common.keystone.get_keystone_client")
+    def test_get_all_resource_class_filter(self, mock_gkc, mock_gnl):
         fake_node = FakeIronicNode()
         fake_project = FakeProject()
         mock_gnl.return_value = [fake_node]
-        mock_gpl.return_value = [fake_project]
+        mock_gkc.return_value.projects.list.return_value = [fake_project]
 
         data = self.get_json("/nodes?resource_class=baremetal")
 
-        mock_gnl.assert_called_once_with(self.context, resource_class="baremetal")
-        mock_gpl.assert_called_once()
+        mock_gnl.assert_called_once_with(
+            self.context, fields=ironic.NODE_LIST_FIELDS, resource_class="baremetal"
+        )
+        mock_gkc.return_value.projects.list.assert_called_once_with()
 
         self.assertEqual(data["nodes"][0]["resource_class"], "baremetal")
 
     @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.keystone.get_keystone_client")
     @mock.patch("esi_leap.common.keystone.get_project_uuid_from_ident")
-    def test_get_all_owner_filter(self, mock_get_project_uuid, mock_gpl, mock_gnl):
+    def test_get_all_owner_filter(self, mock_get_project_uuid, mock_gkc, mock_gnl):
         fake_node = FakeIronicNode()
         fake_project = FakeProject()
         mock_gnl.return_value = [fake_node]
-        mock_gpl.return_value = [fake_project]
+        mock_gkc.return_value.projects.list.return_value = [fake_project]
 
         mock_get_project_uuid.return_value = fake_project.id
 
         data = self.get_json("/nodes?owner=fake-project")
 
-        mock_gnl.assert_called_once_with(self.context, owner=fake_project.id)
+        mock_gnl.assert_called_once_with(
+            self.context, fields=ironic.NODE_LIST_FIELDS, owner=fake_project.id
+        )
         mock_get_project_uuid.assert_called_once_with("fake-project")
 
         self.assertEqual(data["nodes"][0]["owner"], fake_project.name)
 
     @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.keystone.get_keystone_client")
     @mock.patch("esi_leap.common.keystone.get_project_uuid_from_ident")
-    def test_get_all_lesse_filter(self, mock_get_project_uuid, mock_gpl, mock_gnl):
+    def test_get_all_lesse_filter(self, mock_get_project_uuid, mock_gkc, mock_gnl):
         fake_node = FakeIronicNode()
         fake_project = FakeProject()
         mock_gnl.return_value = [fake_node]
-        mock_gpl.return_value = [fake_project]
+        mock_gkc.return_value.projects.list.return_value = [fake_project]
 
         mock_get_project_uuid.return_value = fake_project.id
 
         data = self.get_json("/nodes?lessee=fake-project")
 
-        mock_gnl.assert_called_once_with(self.context, lessee=fake_project.id)
+        mock_gnl.assert_called_once_with(
+            self.context, fields=ironic.NODE_LIST_FIELDS, lessee=fake_project.id
+        )
         mock_get_project_uuid.assert_called_once_with("fake-project")
 
         self.assertEqual(data["nodes"][0]["lessee"], "fake-project")
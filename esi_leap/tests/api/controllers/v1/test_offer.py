@@ -156,6 +156,54 @@ class TestOffersController(test_api_base.APITestCase):
         self.assertEqual(data, request.json)
         self.assertEqual(http_client.CREATED, request.status_int)
 
+    @mock.patch("esi_leap.api.controllers.v1.utils.schedule_offer")
+    @mock.patch("esi_leap.resource_objects.fake_node.FakeNode.get_many")
+    @mock.patch("esi_leap.api.controllers.v1.utils.check_resource_admin")
+    @mock.patch("esi_leap.objects.offer.Offer.create_many")
+    @mock.patch("esi_leap.api.controllers.v1.utils.offer_get_dict_with_added_info")
+    def test_bulk_create(
+        self, mock_ogdwai, mock_create_many, mock_cra, mock_get_many, mock_so
+    ):
+        resource = FakeNode(self.test_offer.resource_uuid)
+        mock_get_many.return_value = {self.test_offer.resource_uuid: resource}
+        mock_create_many.side_effect = lambda offers: [
+            None,
+            exception.ResourceTimeConflict(
+                resource_type="test_node", resource_uuid=resource.get_uuid()
+            ),
+        ]
+        mock_ogdwai.return_value = {"uuid": self.test_offer.uuid}
+
+        item = {
+            "resource_type": "test_node",
+            "resource_uuid": self.test_offer.resource_uuid,
+            "start_time": "2016-07-16T00:00:00",
+            "end_time": "2016-10-24T00:00:00",
+        }
+        data = [
+            item,
+            dict(item, start_time="2016-10-24T00:00:00"),
+            dict(item, resource_uuid="missing"),
+            dict(item, resource_type="unknown"),
+            item,
+        ]
+
+        request = self.post_json("/offers/bulk_create", data)
+
+        mock_get_many.assert_called_once_with(
+            {self.test_offer.resource_uuid, "missing"}
+        )
+        offers = mock_create_many.call_args[0][0]
+        self.assertEqual(2, len(offers))
+        self.assertEqual(2, mock_cra.call_count)
+        mock_so.assert_called_once_with(self.context, offers[0])
+        results = request.json["results"]
+        self.assertEqual({"offer": {"uuid": self.test_offer.uuid}}, results[0])
+        self.assertIn("invalid Start Time and End Time", results[1]["error"])
+        self.assertIn("missing not found", results[2]["error"])
+        self.assertIn("resource type unknown", results[3]["error"])
+        self.assertIn("Time conflict", results[4]["error"])
+
     @mock.patch("esi_leap.api.controllers.v1.offer.get_resource_object")
     @mock.patch("oslo_utils.uuidutils.generate_uuid")
     @mock.patch("esi_leap.api.controllers.v1.utils.check_resource_admin")
@@ -359,17 +407,15 @@ class TestOffersController(test_api_base.APITestCase):
         mock_ogdwai.assert_not_called()
         self.assertEqual(http_client.FORBIDDEN, request.status_int)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.utils." "offer_get_dict_with_added_info")
     @mock.patch("esi_leap.objects.offer.Offer.get_all")
-    def test_get_nofilters(self, mock_get_all, mock_ogdwai, mock_gpl, mock_gnl):
+    def test_get_nofilters(self, mock_get_all, mock_ogdwai, mock_gnl):
         mock_get_all.return_value = [self.test_offer, self.test_offer_2]
         mock_ogdwai.side_effect = [
             _get_offer_response(self.test_offer, use_datetime=True),
             _get_offer_response(self.test_offer_2, use_datetime=True),
         ]
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
 
         expected_filters = {"status": statuses.OFFER_CAN_DELETE}
@@ -383,25 +429,22 @@ class TestOffersController(test_api_base.APITestCase):
         request = self.get_json("/offers")
 
         mock_get_all.assert_called_once_with(expected_filters, self.context)
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.utils." "offer_get_dict_with_added_info")
     @mock.patch("esi_leap.objects.offer.Offer.get_all")
-    def test_get_any_status(self, mock_get_all, mock_ogdwai, mock_gpl, mock_gnl):
+    def test_get_any_status(self, mock_get_all, mock_ogdwai, mock_gnl):
         mock_get_all.return_value = [self.test_offer, self.test_offer_2]
         mock_ogdwai.side_effect = [
             _get_offer_response(self.test_offer, use_datetime=True),
             _get_offer_response(self.test_offer_2, use_datetime=True),
         ]
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
 
-        expected_filters = {}
+        expected_filters = {"include_history": True}
         expected_resp = {
             "offers": [
                 _get_offer_response(self.test_offer),
@@ -412,22 +455,19 @@ class TestOffersController(test_api_base.APITestCase):
         request = self.get_json("/offers/?status=any")
 
         mock_get_all.assert_called_once_with(expected_filters, self.context)
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.utils." "offer_get_dict_with_added_info")
     @mock.patch("esi_leap.objects.offer.Offer.get_all")
-    def test_get_status_filter(self, mock_get_all, mock_ogdwai, mock_gpl, mock_gnl):
+    def test_get_status_filter(self, mock_get_all, mock_ogdwai, mock_gnl):
         mock_get_all.return_value = [self.test_offer, self.test_offer_2]
         mock_ogdwai.side_effect = [
             _get_offer_response(self.test_offer, use_datetime=True),
             _get_offer_response(self.test_offer_2, use_datetime=True),
         ]
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
 
         expected_filters = {"status": [statuses.AVAILABLE]}
@@ -441,26 +481,21 @@ class TestOffersController(test_api_base.APITestCase):
         request = self.get_json("/offers/?status=available")
 
         mock_get_all.assert_called_once_with(expected_filters, self.context)
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.common.keystone.get_project_uuid_from_ident")
     @mock.patch("esi_leap.api.controllers.v1.utils." "offer_get_dict_with_added_info")
     @mock.patch("esi_leap.objects.offer.Offer.get_all")
-    def test_get_project_filter(
-        self, mock_get_all, mock_ogdwai, mock_gpufi, mock_gpl, mock_gnl
-    ):
+    def test_get_project_filter(self, mock_get_all, mock_ogdwai, mock_gpufi, mock_gnl):
         mock_get_all.return_value = [self.test_offer, self.test_offer_2]
         mock_ogdwai.side_effect = [
             _get_offer_response(self.test_offer, use_datetime=True),
             _get_offer_response(self.test_offer_2, use_datetime=True),
         ]
         mock_gpufi.return_value = self.context.project_id
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
 
         expected_filters = {
@@ -478,26 +513,21 @@ class TestOffersController(test_api_base.APITestCase):
 
         mock_gpufi.assert_called_once_with(self.context.project_id)
         mock_get_all.assert_called_once_with(expected_filters, self.context)
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.offer.get_resource_object")
     @mock.patch("esi_leap.api.controllers.v1.utils." "offer_get_dict_with_added_info")
     @mock.patch("esi_leap.objects.offer.Offer.get_all")
-    def test_get_resource_filter(
-        self, mock_get_all, mock_ogdwai, mock_gro, mock_gpl, mock_gnl
-    ):
+    def test_get_resource_filter(self, mock_get_all, mock_ogdwai, mock_gro, mock_gnl):
         mock_get_all.return_value = [self.test_offer, self.test_offer_2]
         mock_ogdwai.side_effect = [
             _get_offer_response(self.test_offer, use_datetime=True),
             _get_offer_response(self.test_offer_2, use_datetime=True),
         ]
         mock_gro.return_value = FakeNode("54321")
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
 
         expected_filters = {
@@ -518,18 +548,14 @@ class TestOffersController(test_api_base.APITestCase):
 
         mock_gro.assert_called_once_with("test_node", "54321")
         mock_get_all.assert_called_once_with(expected_filters, self.context)
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.utils." "offer_get_dict_with_added_info")
     @mock.patch("esi_leap.objects.offer.Offer.get_all")
-    def test_get_resource_class_filter(
-        self, mock_get_all, mock_ogdwai, mock_gpl, mock_gnl
-    ):
+    def test_get_resource_class_filter(self, mock_get_all, mock_ogdwai, mock_gnl):
         mock_get_all.return_value = [
             self.test_offer,
             self.test_offer_2,
@@ -540,7 +566,6 @@ class TestOffersController(test_api_base.APITestCase):
             _get_offer_response(self.test_offer_2, use_datetime=True),
             _get_offer_response(self.test_offer_drt, use_datetime=True),
         ]
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
         expected_filters = {"status": statuses.OFFER_CAN_DELETE}
         expected_resp = {
@@ -552,18 +577,16 @@ class TestOffersController(test_api_base.APITestCase):
         request = self.get_json("/offers/?resource_class=fake")
 
         mock_get_all.assert_called_once_with(expected_filters, self.context)
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         assert mock_ogdwai.call_count == 3
         self.assertEqual(request, expected_resp)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.offer.get_resource_object")
     @mock.patch("esi_leap.api.controllers.v1.utils." "offer_get_dict_with_added_info")
     @mock.patch("esi_leap.objects.offer.Offer.get_all")
     def test_get_resource_filter_default_resource_type(
-        self, mock_get_all, mock_ogdwai, mock_gro, mock_gpl, mock_gnl
+        self, mock_get_all, mock_ogdwai, mock_gro, mock_gnl
     ):
         fake_uuid = uuidutils.generate_uuid()
         mock_get_all.return_value = [self.test_offer, self.test_offer_2]
@@ -572,7 +595,6 @@ class TestOffersController(test_api_base.APITestCase):
             _get_offer_response(self.test_offer_2, use_datetime=True),
         ]
         mock_gro.return_value = IronicNode(fake_uuid)
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
 
         expected_filters = {
@@ -590,18 +612,137 @@ class TestOffersController(test_api_base.APITestCase):
         request = self.get_json("/offers/?resource_uuid=%s" % fake_uuid)
         mock_gro.assert_called_once_with("ironic_node", fake_uuid)
         mock_get_all.assert_called_once_with(expected_filters, self.context)
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
 
-    @mock.patch("esi_leap.common.ironic.get_node_list")
-    @mock.patch("esi_leap.common.keystone.get_project_list")
+    @mock.patch("esi_leap.objects.offer.Offer.get_availabilities_many")
+    @mock.patch("esi_leap.common.keystone.get_project_name")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
+    @mock.patch("esi_leap.objects.offer.Offer.get_all")
+    def test_get_fields(self, mock_get_all, mock_gnl, mock_gpn, mock_ga):
+        mock_get_all.return_value = [self.test_offer, self.test_offer_drt]
+
+        request = self.get_json("/offers?fields=uuid,status")
+
+        expected_resp = {
+            "offers": [
+                {"uuid": self.test_offer.uuid, "status": statuses.AVAILABLE},
+                {"uuid": self.test_offer_drt.uuid, "status": statuses.AVAILABLE},
+            ]
+        }
+        self.assertEqual(expected_resp, request)
+        mock_gnl.assert_not_called()
+        mock_gpn.assert_not_called()
+        mock_ga.assert_not_called()
+
+    @mock.patch("esi_leap.objects.offer.Offer.get_availabilities_many")
+    @mock.patch("esi_leap.common.keystone.get_project_name")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
+    @mock.patch("esi_leap.objects.offer.Offer.get_all")
+    def test_get_fields_enriched(self, mock_get_all, mock_gnl, mock_gpn, mock_ga):
+        mock_get_all.return_value = [self.test_offer]
+        mock_ga.return_value = {self.test_offer.uuid: []}
+
+        request = self.get_json("/offers?fields=uuid,availabilities")
+
+        expected_resp = {
+            "offers": [{"uuid": self.test_offer.uuid, "availabilities": []}]
+        }
+        self.assertEqual(expected_resp, request)
+        mock_ga.assert_called_once_with([self.test_offer])
+        mock_gnl.assert_not_called()
+        mock_gpn.assert_not_called()
+
+    @mock.patch("esi_leap.common.ironic.get_cached_node_list")
+    @mock.patch("esi_leap.api.controllers.v1.utils.offer_get_dict_with_added_info")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
+    @mock.patch("esi_leap.objects.offer.Offer.search")
+    def test_search(self, mock_search, mock_gen, mock_ogdwai, mock_gcnl):
+        mock_gcnl.return_value.get_uuids_by_resource_class.return_value = [
+            self.test_offer_drt.resource_uuid
+        ]
+        mock_search.return_value = [self.test_offer_drt]
+        mock_ogdwai.return_value = _get_offer_response(
+            self.test_offer_drt, use_datetime=True
+        )
+        mock_gen.return_value = []
+
+        request = self.get_json(
+            "/offers/search?resource_class=baremetal"
+            "&start_time=2016-07-20T00:00:00&end_time=2016-07-21T00:00:00"
+            "&limit=4"
+        )
+
+        mock_gcnl.return_value.get_uuids_by_resource_class.assert_called_once_with(
+            "baremetal"
+        )
+        mock_search.assert_called_once_with(
+            datetime.datetime(2016, 7, 20),
+            datetime.datetime(2016, 7, 21),
+            resource_type="ironic_node",
+            resource_uuids=[self.test_offer_drt.resource_uuid],
+            lessee_id=None,
+            limit=4,
+            context=self.context,
+        )
+        self.assertEqual(
+            {"offers": [_get_offer_response(self.test_offer_drt)]}, request
+        )
+
+    @mock.patch("esi_leap.api.controllers.v1.utils.offer_get_dict_with_added_info")
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
+    @mock.patch("esi_leap.objects.offer.Offer.search")
+    def test_search_filter_resource_class(self, mock_search, mock_gen, mock_ogdwai):
+        offers = [self.test_offer, self.test_offer_lessee, self.test_offer_2]
+        mock_search.return_value = offers
+        mock_ogdwai.side_effect = [
+            dict(_get_offer_response(o, use_datetime=True), resource_class=rc)
+            for o, rc in zip(offers, ["fake", "other", "fake"])
+        ]
+        mock_gen.return_value = []
+
+        request = self.get_json(
+            "/offers/search?resource_class=fake&resource_type=test_node"
+            "&start_time=2016-07-20T00:00:00&end_time=2016-07-21T00:00:00"
+            "&limit=1&fields=uuid"
+        )
+
+        mock_search.assert_called_once_with(
+            datetime.datetime(2016, 7, 20),
+            datetime.datetime(2016, 7, 21),
+            resource_type="test_node",
+            resource_uuids=None,
+            lessee_id=None,
+            limit=None,
+            context=self.context,
+        )
+        self.assertEqual({"offers": [{"uuid": self.test_offer.uuid}]}, request)
+
+    @mock.patch("esi_leap.objects.offer.Offer.search")
+    def test_search_invalid_time(self, mock_search):
+        request = self.get_json(
+            "/offers/search?start_time=2016-07-21T00:00:00"
+            "&end_time=2016-07-20T00:00:00",
+            expect_errors=True,
+        )
+
+        self.assertEqual(http_client.INTERNAL_SERVER_ERROR, request.status_int)
+        mock_search.assert_not_called()
+
+    @mock.patch("esi_leap.objects.offer.Offer.get_all")
+    def test_get_invalid_fields(self, mock_get_all):
+        request = self.get_json("/offers?fields=bogus", expect_errors=True)
+
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+        mock_get_all.assert_not_called()
+
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
     @mock.patch("esi_leap.api.controllers.v1.utils." "offer_get_dict_with_added_info")
     @mock.patch("esi_leap.objects.offer.Offer.get_all")
     @mock.patch("esi_leap.api.controllers.v1.utils.policy_authorize")
     def test_get_lessee_filter(
-        self, mock_authorize, mock_get_all, mock_ogdwai, mock_gpl, mock_gnl
+        self, mock_authorize, mock_get_all, mock_ogdwai, mock_gnl
     ):
         mock_get_all.return_value = [self.test_offer, self.test_offer_2]
         mock_ogdwai.side_effect = [
@@ -612,7 +753,6 @@ class TestOffersController(test_api_base.APITestCase):
             None,
             exception.HTTPForbidden(rule="esi_leap:offer:get"),
         ]
-        mock_gpl.return_value = []
         mock_gnl.return_value = []
 
         expected_filters = {
@@ -629,7 +769,6 @@ class TestOffersController(test_api_base.APITestCase):
         request = self.get_json("/offers")
 
         mock_get_all.assert_called_once_with(expected_filters, self.context)
-        mock_gpl.assert_called_once()
         mock_gnl.assert_called_once()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
@@ -716,6 +855,105 @@ class TestOffersController(test_api_base.APITestCase):
             mock_lgdwai.assert_called_once()
             self.assertEqual(http_client.CREATED, request.status_int)
 
+    @mock.patch("esi_leap.api.controllers.v1.utils.schedule_lease")
+    @mock.patch("esi_leap.objects.lease.Lease.create_many")
+    @mock.patch("esi_leap.api.controllers.v1.utils.check_offer_lessee")
+    @mock.patch("esi_leap.api.controllers.v1.utils.check_offers_policy_and_retrieve")
+    @mock.patch("esi_leap.api.controllers.v1.utils.lease_get_dict_with_added_info")
+    def test_bulk_claim(
+        self, mock_lgdwai, mock_copar, mock_col, mock_create_many, mock_sl
+    ):
+        offers = [self.test_offer, self.test_offer_with_parent]
+        mock_copar.return_value = offers
+        mock_lgdwai.return_value = {}
+        data = {
+            "offer_uuids": [o.uuid for o in offers],
+            "name": "lease_claim",
+            "start_time": "2016-07-16T19:20:30",
+            "end_time": "2016-08-16T19:20:30",
+        }
+
+        request = self.post_json("/offers/bulk_claim", data)
+
+        mock_copar.assert_called_once_with(
+            self.context,
+            "esi_leap:offer:claim",
+            [o.uuid for o in offers],
+            [statuses.AVAILABLE],
+        )
+        self.assertEqual(2, mock_col.call_count)
+        mock_create_many.assert_called_once()
+        leases = mock_create_many.call_args[0][0]
+        self.assertEqual([o.uuid for o in offers], [le.offer_uuid for le in leases])
+        self.assertEqual(
+            [None, self.test_offer_with_parent.parent_lease_uuid],
+            [le.obj_get_changes().get("parent_lease_uuid") for le in leases],
+        )
+        self.assertEqual(
+            {datetime.datetime(2016, 7, 16, 19, 20, 30)},
+            {le.start_time for le in leases},
+        )
+        self.assertEqual(2, mock_sl.call_count)
+        self.assertEqual(http_client.CREATED, request.status_int)
+        self.assertEqual(2, len(request.json["leases"]))
+
+    @mock.patch("esi_leap.objects.offer.Offer.get_next_lease_start_time")
+    @mock.patch("esi_leap.api.controllers.v1.utils.schedule_lease")
+    @mock.patch("esi_leap.objects.lease.Lease.create_many")
+    @mock.patch("esi_leap.api.controllers.v1.utils.check_offer_lessee")
+    @mock.patch("esi_leap.api.controllers.v1.utils.check_offers_policy_and_retrieve")
+    @mock.patch("esi_leap.api.controllers.v1.utils.lease_get_dict_with_added_info")
+    def test_bulk_claim_default_end_time(
+        self, mock_lgdwai, mock_copar, mock_col, mock_create_many, mock_sl, mock_gnlst
+    ):
+        start_time = datetime.datetime(2016, 7, 16, 19, 20, 30)
+        next_lease = mock.Mock(start_time=start_time + datetime.timedelta(days=2))
+        self.test_offer_with_parent.end_time = start_time + datetime.timedelta(days=3)
+        offers = [self.test_offer, self.test_offer_with_parent, self.test_offer_2]
+        mock_copar.return_value = offers
+        mock_lgdwai.return_value = {}
+        mock_gnlst.side_effect = [None, None, next_lease]
+        data = {
+            "offer_uuids": [o.uuid for o in offers],
+            "start_time": "2016-07-16T19:20:30",
+        }
+
+        self.post_json("/offers/bulk_claim", data)
+
+        # each lease is cut short like a single claim of its offer
+        leases = mock_create_many.call_args[0][0]
+        self.assertEqual(
+            [
+                start_time + datetime.timedelta(days=7),
+                start_time + datetime.timedelta(days=3),
+                start_time + datetime.timedelta(days=2),
+            ],
+            [le.end_time for le in leases],
+        )
+        mock_gnlst.assert_has_calls([mock.call(start_time)] * 3)
+
+    @mock.patch("esi_leap.objects.lease.Lease.create_many")
+    @mock.patch("esi_leap.api.controllers.v1.utils.check_offers_policy_and_retrieve")
+    def test_bulk_claim_empty(self, mock_copar, mock_create_many):
+        data = {"offer_uuids": []}
+
+        request = self.post_json("/offers/bulk_claim", data, expect_errors=True)
+
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+        mock_copar.assert_not_called()
+        mock_create_many.assert_not_called()
+
+    @mock.patch("esi_leap.objects.lease.Lease.create_many")
+    @mock.patch("esi_leap.api.controllers.v1.utils.check_offers_policy_and_retrieve")
+    def test_bulk_claim_duplicate_offer(self, mock_copar, mock_create_many):
+        data = {"offer_uuids": [self.test_offer.uuid, self.test_offer.uuid]}
+
+        request = self.post_json("/offers/bulk_claim", data, expect_errors=True)
+
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+        mock_copar.assert_not_called()
+        mock_create_many.assert_not_called()
+
     @mock.patch("esi_leap.api.controllers.v1.utils." "check_offer_policy_and_retrieve")
     @mock.patch("esi_leap.objects.offer.Offer.cancel")
     def test_delete(self, mock_cancel, mock_copar):
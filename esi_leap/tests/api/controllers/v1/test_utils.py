@@ -18,6 +18,7 @@ from oslo_utils import uuidutils
 
 import testtools
 
+from esi_leap.api.controllers.v1 import lease as lease_api
 from esi_leap.api.controllers.v1 import utils
 from esi_leap.common import exception
 from esi_leap.common import policy
@@ -462,6 +463,41 @@ class TestOfferPolicyAndRetrieveUtils(testtools.TestCase):
         mock_get_offer.assert_called_with("12345", [])
         self.assertEqual(test_offer, offer)
 
+    @mock.patch("esi_leap.api.controllers.v1.utils.resource_policy_authorize")
+    @mock.patch("esi_leap.objects.offer.Offer.get_many")
+    def test_check_offers_policy(self, mock_get_many, mock_authorize):
+        mock_get_many.return_value = [test_offer]
+        target = dict(admin_ctx.to_policy_values())
+        target["offer.project_id"] = test_offer.project_id
+
+        offers = utils.check_offers_policy_and_retrieve(
+            admin_ctx, "test_policy:test", [test_offer.uuid], [statuses.AVAILABLE]
+        )
+
+        mock_get_many.assert_called_once_with([test_offer.uuid])
+        mock_authorize.assert_called_once_with(
+            "test_policy:test",
+            target,
+            admin_ctx.to_policy_values(),
+            "offer",
+            test_offer.uuid,
+        )
+        self.assertEqual([test_offer], offers)
+
+    @mock.patch("esi_leap.api.controllers.v1.utils.resource_policy_authorize")
+    @mock.patch("esi_leap.objects.offer.Offer.get_many")
+    def test_check_offers_policy_not_found(self, mock_get_many, mock_authorize):
+        mock_get_many.return_value = [test_offer]
+
+        self.assertRaises(
+            exception.OfferNotFound,
+            utils.check_offers_policy_and_retrieve,
+            admin_ctx,
+            "test_policy:test",
+            [test_offer.uuid, "missing-uuid"],
+            [],
+        )
+
 
 class TestLeasePolicyAndRetrieveUtils(testtools.TestCase):
     @mock.patch("esi_leap.api.controllers.v1.utils.resource_policy_authorize")
@@ -486,6 +522,43 @@ class TestLeasePolicyAndRetrieveUtils(testtools.TestCase):
         mock_get_lease.assert_called_with("12345", [])
         self.assertEqual(test_lease, lease)
 
+    @mock.patch("esi_leap.api.controllers.v1.utils.resource_policy_authorize")
+    @mock.patch("esi_leap.objects.lease.Lease.get_many")
+    def test_check_leases_policy(self, mock_get_many, mock_authorize):
+        mock_get_many.return_value = [test_lease]
+        target = dict(admin_ctx.to_policy_values())
+        target["lease.owner_id"] = test_lease.owner_id
+        target["lease.project_id"] = test_lease.project_id
+
+        leases = utils.check_leases_policy_and_retrieve(
+            admin_ctx, "test_policy:test", [test_lease.uuid], []
+        )
+
+        mock_get_many.assert_called_once_with([test_lease.uuid])
+        mock_authorize.assert_called_once_with(
+            "test_policy:test",
+            target,
+            admin_ctx.to_policy_values(),
+            "lease",
+            test_lease.uuid,
+        )
+        self.assertEqual([test_lease], leases)
+
+    @mock.patch("esi_leap.api.controllers.v1.utils.resource_policy_authorize")
+    @mock.patch("esi_leap.objects.lease.Lease.get_many")
+    def test_check_leases_policy_wrong_status(self, mock_get_many, mock_authorize):
+        mock_get_many.return_value = [test_lease]
+
+        self.assertRaises(
+            exception.LeaseNotFound,
+            utils.check_leases_policy_and_retrieve,
+            admin_ctx,
+            "test_policy:test",
+            [test_lease.uuid],
+            [statuses.WAIT_CANCEL],
+        )
+        mock_authorize.assert_not_called()
+
 
 class TestOfferLesseeUtils(testtools.TestCase):
     @mock.patch("esi_leap.api.controllers.v1.utils.policy_authorize")
@@ -627,6 +700,21 @@ class TestPolicyAuthorizeUtils(testtools.TestCase):
         )
 
 
+class TestGetResourceNodeListUtils(testtools.TestCase):
+    @mock.patch("esi_leap.common.ironic.get_enrichment_nodes")
+    def test_get_resource_node_list(self, mock_gen):
+        leases = [
+            lease.Lease(resource_type="ironic_node", resource_uuid="node1"),
+            lease.Lease(resource_type="dummy_node", resource_uuid="dummy1"),
+            lease.Lease(resource_type="ironic_node", resource_uuid="node2"),
+        ]
+
+        node_list = utils.get_resource_node_list(leases)
+
+        self.assertEqual(mock_gen.return_value, node_list)
+        self.assertEqual(["node1", "node2"], list(mock_gen.call_args[0][0]))
+
+
 class TestOfferGetDictWithAddedInfoUtils(testtools.TestCase):
     @mock.patch("esi_leap.common.keystone.get_project_name")
     @mock.patch("esi_leap.objects.offer.Offer.get_availabilities")
@@ -668,6 +756,25 @@ class TestOfferGetDictWithAddedInfoUtils(testtools.TestCase):
         self.assertEqual(expected_offer_dict, o_dict)
         self.assertEqual(2, mock_gpn.call_count)
 
+    @mock.patch("esi_leap.objects.offer.Offer.get_availabilities")
+    def test_offer_get_dict_with_added_info_availabilities(
+        self, mock_get_availabilities
+    ):
+        o = offer.Offer(
+            uuid=uuidutils.generate_uuid(),
+            resource_type="test_node",
+            resource_uuid="1234567890",
+            status=statuses.AVAILABLE,
+        )
+        avails = [[datetime.datetime(2016, 7, 16), datetime.datetime(2016, 7, 17)]]
+
+        o_dict = utils.offer_get_dict_with_added_info(
+            o, fields=["availabilities"], availabilities={o.uuid: avails}
+        )
+
+        self.assertEqual(avails, o_dict["availabilities"])
+        mock_get_availabilities.assert_not_called()
+
 
 class TestLeaseGetDictWithAddedInfoUtils(testtools.TestCase):
     def setUp(self):
@@ -706,6 +813,50 @@ class TestLeaseGetDictWithAddedInfoUtils(testtools.TestCase):
         mock_gn.assert_called_once()
         self.assertEqual(expected_output_dict, output_dict)
 
+    @mock.patch("esi_leap.common.keystone.get_project_name")
+    @mock.patch("esi_leap.objects.lease.get_resource_object")
+    def test_lease_get_dict_with_added_info_fields(self, mock_gro, mock_gpn):
+        mock_gpn.return_value = "project-name"
+
+        output_dict = utils.lease_get_dict_with_added_info(
+            self.test_lease, fields=["uuid", "owner"]
+        )
+
+        expected_output_dict = self.test_lease.to_dict()
+        expected_output_dict["owner"] = "project-name"
+
+        mock_gro.assert_not_called()
+        mock_gpn.assert_called_once_with("ownerid")
+        self.assertEqual(expected_output_dict, output_dict)
+
+
+class TestFieldsUtils(testtools.TestCase):
+    def test_validate_fields_none(self):
+        self.assertIsNone(utils.validate_fields(None, lease_api.Lease))
+
+    def test_validate_fields(self):
+        self.assertEqual(
+            ["uuid", "status", "resource"],
+            utils.validate_fields("uuid, status,resource", lease_api.Lease),
+        )
+
+    def test_validate_fields_invalid(self):
+        self.assertRaises(
+            exception.InvalidFields,
+            utils.validate_fields,
+            "uuid,id,availabilities",
+            lease_api.Lease,
+        )
+
+    def test_filter_fields(self):
+        obj_dict = {"uuid": "1234", "status": "active", "project": "p"}
+
+        self.assertEqual(obj_dict, utils.filter_fields(obj_dict, None))
+        self.assertEqual(
+            {"uuid": "1234", "project": "p"},
+            utils.filter_fields(obj_dict, ["uuid", "project"]),
+        )
+
 
 class TestCheckLeaseLength(testtools.TestCase):
     def setUp(self):
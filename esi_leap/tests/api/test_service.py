@@ -0,0 +1,40 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from esi_leap.api import service
+from esi_leap.tests import base
+
+
+class TestAPIService(base.TestCase):
+    @mock.patch.object(service.ironic, "invalidate_node", autospec=True)
+    def test_endpoint_invalidate_node(self, mock_invalidate):
+        service.APIEndpoint().invalidate_node(self.context, "node-uuid")
+
+        mock_invalidate.assert_called_once_with("node-uuid")
+
+    @mock.patch.object(service.notification_utils, "flush", autospec=True)
+    @mock.patch.object(service, "get_rpc_server", autospec=True)
+    @mock.patch.object(service.wsgi, "Server", autospec=True)
+    @mock.patch.object(service.app, "setup_app", autospec=True)
+    def test_start_stop(self, mock_setup_app, mock_server, mock_grs, mock_flush):
+        s = service.WSGIService("esi_leap_api")
+
+        s.start()
+        mock_grs.return_value.start.assert_called_once_with()
+        mock_server.return_value.start.assert_called_once_with()
+
+        s.stop()
+        mock_grs.return_value.stop.assert_called_once_with()
+        mock_server.return_value.stop.assert_called_once_with()
+        mock_flush.assert_called_once_with()
@@ -0,0 +1,49 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from esi_leap.api import wsgi
+from esi_leap.tests import base
+
+
+@mock.patch.object(wsgi.api_service, "get_rpc_server", autospec=True)
+class TestRPCServerApplication(base.TestCase):
+    def setUp(self):
+        super(TestRPCServerApplication, self).setUp()
+        self.app = mock.Mock()
+        self.wsgi_app = wsgi.RPCServerApplication(self.app)
+
+    def test_call(self, mock_grs):
+        self.wsgi_app("environ", "start_response")
+        self.wsgi_app("environ", "start_response")
+
+        mock_grs.assert_called_once_with(executor="threading")
+        mock_grs.return_value.start.assert_called_once_with()
+        self.app.assert_called_with("environ", "start_response")
+        self.assertEqual(2, self.app.call_count)
+
+    @mock.patch.object(wsgi.os, "getpid", autospec=True)
+    def test_call_forked(self, mock_getpid, mock_grs):
+        mock_getpid.return_value = 1
+        self.wsgi_app("environ", "start_response")
+        mock_getpid.return_value = 2
+        self.wsgi_app("environ", "start_response")
+
+        self.assertEqual(2, mock_grs.return_value.start.call_count)
+
+    def test_call_rpc_error(self, mock_grs):
+        mock_grs.return_value.start.side_effect = Exception("bad")
+
+        self.wsgi_app("environ", "start_response")
+
+        self.app.assert_called_once_with("environ", "start_response")
@@ -18,9 +18,12 @@ from oslo_context import context as ctx
 from oslo_db.sqlalchemy import enginefacade
 from oslotest import base
 
+from esi_leap.common import ironic
+from esi_leap.common import keystone
 import esi_leap.conf
 from esi_leap.db import api as db_api
 from esi_leap.db.sqlalchemy import models
+from esi_leap.objects import event as event_obj
 
 
 _DB_CACHE = None
@@ -54,6 +57,11 @@ class TestCase(base.BaseTestCase):
     def setUp(self):
         self.config = self.useFixture(config.Config(lockutils.CONF)).config
         super(TestCase, self).setUp()
+        # send notifications synchronously so tests can check them
+        self.config(async_emit=False, group="notification")
+        self.addCleanup(ironic._node_cache.clear)
+        self.addCleanup(event_obj._event_buffer.clear)
+        self.addCleanup(keystone._project_cache.clear)
 
         if not hasattr(self, "context"):
             self.context = ctx.RequestContext(
@@ -0,0 +1,30 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from esi_leap.common import api_rpcapi
+from esi_leap.tests import base
+
+
+@mock.patch("oslo_messaging.get_rpc_transport")
+@mock.patch("oslo_messaging.RPCClient")
+class TestAPIRPCAPI(base.TestCase):
+    def test_invalidate_node(self, mock_client, mock_transport):
+        api_rpcapi.APIRPCAPI().invalidate_node(self.context, "node-uuid")
+
+        mock_client.return_value.prepare.assert_called_once_with(
+            fanout=True, version="1.0"
+        )
+        mock_client.return_value.prepare.return_value.cast.assert_called_once_with(
+            self.context, "invalidate_node", node_uuid="node-uuid"
+        )
@@ -10,7 +10,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from ironicclient.common.apiclient import exceptions as ir_exception
 import mock
+from oslo_utils import timeutils
 
 from esi_leap.common import ironic
 from esi_leap.tests import base
@@ -24,6 +26,67 @@ class FakeNode(object):
 
 
 class IronicTestCase(base.TestCase):
+    def setUp(self):
+        super(IronicTestCase, self).setUp()
+        for attr in (
+            "_http_session",
+            "_service_auth",
+            "_service_endpoint",
+            "_cached_ironic_client",
+        ):
+            patcher = mock.patch.object(ironic, attr, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(ironic, "_user_clients", {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch.object(ironic.ironic_client, "get_client", autospec=True)
+    @mock.patch.object(ironic.ks_loading, "load_adapter_from_conf_options")
+    @mock.patch.object(ironic.ks_loading, "load_auth_from_conf_options")
+    @mock.patch.object(ironic.ks_loading, "load_session_from_conf_options")
+    def test_get_ironic_client(self, mock_ls, mock_la, mock_lad, mock_gc):
+        client = ironic.get_ironic_client()
+        client_2 = ironic.get_ironic_client()
+
+        self.assertEqual(mock_gc.return_value, client)
+        self.assertEqual(client, client_2)
+        mock_la.assert_called_once_with(ironic.CONF, "ironic")
+        mock_ls.assert_called_once_with(
+            ironic.CONF,
+            "ironic",
+            auth=mock_la.return_value,
+            session=ironic._http_session,
+        )
+        mock_gc.assert_called_once_with(
+            1, session=mock_ls.return_value, os_ironic_api_version="1.65"
+        )
+        adapter = ironic._http_session.get_adapter("https://ironic")
+        self.assertEqual(10, adapter._pool_maxsize)
+
+    @mock.patch.object(ironic.ironic_client, "get_client", autospec=True)
+    @mock.patch.object(ironic.ks_loading, "load_adapter_from_conf_options")
+    @mock.patch.object(ironic.ks_loading, "load_auth_from_conf_options")
+    @mock.patch.object(ironic.ks_loading, "load_session_from_conf_options")
+    def test_get_ironic_client_user(self, mock_ls, mock_la, mock_lad, mock_gc):
+        mock_gc.side_effect = lambda *args, **kwargs: mock.Mock()
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        context = mock.Mock(auth_token="token")
+        context_2 = mock.Mock(auth_token="token-2")
+
+        client = ironic.get_ironic_client(context)
+        self.assertEqual(client, ironic.get_ironic_client(context))
+        self.assertNotEqual(client, ironic.get_ironic_client(context_2))
+        timeutils.advance_time_seconds(61)
+        self.assertNotEqual(client, ironic.get_ironic_client(context))
+
+        # service client plus three user clients
+        self.assertEqual(4, mock_gc.call_count)
+        mock_la.assert_called_once_with(ironic.CONF, "ironic")
+        # expired clients are dropped when a new client is cached
+        self.assertEqual(["token"], list(ironic._user_clients))
+
     @mock.patch.object(ironic, "get_ironic_client", autospec=True)
     def test_get_node(self, mock_ironic):
         fake_node = FakeNode()
@@ -48,6 +111,117 @@ class IronicTestCase(base.TestCase):
 
         self.assertEqual(None, node)
 
+    @mock.patch.object(ironic, "get_ironic_client", autospec=True)
+    def test_get_node_index(self, mock_ironic):
+        fake_node = FakeNode()
+        node_index = ironic.NodeIndex([fake_node])
+
+        self.assertEqual(fake_node, ironic.get_node("uuid", node_index))
+        self.assertEqual(None, ironic.get_node("uuid2", node_index))
+        self.assertEqual("uuid", node_index.get_uuid("name"))
+        self.assertEqual([fake_node], list(node_index))
+        self.assertEqual(["uuid"], node_index.get_uuids_by_resource_class("baremetal"))
+        self.assertEqual([], node_index.get_uuids_by_resource_class("fake"))
+        mock_ironic.assert_not_called()
+
+    @mock.patch.object(ironic, "get_ironic_client", autospec=True)
+    def test_get_node_list_fields(self, mock_ironic):
+        ironic.get_node_list(fields=["uuid"], owner="owner")
+
+        mock_ironic.return_value.node.list.assert_called_once_with(
+            fields=["uuid"], owner="owner"
+        )
+
+    @mock.patch.object(ironic, "get_ironic_client", autospec=True)
+    def test_get_nodes(self, mock_ironic):
+        fake_node = FakeNode()
+        mock_ironic.return_value.node.get.side_effect = lambda uuid, fields: (
+            fake_node if uuid == "uuid" else self.fail("unexpected node")
+        )
+
+        node_index = ironic.get_nodes(["uuid", "uuid"], fields=["uuid"])
+
+        self.assertEqual([fake_node], list(node_index))
+        mock_ironic.return_value.node.get.assert_called_once_with(
+            "uuid", fields=["uuid"]
+        )
+
+    @mock.patch.object(ironic, "get_ironic_client", autospec=True)
+    def test_get_nodes_not_found(self, mock_ironic):
+        mock_ironic.return_value.node.get.side_effect = ir_exception.NotFound
+
+        node_index = ironic.get_nodes(["uuid"])
+
+        self.assertEqual([], list(node_index))
+
+    @mock.patch.object(ironic, "get_cached_node_list", autospec=True)
+    @mock.patch.object(ironic, "get_nodes", autospec=True)
+    def test_get_enrichment_nodes_targeted(self, mock_gn, mock_gcnl):
+        node_index = ironic.get_enrichment_nodes(["uuid1", "uuid2"])
+
+        self.assertEqual(mock_gn.return_value, node_index)
+        mock_gn.assert_called_once_with(
+            {"uuid1", "uuid2"}, fields=ironic.ENRICHMENT_FIELDS
+        )
+        mock_gcnl.assert_not_called()
+
+    @mock.patch.object(ironic, "get_cached_node_list", autospec=True)
+    @mock.patch.object(ironic, "get_nodes", autospec=True)
+    def test_get_enrichment_nodes_inventory(self, mock_gn, mock_gcnl):
+        self.config(max_targeted_node_fetch=1, group="ironic")
+
+        node_index = ironic.get_enrichment_nodes(["uuid1", "uuid2"])
+
+        self.assertEqual(mock_gcnl.return_value, node_index)
+        mock_gn.assert_not_called()
+
+    @mock.patch.object(ironic, "get_ironic_client", autospec=True)
+    def test_get_cached_node_list(self, mock_ironic):
+        fake_node = FakeNode()
+        mock_ironic.return_value.node.list.return_value = [fake_node]
+
+        node_list = ironic.get_cached_node_list()
+        node_list_2 = ironic.get_cached_node_list()
+
+        self.assertEqual([fake_node], list(node_list))
+        self.assertEqual([fake_node], list(node_list_2))
+        mock_ironic.return_value.node.list.assert_called_once_with(
+            fields=ironic.ENRICHMENT_FIELDS
+        )
+
+    @mock.patch.object(ironic, "get_ironic_client", autospec=True)
+    def test_get_cached_node_list_invalidated(self, mock_ironic):
+        fake_node = FakeNode()
+        updated_node = FakeNode()
+        updated_node.name = "new-name"
+        mock_ironic.return_value.node.list.return_value = [fake_node]
+        mock_ironic.return_value.node.get.return_value = updated_node
+
+        ironic.get_cached_node_list()
+        ironic.invalidate_node("uuid")
+        node_list = ironic.get_cached_node_list()
+        node_list_2 = ironic.get_cached_node_list()
+
+        self.assertEqual([updated_node], list(node_list))
+        self.assertEqual([updated_node], list(node_list_2))
+        mock_ironic.return_value.node.list.assert_called_once_with(
+            fields=ironic.ENRICHMENT_FIELDS
+        )
+        mock_ironic.return_value.node.get.assert_called_once_with(
+            "uuid", fields=ironic.ENRICHMENT_FIELDS
+        )
+
+    @mock.patch.object(ironic, "get_ironic_client", autospec=True)
+    def test_get_cached_node_list_invalidated_not_found(self, mock_ironic):
+        mock_ironic.return_value.node.list.return_value = [FakeNode()]
+        mock_ironic.return_value.node.get.side_effect = ir_exception.NotFound
+
+        ironic.get_cached_node_list()
+        ironic.invalidate_node("uuid")
+        node_list = ironic.get_cached_node_list()
+
+        self.assertEqual([], list(node_list))
+
     def test_get_condensed_properties(self):
         properties = {
             "lease_uuid": "12345",
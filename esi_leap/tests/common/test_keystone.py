@@ -10,8 +10,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from keystoneauth1 import exceptions as ks_exceptions
 import mock
+from oslo_utils import timeutils
 
+from esi_leap.common import cache
 from esi_leap.common import exception as e
 from esi_leap.common import keystone
 from esi_leap.tests import base
@@ -21,6 +24,7 @@ class FakeProject(object):
     def __init__(self):
         self.id = "uuid"
         self.name = "name"
+        self.parent_id = None
 
 
 class KeystoneTestCase(base.TestCase):
@@ -43,7 +47,23 @@ class KeystoneTestCase(base.TestCase):
 
         mock_iul.assert_called_once_with("name")
         self.assertEqual("uuid", project_uuid)
-        mock_keystone.return_value.projects.list.assert_called_once_with(name="name")
+        mock_keystone.return_value.projects.list.assert_called_once_with()
+
+    @mock.patch.object(keystone, "get_keystone_client", autospec=True)
+    @mock.patch("oslo_utils.uuidutils.is_uuid_like")
+    def test_get_project_uuid_from_ident_name_not_cached(self, mock_iul, mock_keystone):
+        mock_iul.return_value = False
+        mock_keystone.return_value.projects.list.side_effect = [[], [FakeProject()]]
+
+        project_uuid = keystone.get_project_uuid_from_ident("name")
+        project_uuid_2 = keystone.get_project_uuid_from_ident("name")
+
+        self.assertEqual("uuid", project_uuid)
+        self.assertEqual("uuid", project_uuid_2)
+        mock_keystone.return_value.projects.list.assert_has_calls(
+            [mock.call(), mock.call(name="name")]
+        )
+        self.assertEqual(2, mock_keystone.return_value.projects.list.call_count)
 
     @mock.patch.object(keystone, "get_keystone_client", autospec=True)
     @mock.patch("oslo_utils.uuidutils.is_uuid_like")
@@ -56,7 +76,59 @@ class KeystoneTestCase(base.TestCase):
         )
 
         mock_iul.assert_called_once_with("name")
-        mock_keystone.return_value.projects.list.assert_called_once_with(name="name")
+        mock_keystone.return_value.projects.list.assert_has_calls(
+            [mock.call(), mock.call(name="name")]
+        )
+
+    def _get_project(self, project_id, parent_id=None):
+        project = FakeProject()
+        project.id = project_id
+        project.name = project_id + "-name"
+        project.parent_id = parent_id
+        return project
+
+    @mock.patch.object(keystone, "get_keystone_client", autospec=True)
+    def test_get_parent_project_id_tree(self, mock_keystone):
+        mock_keystone.return_value.projects.list.return_value = [
+            self._get_project("child", "parent"),
+            self._get_project("parent", "grandparent"),
+            self._get_project("grandparent"),
+        ]
+
+        project_ids = keystone.get_parent_project_id_tree("child")
+        project_ids_2 = keystone.get_parent_project_id_tree("child")
+
+        self.assertEqual(["child", "parent", "grandparent"], project_ids)
+        self.assertEqual(project_ids, project_ids_2)
+        mock_keystone.return_value.projects.list.assert_called_once_with()
+        mock_keystone.return_value.projects.get.assert_not_called()
+
+    @mock.patch.object(keystone, "get_keystone_client", autospec=True)
+    def test_get_parent_project_id_tree_not_cached(self, mock_keystone):
+        mock_keystone.return_value.projects.list.return_value = [
+            self._get_project("child", "domain"),
+        ]
+        mock_keystone.return_value.projects.get.return_value = self._get_project(
+            "domain"
+        )
+
+        project_ids = keystone.get_parent_project_id_tree("child")
+
+        self.assertEqual(["child", "domain"], project_ids)
+        mock_keystone.return_value.projects.get.assert_called_once_with("domain")
+
+    @mock.patch.object(keystone, "get_keystone_client", autospec=True)
+    def test_get_parent_project_id_tree_not_found(self, mock_keystone):
+        mock_keystone.return_value.projects.list.return_value = []
+        mock_keystone.return_value.projects.get.side_effect = (
+            keystone.ks_exceptions.NotFound()
+        )
+
+        self.assertRaises(
+            keystone.ks_exceptions.NotFound,
+            keystone.get_parent_project_id_tree,
+            "unknown",
+        )
 
     @mock.patch.object(keystone, "get_keystone_client", autospec=True)
     def test_get_project_name_no_list(self, mock_keystone):
@@ -66,6 +138,30 @@ class KeystoneTestCase(base.TestCase):
 
         self.assertEqual("name", project_name)
 
+    @mock.patch.object(keystone, "get_keystone_client", autospec=True)
+    def test_get_project_name_cached(self, mock_keystone):
+        mock_keystone.return_value.projects.list.return_value = [FakeProject()]
+
+        project_name = keystone.get_project_name("uuid")
+        project_name_2 = keystone.get_project_name("uuid")
+
+        self.assertEqual("name", project_name)
+        self.assertEqual("name", project_name_2)
+        mock_keystone.return_value.projects.list.assert_called_once_with()
+        mock_keystone.return_value.projects.get.assert_not_called()
+
+    @mock.patch.object(keystone, "get_keystone_client", autospec=True)
+    def test_get_project_name_not_found(self, mock_keystone):
+        mock_keystone.return_value.projects.list.return_value = []
+        mock_keystone.return_value.projects.get.side_effect = ks_exceptions.NotFound
+
+        project_name = keystone.get_project_name("12345")
+        project_name_2 = keystone.get_project_name("12345")
+
+        self.assertEqual("", project_name)
+        self.assertEqual("", project_name_2)
+        mock_keystone.return_value.projects.get.assert_called_once_with("12345")
+
     @mock.patch.object(keystone, "get_keystone_client", autospec=True)
     def test_get_project_name_list(self, mock_keystone):
         project_list = [FakeProject()]
@@ -86,3 +182,36 @@ class KeystoneTestCase(base.TestCase):
         project_name = keystone.get_project_name(None, project_list)
 
         self.assertEqual("", project_name)
+
+    @mock.patch.object(cache.threading, "Thread", autospec=True)
+    @mock.patch.object(keystone, "get_keystone_client", autospec=True)
+    def test_project_cache_refresh(self, mock_keystone, mock_thread):
+        old_project = FakeProject()
+        new_project = FakeProject()
+        new_project.name = "new-name"
+        mock_keystone.return_value.projects.list.side_effect = [
+            [old_project],
+            [new_project],
+        ]
+        cache = keystone.ProjectCache()
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+
+        self.assertEqual([old_project], cache.list())
+        timeutils.advance_time_seconds(301)
+
+        # the expired list is served while it is refreshed in the background
+        self.assertEqual([old_project], cache.list())
+        mock_thread.assert_called_once_with(
+            target=cache._background_refresh, daemon=True
+        )
+        mock_thread.return_value.start.assert_called_once_with()
+        self.assertEqual([old_project], cache.list())
+        mock_thread.assert_called_once()
+
+        cache._background_refresh()
+
+        self.assertEqual([new_project], cache.list())
+        self.assertEqual("new-name", cache.get_by_id("uuid").name)
+        self.assertEqual(new_project, cache.get_by_name("new-name"))
+        self.assertEqual(2, mock_keystone.return_value.projects.list.call_count)
@@ -11,6 +11,7 @@
 #    under the License.
 
 import datetime
+import threading
 
 import mock
 from oslo_utils import uuidutils
@@ -19,6 +20,7 @@ from esi_leap.common import notification_utils as notif_utils
 from esi_leap.objects import fields
 from esi_leap.objects import lease as lease_obj
 from esi_leap.resource_objects.fake_node import FakeNode
+from esi_leap.resource_objects import ironic_node
 from esi_leap.tests import base as tests_base
 
 
@@ -77,3 +79,182 @@ class NotifyTestCase(tests_base.TestCase):
         self.assertEqual(self.lease.name, payload.name)
         self.assertEqual(self.lease.uuid, payload.uuid)
         self.assertEqual(self.node.node_name, payload.node_name)
+
+    @mock.patch.object(notif_utils, "_emit_notification")
+    def test_emit_start_notification_sync(self, mock_emit):
+        notif_utils.emit_start_notification(
+            self.context, self.lease, "fulfill", self.crud_notify_obj, node=self.node
+        )
+
+        mock_emit.assert_called_once_with(
+            self.context,
+            mock.ANY,
+            "fulfill",
+            fields.NotificationLevel.INFO,
+            fields.NotificationStatus.START,
+            self.crud_notify_obj,
+            node=mock.ANY,
+        )
+        emitted = mock_emit.call_args[0][1]
+        self.assertIsNot(self.lease, emitted)
+        self.assertEqual(self.lease.uuid, emitted.uuid)
+        node = mock_emit.call_args[1]["node"]
+        self.assertIsInstance(node, notif_utils.NodeSnapshot)
+        self.assertEqual(self.node.get_name(), node.get_name())
+
+    @mock.patch.object(notif_utils, "_emit_notification")
+    def test_emit_notification_node_snapshot(self, mock_emit):
+        self.config(async_emit=True, group="notification")
+        node = mock.Mock()
+        node.get_uuid.return_value = self.node.get_uuid()
+        node.get_name.return_value = "before"
+        node.get_node_provision_state.return_value = "available"
+        node.get_node_power_state.return_value = "power off"
+        node.get_properties.return_value = {"cpu": "40"}
+        emitter = notif_utils.AsyncEmitter()
+        with mock.patch.object(notif_utils, "_emitter", emitter):
+            notif_utils.emit_start_notification(
+                self.context, self.lease, "fulfill", self.crud_notify_obj, node=node
+            )
+            # the caller goes on updating the node
+            node.get_name.return_value = "after"
+            node.get_node_provision_state.return_value = "active"
+            node.get_properties.return_value["lease_uuid"] = self.lease.uuid
+            notif_utils.flush()
+
+        snapshot = mock_emit.call_args[1]["node"]
+        self.assertEqual(self.node.get_uuid(), snapshot._uuid)
+        self.assertEqual("before", snapshot.get_name())
+        self.assertEqual("available", snapshot.get_node_provision_state())
+        self.assertEqual("power off", snapshot.get_node_power_state())
+        self.assertEqual({"cpu": "40"}, snapshot.get_properties())
+
+    @mock.patch("esi_leap.resource_objects.get_resource_object")
+    def test_node_snapshot_not_loaded(self, mock_gro):
+        node = ironic_node.IronicNode("13921c8d-ce11-4b6d-99ed-10e19d184e5f")
+        mock_gro.return_value = self.node
+
+        snapshot = notif_utils.NodeSnapshot(node)
+
+        # the node is only read when the payload is built
+        mock_gro.assert_not_called()
+        self.assertEqual(self.node.get_name(), snapshot.get_name())
+        self.assertEqual("available", snapshot.get_node_provision_state())
+        mock_gro.assert_called_once_with("ironic_node", node.get_uuid())
+
+    @mock.patch.object(notif_utils, "_emit_notification")
+    def test_emit_end_notification_async(self, mock_emit):
+        self.config(async_emit=True, group="notification")
+        emitter = notif_utils.AsyncEmitter()
+        with mock.patch.object(notif_utils, "_emitter", emitter):
+            notif_utils.emit_end_notification(
+                self.context, self.lease, "fulfill", self.crud_notify_obj
+            )
+            notif_utils.flush()
+
+        mock_emit.assert_called_once_with(
+            self.context,
+            mock.ANY,
+            "fulfill",
+            fields.NotificationLevel.INFO,
+            fields.NotificationStatus.END,
+            self.crud_notify_obj,
+        )
+
+    def test_emit_notification_outbox(self):
+        self.config(use_outbox=True, notification_level="info", group="notification")
+        self.config(host="fake-host")
+
+        notif_utils.emit_start_notification(
+            self.context, self.lease, "fulfill", self.crud_notify_obj, node=self.node
+        )
+        notif_utils.emit_end_notification(
+            self.context, self.lease, "fulfill", self.crud_notify_obj, node=self.node
+        )
+
+        self.lease_notify_mock.return_value.emit.assert_not_called()
+        entries = notif_utils.pop_outbox_entries(self.lease)
+        self.assertEqual(
+            [
+                self.lease_notify_mock.return_value.get_outbox_entry.return_value,
+                self.lease_notify_mock.return_value.get_outbox_entry.return_value,
+            ],
+            entries,
+        )
+        self.assertEqual([], notif_utils.pop_outbox_entries(self.lease))
+
+    @mock.patch("esi_leap.objects.event.flush_events")
+    @mock.patch.object(notif_utils, "_emitter")
+    def test_flush(self, mock_emitter, mock_flush_events):
+        notif_utils.flush()
+
+        mock_emitter.flush.assert_called_once()
+        mock_flush_events.assert_called_once()
+
+
+class AsyncEmitterTestCase(tests_base.TestCase):
+    def setUp(self):
+        super(AsyncEmitterTestCase, self).setUp()
+        self.config(async_emit=True, group="notification")
+        self.emitter = notif_utils.AsyncEmitter()
+
+    def test_submit(self):
+        func = mock.Mock()
+
+        self.emitter.submit(func, "a", b="c")
+        self.emitter.flush()
+
+        func.assert_called_once_with("a", b="c")
+        self.assertNotEqual(threading.current_thread(), self.emitter._thread)
+
+    def test_submit_in_order(self):
+        calls = []
+
+        for i in range(5):
+            self.emitter.submit(calls.append, i)
+        self.emitter.flush()
+
+        self.assertEqual([0, 1, 2, 3, 4], calls)
+
+    def test_submit_error(self):
+        func = mock.Mock(side_effect=[Exception("boom"), None])
+
+        self.emitter.submit(func, 1)
+        self.emitter.submit(func, 2)
+        self.emitter.flush()
+
+        func.assert_has_calls([mock.call(1), mock.call(2)])
+
+    def test_submit_disabled(self):
+        self.config(async_emit=False, group="notification")
+        func = mock.Mock()
+
+        self.emitter.submit(func, "a")
+
+        func.assert_called_once_with("a")
+        self.assertIsNone(self.emitter._thread)
+
+    def test_submit_queue_full(self):
+        self.config(emit_queue_size=1, group="notification")
+        release = threading.Event()
+        started = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(10)
+
+        func = mock.Mock()
+        self.emitter.submit(block)
+        started.wait(10)
+        self.emitter.submit(func, "queued")
+        self.emitter.submit(func, "inline")
+
+        func.assert_called_once_with("inline")
+        release.set()
+        self.emitter.flush()
+        func.assert_has_calls([mock.call("inline"), mock.call("queued")])
+
+    def test_flush_empty(self):
+        self.emitter.flush()
+
+        self.assertIsNone(self.emitter._thread)
@@ -13,8 +13,10 @@
 import datetime
 import mock
 
+from oslo_db.sqlalchemy import enginefacade
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
+import sqlalchemy as sa
 
 from esi_leap.common import exception as e
 from esi_leap.common import statuses
@@ -236,6 +238,33 @@ test_cat_2 = dict(
 )
 
 
+def _archived_events():
+    query = api.model_query(api.models.EventArchive)
+    return query.order_by(api.models.EventArchive.archive_id).all()
+
+
+def _history(model):
+    query = api.model_query(model)
+    return [row.uuid for row in query.order_by(model.id, model.history_id)]
+
+
+def _outbox_entry(event_type):
+    return {
+        "message": {
+            "publisher_id": "esi-leap-manager.host",
+            "event_type": event_type,
+            "priority": "info",
+            "payload": {"esi_leap_object.data": {"uuid": "11111"}},
+        },
+        "event": {
+            "event_type": event_type,
+            "event_time": now,
+            "object_type": "lease",
+            "object_uuid": "11111",
+        },
+    }
+
+
 class TestOfferAPI(base.DBTestCase):
     def test_offer_create(self):
         offer = api.offer_create(test_offer_1)
@@ -243,6 +272,13 @@ class TestOfferAPI(base.DBTestCase):
         assert len(o) == 1
         assert o[0].to_dict() == offer.to_dict()
 
+    def test_offer_create_many(self):
+        res = api.offer_create_many([test_offer_1, test_offer_5])
+
+        self.assertEqual(["11111", "55555"], [o.uuid for o in res])
+        self.assertEqual(2, len(api.offer_get_all({}).all()))
+        self.assertEqual([], api.busy_interval_check())
+
     def test_offer_verify_availability(self):
         offer = api.offer_create(test_offer_1)
 
@@ -404,6 +440,63 @@ class TestOfferAPI(base.DBTestCase):
         end = now + datetime.timedelta(days=87)
         api.offer_verify_availability(offer, start, end)
 
+    def test_offer_verify_availability_many(self):
+        o1 = api.offer_create(test_offer_1)
+        o2 = api.offer_create(dict(test_offer_2, resource_uuid="2222"))
+        api.lease_create(dict(test_lease_1, offer_uuid=o1.uuid))
+
+        api.offer_verify_availability_many([])
+        api.offer_verify_availability_many(
+            [
+                (
+                    o1,
+                    now + datetime.timedelta(days=30),
+                    now + datetime.timedelta(days=40),
+                ),
+                (
+                    o2,
+                    now + datetime.timedelta(days=30),
+                    now + datetime.timedelta(days=40),
+                ),
+            ]
+        )
+
+        # conflicts with a lease on the first offer
+        self.assertRaises(
+            e.OfferNoTimeAvailabilities,
+            api.offer_verify_availability_many,
+            [
+                (
+                    o2,
+                    now + datetime.timedelta(days=30),
+                    now + datetime.timedelta(days=40),
+                ),
+                (
+                    o1,
+                    now + datetime.timedelta(days=15),
+                    now + datetime.timedelta(days=16),
+                ),
+            ],
+        )
+
+        # outside of the second offer's time range
+        self.assertRaises(
+            e.OfferNoTimeAvailabilities,
+            api.offer_verify_availability_many,
+            [
+                (
+                    o1,
+                    now + datetime.timedelta(days=30),
+                    now + datetime.timedelta(days=40),
+                ),
+                (
+                    o2,
+                    now + datetime.timedelta(days=5),
+                    now + datetime.timedelta(days=30),
+                ),
+            ],
+        )
+
     def test_offer_get_conflict_times(self):
         o1 = api.offer_create(test_offer_1)
         self.assertEqual(api.offer_get_conflict_times(o1), [])
@@ -418,6 +511,113 @@ class TestOfferAPI(base.DBTestCase):
             [(now + datetime.timedelta(days=50), now + datetime.timedelta(days=60))],
         )
 
+    def test_offer_get_conflict_times_many(self):
+        o1 = api.offer_create(test_offer_1)
+        o2 = api.offer_create(test_offer_2)
+        self.assertEqual(api.offer_get_conflict_times_many([]), [])
+        self.assertEqual(api.offer_get_conflict_times_many([o1.uuid, o2.uuid]), [])
+        api.lease_create(dict(test_lease_3, offer_uuid=o2.uuid))
+        api.lease_create(dict(test_lease_4, offer_uuid=o1.uuid))
+        api.lease_create(
+            dict(
+                test_lease_5,
+                offer_uuid=o1.uuid,
+                status=statuses.CREATED,
+            )
+        )
+        api.lease_create(
+            dict(
+                test_lease_6,
+                offer_uuid=o1.uuid,
+                start_time=now + datetime.timedelta(days=10),
+                end_time=now + datetime.timedelta(days=20),
+                status=statuses.ACTIVE,
+            )
+        )
+
+        self.assertEqual(
+            api.offer_get_conflict_times_many([o1.uuid, o2.uuid]),
+            [
+                (
+                    o1.uuid,
+                    now + datetime.timedelta(days=10),
+                    now + datetime.timedelta(days=20),
+                ),
+                (
+                    o1.uuid,
+                    now + datetime.timedelta(days=90),
+                    now + datetime.timedelta(days=100),
+                ),
+                (
+                    o2.uuid,
+                    now + datetime.timedelta(days=50),
+                    now + datetime.timedelta(days=60),
+                ),
+            ],
+        )
+        self.assertEqual(
+            [row[0] for row in api.offer_get_conflict_times_many([o2.uuid])],
+            [o2.uuid],
+        )
+
+    @mock.patch("esi_leap.common.keystone.get_parent_project_id_tree")
+    def test_offer_search(self, mock_gppit):
+        mock_gppit.return_value = ["12345"]
+
+        def _offer(uuid, resource_uuid, start_days, end_days, **kwargs):
+            values = dict(
+                test_offer_1,
+                uuid=uuid,
+                resource_uuid=resource_uuid,
+                start_time=now + datetime.timedelta(days=start_days),
+                end_time=now + datetime.timedelta(days=end_days),
+            )
+            values.update(kwargs)
+            return api.offer_create(values)
+
+        start = now + datetime.timedelta(days=10)
+        end = now + datetime.timedelta(days=20)
+
+        long_offer = _offer("o-long", "r1", 0, 100)
+        tight_offer = _offer("o-tight", "r2", 5, 30)
+        late_offer = _offer("o-late", "r3", 9, 30)
+        _offer("o-short", "r4", 12, 30)
+        _offer("o-deleted", "r5", 0, 100, status=statuses.DELETED)
+        _offer("o-other-lessee", "r6", 0, 100, lessee_id="67890")
+        leased_offer = _offer("o-leased", "r7", 0, 100)
+        api.lease_create(
+            dict(
+                test_lease_1,
+                uuid="l-leased",
+                resource_uuid="r7",
+                offer_uuid=leased_offer.uuid,
+            )
+        )
+        api.lease_create(
+            dict(
+                test_lease_1,
+                uuid="l-deleted",
+                resource_uuid="r1",
+                offer_uuid=long_offer.uuid,
+                status=statuses.DELETED,
+            )
+        )
+
+        offers = api.offer_search(start, end, lessee_id="12345")
+        self.assertEqual(
+            [late_offer.uuid, tight_offer.uuid, long_offer.uuid],
+            [o.uuid for o in offers],
+        )
+
+        offers = api.offer_search(start, end, lessee_id="12345", limit=2)
+        self.assertEqual([late_offer.uuid, tight_offer.uuid], [o.uuid for o in offers])
+
+        offers = api.offer_search(start, end, resource_uuids=["r1", "r6", "r7"])
+        self.assertEqual([long_offer.uuid, "o-other-lessee"], [o.uuid for o in offers])
+
+        offers = api.offer_search(start, end, resource_type="ironic_node")
+        self.assertEqual([], offers.all())
+
     def test_offer_get_next_lease_start_time(self):
         o1 = api.offer_create(test_offer_1)
         self.assertEqual(
@@ -446,6 +646,14 @@ class TestOfferAPI(base.DBTestCase):
     def test_offer_get_by_uuid_not_found(self):
         assert api.offer_get_by_uuid("some_uuid") is None
 
+    def test_offer_get_by_uuids(self):
+        o1 = api.offer_create(test_offer_1)
+        o2 = api.offer_create(test_offer_2)
+        api.offer_create(test_offer_3)
+
+        res = api.offer_get_by_uuids([o1.uuid, o2.uuid, "some_uuid"])
+        self.assertEqual({o1.uuid, o2.uuid}, {o.uuid for o in res})
+
     def test_offer_get_by_name(self):
         o1 = api.offer_create(test_offer_1)
         o2 = api.offer_create(test_offer_2)
@@ -557,6 +765,72 @@ class TestOfferAPI(base.DBTestCase):
             (res[0].to_dict(), res[1].to_dict(), res[2].to_dict(), res[3].to_dict()),
         )
 
+    def test_offer_get_all_due_for_expiry(self):
+        api.offer_create(test_offer_1)
+        api.offer_create(test_offer_2)
+        api.offer_create(test_offer_5)
+        api.offer_create(dict(test_offer_4, status=statuses.EXPIRED))
+
+        res = api.offer_get_all_due_for_expiry(now + datetime.timedelta(days=120))
+
+        self.assertEqual(
+            [test_offer_1["uuid"], test_offer_2["uuid"]], [o.uuid for o in res]
+        )
+
+    def test_offer_get_all_availability_filter(self):
+        o1 = api.offer_create(test_offer_1)
+        o2 = api.offer_create(test_offer_2)
+        api.offer_create(test_offer_3)
+        o4 = api.offer_create(test_offer_4)
+
+        api.lease_create(dict(test_lease_1, offer_uuid=o1.uuid))
+        api.lease_create(dict(test_lease_4, offer_uuid=o2.uuid))
+        api.lease_create(dict(test_lease_3, offer_uuid=o4.uuid))
+
+        res = api.offer_get_all(
+            {
+                "available_start_time": now + datetime.timedelta(days=80),
+                "available_end_time": now + datetime.timedelta(days=90),
+            }
+        )
+
+        self.assertEqual(4, res.count())
+
+        res = api.offer_get_all(
+            {
+                "available_start_time": now + datetime.timedelta(days=15),
+                "available_end_time": now + datetime.timedelta(days=40),
+            }
+        )
+
+        self.assertEqual([], res.all())
+
+        res = api.offer_get_all(
+            {
+                "available_start_time": now + datetime.timedelta(days=26),
+                "available_end_time": now + datetime.timedelta(days=40),
+            }
+        )
+
+        self.assertEqual([o1.to_dict(), o2.to_dict()], [o.to_dict() for o in res])
+
+    def test_offer_get_all_availability_filter_wait_cancel(self):
+        o1 = api.offer_create(test_offer_1)
+        api.lease_create(
+            dict(test_lease_1, offer_uuid=o1.uuid, status=statuses.WAIT_CANCEL)
+        )
+
+        res = api.offer_get_all(
+            {
+                "available_start_time": now + datetime.timedelta(days=12),
+                "available_end_time": now + datetime.timedelta(days=15),
+            }
+        )
+
+        # the lease still holds the offer until it is cancelled
+        self.assertEqual([], res.all())
+        self.assertEqual([], api.busy_interval_check())
+
 
 class TestLeaseAPI(base.DBTestCase):
     def test_lease_get_by_uuid(self):
@@ -607,6 +881,104 @@ class TestLeaseAPI(base.DBTestCase):
         self.assertIn(test_lease_1["uuid"], res_uuids)
         self.assertIn(test_lease_2["uuid"], res_uuids)
 
+    def test_lease_get_all_paginate(self):
+        api.lease_create(test_lease_1)
+        api.lease_create(test_lease_2)
+        api.lease_create(test_lease_3)
+
+        res = api.lease_get_all({"limit": 2})
+        self.assertEqual(
+            [test_lease_1["uuid"], test_lease_2["uuid"]], [lease.uuid for lease in res]
+        )
+
+        res = api.lease_get_all({"limit": 2, "marker": test_lease_2["uuid"]})
+        self.assertEqual([test_lease_3["uuid"]], [lease.uuid for lease in res])
+
+    def test_lease_get_all_paginate_invalid_marker(self):
+        api.lease_create(test_lease_1)
+
+        self.assertRaises(e.InvalidMarker, api.lease_get_all, {"marker": "none"})
+
+    def test_lease_get_all_due_for_fulfillment(self):
+        api.lease_create(test_lease_1)
+        api.lease_create(test_lease_2)
+        api.lease_create(test_lease_3)
+        api.lease_create(test_lease_7)
+
+        res = api.lease_get_all_due_for_fulfillment(now + datetime.timedelta(days=15))
+
+        self.assertEqual([test_lease_1["uuid"]], [lease.uuid for lease in res])
+
+    def test_lease_get_all_due_for_expiry(self):
+        api.lease_create(test_lease_1)
+        api.lease_create(test_lease_2)
+        api.lease_create(test_lease_3)
+        api.lease_create(test_lease_5)
+        api.lease_create(test_lease_7)
+
+        res = api.lease_get_all_due_for_expiry(now + datetime.timedelta(days=25))
+
+        self.assertEqual(
+            [test_lease_1["uuid"], test_lease_7["uuid"]], [lease.uuid for lease in res]
+        )
+
+    def _create_lease_tree(self):
+        o1 = api.offer_create(test_offer_1)
+        l1 = api.lease_create(dict(test_lease_1, uuid="l1", offer_uuid=o1.uuid))
+        api.lease_create(dict(test_lease_2, uuid="l2", parent_lease_uuid=l1.uuid))
+        o2 = api.offer_create(dict(test_offer_2, uuid="o2", parent_lease_uuid=l1.uuid))
+        l3 = api.lease_create(
+            dict(
+                test_lease_3,
+                uuid="l3",
+                offer_uuid=o2.uuid,
+                parent_lease_uuid=l1.uuid,
+            )
+        )
+        o3 = api.offer_create(dict(test_offer_3, uuid="o3", parent_lease_uuid=l3.uuid))
+        api.lease_create(
+            dict(
+                test_lease_4,
+                uuid="l4",
+                offer_uuid=o3.uuid,
+                parent_lease_uuid=l3.uuid,
+                status=statuses.EXPIRED,
+            )
+        )
+        api.offer_create(
+            dict(
+                test_offer_4,
+                uuid="o4",
+                parent_lease_uuid=l1.uuid,
+                status=statuses.DELETED,
+            )
+        )
+        api.lease_create(dict(test_lease_5, uuid="l5"))
+
+    def test_lease_get_descendants(self):
+        self._create_lease_tree()
+
+        leases, offers = api.lease_get_descendants("l1")
+
+        self.assertEqual(["l2", "l3"], [lease.uuid for lease in leases])
+        self.assertEqual(["o2", "o3"], [offer.uuid for offer in offers])
+
+    def test_lease_get_descendants_leaf(self):
+        self._create_lease_tree()
+
+        leases, offers = api.lease_get_descendants("l2")
+
+        self.assertEqual([], leases)
+        self.assertEqual([], offers)
+
+    def test_offer_get_descendants(self):
+        self._create_lease_tree()
+
+        leases, offers = api.offer_get_descendants(test_offer_1["uuid"])
+
+        self.assertEqual(["l1", "l2", "l3"], [lease.uuid for lease in leases])
+        self.assertEqual(["o2", "o3"], [offer.uuid for offer in offers])
+
     def test_lease_get_all_filter_by_status(self):
         api.lease_create(test_lease_1)
         api.lease_create(test_lease_2)
@@ -682,6 +1054,77 @@ class TestLeaseAPI(base.DBTestCase):
         assert len(l2) == 1
         assert l2[0].to_dict() == l1.to_dict()
 
+    def test_lease_create_many(self):
+        o1 = api.offer_create(test_offer_1)
+        o2 = api.offer_create(dict(test_offer_2, resource_uuid="2222"))
+        values_list = [
+            dict(test_lease_1, offer_uuid=o1.uuid),
+            dict(test_lease_2, offer_uuid=o2.uuid, resource_uuid="2222"),
+        ]
+
+        res = api.lease_create_many(values_list)
+
+        self.assertEqual(["11111", "22222"], [lease.uuid for lease in res])
+        self.assertEqual(2, len(api.lease_get_all({}).all()))
+        self.assertEqual([], api.busy_interval_check())
+
+    def test_lease_get_by_uuids(self):
+        l1 = api.lease_create(test_lease_1)
+        api.lease_create(test_lease_2)
+
+        res = api.lease_get_by_uuids([l1.uuid, "some_uuid"])
+        self.assertEqual([l1.uuid], [lease.uuid for lease in res])
+
+    def test_lease_update_many(self):
+        l1 = api.lease_create(test_lease_1)
+        l2 = api.lease_create(test_lease_2)
+        l3 = api.lease_create(test_lease_4)
+        end = now + datetime.timedelta(days=40)
+
+        res = api.lease_update_many(
+            [l1.uuid, l2.uuid, l3.uuid],
+            {"end_time": end},
+            [statuses.CREATED],
+        )
+
+        self.assertEqual({l1.uuid, l2.uuid}, set(res))
+        self.assertEqual(end, api.lease_get_by_uuid(l1.uuid).end_time)
+        self.assertEqual(
+            test_lease_4["end_time"], api.lease_get_by_uuid(l3.uuid).end_time
+        )
+        self.assertEqual([], api.busy_interval_check())
+
+        res = api.lease_update_many([l1.uuid], {"status": statuses.WAIT_CANCEL})
+
+        self.assertEqual([l1.uuid], res)
+        self.assertEqual(statuses.WAIT_CANCEL, api.lease_get_by_uuid(l1.uuid).status)
+        self.assertEqual([], api.busy_interval_check())
+        self.assertEqual([], api.lease_update_many(["some_uuid"], {}))
+
+    def test_lease_update_many_wait_cancel(self):
+        l1 = api.lease_create(test_lease_1)
+        l2 = api.lease_create(dict(test_lease_2, status=statuses.ERROR))
+
+        api.lease_update_many([l1.uuid, l2.uuid], {"status": statuses.WAIT_CANCEL})
+
+        # the resource stays busy until the manager cancels the leases
+        self.assertEqual([], api.busy_interval_check())
+        self.assertRaises(
+            e.ResourceTimeConflict,
+            api.resource_verify_availability,
+            "dummy_node",
+            "1111",
+            l1.start_time,
+            l2.end_time,
+        )
+
+        api.lease_update(l1.uuid, {"status": statuses.DELETED})
+        api.lease_update(l2.uuid, {"status": statuses.DELETED})
+        self.assertEqual([], api.busy_interval_check())
+        api.resource_verify_availability(
+            "dummy_node", "1111", l1.start_time, l2.end_time
+        )
+
     def test_lease_update(self):
         o1 = api.offer_create(test_offer_2)
         test_lease_4["offer_uuid"] = o1.uuid
@@ -695,6 +1138,37 @@ class TestLeaseAPI(base.DBTestCase):
         self.assertEqual(test_lease_5["start_time"], l1.start_time)
         self.assertEqual(test_lease_5["end_time"], l1.end_time)
 
+    def test_lease_update_outbox(self):
+        o1 = api.offer_create(test_offer_2)
+        test_lease_4["offer_uuid"] = o1.uuid
+        l1 = api.lease_create(test_lease_4)
+        entry = _outbox_entry("esi_leap.lease.fulfill.end")
+
+        api.lease_update(l1.uuid, {"status": statuses.ACTIVE}, outbox=[entry])
+
+        self.assertEqual(statuses.ACTIVE, api.lease_get_by_uuid(l1.uuid).status)
+        events = api.event_get_all({}).all()
+        self.assertEqual(["esi_leap.lease.fulfill.end"], [e.event_type for e in events])
+        messages = api.outbox_get_undelivered(10)
+        self.assertEqual([entry["message"]["payload"]], [m.payload for m in messages])
+
+    def test_lease_update_outbox_rollback(self):
+        o1 = api.offer_create(test_offer_2)
+        test_lease_4["offer_uuid"] = o1.uuid
+        l1 = api.lease_create(test_lease_4)
+        values = {"start_time": now + datetime.timedelta(days=101), "end_time": now}
+
+        self.assertRaises(
+            e.InvalidTimeRange,
+            api.lease_update,
+            l1.uuid,
+            values,
+            outbox=[_outbox_entry("esi_leap.lease.fulfill.end")],
+        )
+
+        self.assertEqual([], api.event_get_all({}).all())
+        self.assertEqual([], api.outbox_get_undelivered(10))
+
     def test_lease_update_invalid_time(self):
         o1 = api.offer_create(test_offer_3)
         test_lease_4["offer_uuid"] = o1.uuid
@@ -907,6 +1381,63 @@ class TestResourceVerifyAvailabilityAPI(base.DBTestCase):
             end,
         )
 
+    def test_resource_get_conflicts_many(self):
+        api.offer_create(test_offer_4)
+        lease = api.lease_create(dict(test_lease_3, status=statuses.ACTIVE))
+        api.offer_create(
+            dict(
+                test_offer_5,
+                parent_lease_uuid=lease.uuid,
+                start_time=test_lease_3["start_time"],
+                end_time=test_lease_3["start_time"] + datetime.timedelta(days=2),
+            )
+        )
+
+        self.assertEqual([], api.resource_get_conflicts_many([]))
+        claims = [
+            # overlaps the offer on the resource
+            (
+                "dummy_node",
+                "1111",
+                None,
+                now + datetime.timedelta(days=80),
+                now + datetime.timedelta(days=85),
+            ),
+            # free time on the resource
+            (
+                "dummy_node",
+                "1111",
+                None,
+                now + datetime.timedelta(days=101),
+                now + datetime.timedelta(days=102),
+            ),
+            # another resource
+            (
+                "dummy_node",
+                "2222",
+                None,
+                now + datetime.timedelta(days=80),
+                now + datetime.timedelta(days=85),
+            ),
+            # overlaps the existing child offer of the lease
+            (
+                "dummy_node",
+                "1111",
+                lease.uuid,
+                test_lease_3["start_time"],
+                test_lease_3["start_time"] + datetime.timedelta(days=1),
+            ),
+            # free time within the lease
+            (
+                "dummy_node",
+                "1111",
+                lease.uuid,
+                test_lease_3["start_time"] + datetime.timedelta(days=5),
+                test_lease_3["end_time"],
+            ),
+        ]
+        self.assertEqual([0, 3], api.resource_get_conflicts_many(claims))
+
     def test_resource_verify_availability_lease_conflict(self):
         test_lease = api.lease_create(test_lease_1)
         r_type = test_lease.resource_type
@@ -961,6 +1492,377 @@ class TestResourceVerifyAvailabilityAPI(base.DBTestCase):
         )
 
 
+class TestBusyIntervalAPI(base.DBTestCase):
+    def _intervals(self):
+        return {
+            (i.object_type, i.object_uuid): (i.start_time, i.end_time)
+            for i in api.model_query(api.models.BusyInterval)
+        }
+
+    def test_busy_interval_offer(self):
+        offer = api.offer_create(test_offer_1)
+        self.assertEqual(
+            {("offer", offer.uuid): (offer.start_time, offer.end_time)},
+            self._intervals(),
+        )
+
+        end = now + datetime.timedelta(days=50)
+        api.offer_update(offer.uuid, {"end_time": end})
+        self.assertEqual(
+            {("offer", offer.uuid): (offer.start_time, end)}, self._intervals()
+        )
+
+        api.offer_update(offer.uuid, {"status": statuses.DELETED})
+        self.assertEqual({}, self._intervals())
+
+    def test_busy_interval_lease(self):
+        offer = api.offer_create(test_offer_1)
+        lease = api.lease_create(dict(test_lease_1, offer_uuid=offer.uuid))
+        self.assertEqual(
+            (lease.start_time, lease.end_time),
+            self._intervals()[("lease", lease.uuid)],
+        )
+        self.assertRaises(
+            e.OfferNoTimeAvailabilities,
+            api.offer_verify_availability,
+            offer,
+            lease.start_time,
+            lease.end_time,
+        )
+
+        api.lease_update(lease.uuid, {"status": statuses.EXPIRED})
+        self.assertNotIn(("lease", lease.uuid), self._intervals())
+        api.offer_verify_availability(offer, lease.start_time, lease.end_time)
+
+    def test_busy_interval_destroy(self):
+        offer = api.offer_create(test_offer_1)
+        api.offer_destroy(offer.uuid)
+        self.assertEqual({}, self._intervals())
+
+    def test_busy_interval_check(self):
+        offer = api.offer_create(test_offer_1)
+        lease = api.lease_create(test_lease_1)
+        self.assertEqual([], api.busy_interval_check())
+
+        with api._session_for_write() as session:
+            session.query(api.models.BusyInterval).filter_by(
+                object_type="offer", object_uuid=offer.uuid
+            ).update({"end_time": now})
+            session.query(api.models.BusyInterval).filter_by(
+                object_type="lease", object_uuid=lease.uuid
+            ).delete()
+            stale = api.models.BusyInterval()
+            stale.update(
+                {
+                    "object_type": "lease",
+                    "object_uuid": "stale-uuid",
+                    "resource_type": "dummy_node",
+                    "resource_uuid": "1111",
+                    "start_time": now,
+                    "end_time": now + datetime.timedelta(days=1),
+                }
+            )
+            session.add(stale)
+
+        self.assertEqual(
+            [
+                ("lease", lease.uuid, "missing"),
+                ("lease", "stale-uuid", "stale"),
+                ("offer", offer.uuid, "mismatch"),
+            ],
+            api.busy_interval_check(),
+        )
+
+        self.assertEqual(2, api.busy_interval_rebuild())
+        self.assertEqual([], api.busy_interval_check())
+        self.assertEqual(
+            {
+                ("offer", offer.uuid): (offer.start_time, offer.end_time),
+                ("lease", lease.uuid): (lease.start_time, lease.end_time),
+            },
+            self._intervals(),
+        )
+
+
+class TestConflictQueryIndexes(base.DBTestCase):
+    def _query_plans(self, func, *args):
+        statements = []
+
+        def _capture(conn, cursor, statement, parameters, context, executemany):
+            # skip connection pings, which select without a FROM clause
+            if statement.startswith(("SELECT", "WITH")) and "FROM" in statement:
+                statements.append((statement, parameters))
+
+        engine = enginefacade.writer.get_engine()
+        sa.event.listen(engine, "before_cursor_execute", _capture)
+        try:
+            func(*args)
+        finally:
+            sa.event.remove(engine, "before_cursor_execute", _capture)
+
+        plans = []
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                rows = conn.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement, parameters
+                ).fetchall()
+                plans.append(" ".join(row[-1] for row in rows))
+        return plans
+
+    def test_resource_verify_availability_uses_indexes(self):
+        plans = self._query_plans(
+            api.resource_verify_availability,
+            "dummy_node",
+            "1111",
+            now,
+            now + datetime.timedelta(days=1),
+        )
+
+        self.assertEqual(1, len(plans))
+        self.assertIn("busy_interval_resource_time_idx", plans[0])
+
+    def test_offer_verify_availability_uses_indexes(self):
+        offer = api.offer_create(test_offer_1)
+
+        plans = self._query_plans(
+            api.offer_verify_availability,
+            offer,
+            now,
+            now + datetime.timedelta(days=1),
+        )
+
+        self.assertEqual(1, len(plans))
+        self.assertIn("busy_interval_offer_time_idx", plans[0])
+
+    def test_lease_verify_child_availability_uses_indexes(self):
+        lease = api.lease_create(test_lease_1)
+
+        plans = self._query_plans(
+            api.lease_verify_child_availability,
+            lease,
+            lease.start_time,
+            lease.end_time,
+        )
+
+        self.assertEqual(1, len(plans))
+        self.assertIn("busy_interval_parent_lease_time_idx", plans[0])
+
+    def test_offer_get_all_availability_uses_indexes(self):
+        plans = self._query_plans(
+            lambda: api.offer_get_all(
+                {
+                    "available_start_time": now,
+                    "available_end_time": now + datetime.timedelta(days=1),
+                }
+            ).all()
+        )
+
+        self.assertEqual(1, len(plans))
+        self.assertIn("lease_offer_status_time_idx", plans[0])
+
+    def test_lease_get_descendants_uses_indexes(self):
+        plans = self._query_plans(api.lease_get_descendants, "11111")
+
+        self.assertEqual(2, len(plans))
+        self.assertIn("lease_parent_lease_status_time_idx", plans[0])
+        self.assertIn("offer_parent_lease_status_time_idx", plans[1])
+
+    def test_lease_get_all_resource_uses_indexes(self):
+        plans = self._query_plans(
+            lambda: api.lease_get_all(
+                {"resource_type": "dummy_node", "resource_uuid": "1111"}
+            ).all()
+        )
+
+        self.assertEqual(1, len(plans))
+        self.assertIn("lease_resource_idx", plans[0])
+
+    def test_resource_indexes_dropped(self):
+        indexes = [
+            index.name
+            for table in (api.models.Offer.__table__, api.models.Lease.__table__)
+            for index in table.indexes
+        ]
+
+        self.assertNotIn("offer_resource_status_time_idx", indexes)
+        self.assertNotIn("lease_resource_status_time_idx", indexes)
+
+
+class TestHistoryAPI(base.DBTestCase):
+    def setUp(self):
+        super(TestHistoryAPI, self).setUp()
+        self.before = timeutils.utcnow() + datetime.timedelta(days=1)
+
+    def test_lease_archive(self):
+        api.lease_create(test_lease_3)
+        api.lease_create(test_lease_4)
+        api.lease_create(test_lease_5)
+        with api._session_for_write() as session:
+            # leave a busy interval behind for the expired lease
+            interval = api.models.BusyInterval()
+            interval.update(
+                {
+                    "object_type": "lease",
+                    "object_uuid": test_lease_5["uuid"],
+                    "resource_type": "dummy_node",
+                    "resource_uuid": "1111",
+                    "start_time": now,
+                    "end_time": now + datetime.timedelta(days=1),
+                }
+            )
+            session.add(interval)
+
+        count = api.lease_archive(self.before, 10)
+
+        self.assertEqual(2, count)
+        self.assertEqual(["33333"], [lease.uuid for lease in api.lease_get_all({})])
+        self.assertEqual(["44444", "55555"], _history(api.models.LeaseHistory))
+        archived = api.model_query(api.models.LeaseHistory).filter_by(uuid="55555")
+        self.assertEqual(test_lease_5, {k: archived.one()[k] for k in test_lease_5})
+        self.assertEqual([], api.busy_interval_check())
+
+    def test_lease_archive_reused_id(self):
+        api.lease_create(dict(test_lease_4, id=1))
+        api.lease_archive(self.before, 10)
+        api.lease_create(dict(test_lease_5, id=1))
+
+        self.assertEqual(1, api.lease_archive(self.before, 10))
+        archived = api.model_query(api.models.LeaseHistory).all()
+        self.assertEqual([1, 1], [lease.id for lease in archived])
+        self.assertEqual(["44444", "55555"], _history(api.models.LeaseHistory))
+
+    def test_lease_archive_recent(self):
+        api.lease_create(test_lease_4)
+
+        before = timeutils.utcnow() - datetime.timedelta(days=1)
+
+        self.assertEqual(0, api.lease_archive(before, 10))
+        self.assertEqual([], _history(api.models.LeaseHistory))
+
+    def test_lease_archive_batch(self):
+        api.lease_create(test_lease_4)
+        api.lease_create(test_lease_5)
+        api.lease_create(test_lease_6)
+
+        self.assertEqual(2, api.lease_archive(self.before, 2))
+        self.assertEqual(1, api.lease_archive(self.before, 2))
+        self.assertEqual(0, api.lease_archive(self.before, 2))
+        self.assertEqual(["44444", "55555", "6666"], _history(api.models.LeaseHistory))
+
+    def test_lease_archive_parent(self):
+        api.lease_create(dict(test_lease_4, offer_uuid=None))
+        api.lease_create(
+            dict(test_lease_5, offer_uuid=None, parent_lease_uuid=test_lease_4["uuid"])
+        )
+        api.offer_create(
+            dict(
+                test_offer_1,
+                status=statuses.DELETED,
+                parent_lease_uuid=test_lease_5["uuid"],
+            )
+        )
+
+        # the parents are only moved once their children are
+        self.assertEqual(0, api.lease_archive(self.before, 10))
+        self.assertEqual(1, api.offer_archive(self.before, 10))
+        self.assertEqual(1, api.lease_archive(self.before, 10))
+        self.assertEqual(1, api.lease_archive(self.before, 10))
+        self.assertEqual(["44444", "55555"], _history(api.models.LeaseHistory))
+
+    def test_offer_archive(self):
+        api.offer_create(test_offer_1)
+        api.offer_create(dict(test_offer_2, status=statuses.EXPIRED))
+        api.offer_create(dict(test_offer_3, status=statuses.DELETED))
+        api.lease_create(dict(test_lease_4, offer_uuid=test_offer_3["uuid"]))
+
+        self.assertEqual(1, api.offer_archive(self.before, 10))
+        self.assertEqual(["22222"], _history(api.models.OfferHistory))
+
+        # the offer is moved once the lease claimed from it is
+        self.assertEqual(1, api.lease_archive(self.before, 10))
+        self.assertEqual(1, api.offer_archive(self.before, 10))
+        self.assertEqual(["22222", "33333"], _history(api.models.OfferHistory))
+        self.assertEqual(["11111"], [offer.uuid for offer in api.offer_get_all({})])
+        self.assertEqual([], api.busy_interval_check())
+
+    def test_lease_get_all_include_history(self):
+        api.lease_create(test_lease_3)
+        api.lease_create(test_lease_4)
+        api.lease_create(test_lease_5)
+        api.lease_create(test_lease_6)
+        api.lease_archive(self.before, 1)
+
+        leases = api.lease_get_all({"include_history": True})
+        self.assertEqual(
+            ["33333", "44444", "55555", "6666"], [lease.uuid for lease in leases]
+        )
+
+        leases = api.lease_get_all(
+            {"include_history": True, "limit": 2, "marker": "33333"}
+        )
+        self.assertEqual(["44444", "55555"], [lease.uuid for lease in leases])
+
+        leases = api.lease_get_all(
+            {"include_history": True, "status": [statuses.DELETED], "marker": "33333"}
+        )
+        self.assertEqual(["44444"], [lease.uuid for lease in leases])
+
+        leases = api.lease_get_all(
+            {"include_history": True, "status": [statuses.ACTIVE]}
+        )
+        self.assertEqual(["33333"], [lease.uuid for lease in leases])
+
+        leases = api.lease_get_all({})
+        self.assertEqual(["33333", "55555", "6666"], [lease.uuid for lease in leases])
+
+    def test_lease_get_all_history_marker(self):
+        api.lease_create(test_lease_4)
+        api.lease_create(test_lease_5)
+        api.lease_archive(self.before, 1)
+
+        leases = api.lease_get_all({"include_history": True, "marker": "44444"})
+        self.assertEqual(["55555"], [lease.uuid for lease in leases])
+        self.assertRaises(e.InvalidMarker, api.lease_get_all, {"marker": "44444"})
+
+    def test_lease_get_all_history_reused_id(self):
+        api.lease_create(dict(test_lease_4, id=1))
+        api.lease_archive(self.before, 10)
+        api.lease_create(dict(test_lease_3, id=1))
+
+        leases = api.lease_get_all({"include_history": True, "limit": 1})
+        self.assertEqual(["33333"], [lease.uuid for lease in leases])
+        leases = api.lease_get_all(
+            {"include_history": True, "limit": 1, "marker": "33333"}
+        )
+        self.assertEqual(["44444"], [lease.uuid for lease in leases])
+        leases = api.lease_get_all(
+            {"include_history": True, "limit": 1, "marker": "44444"}
+        )
+        self.assertEqual([], leases)
+
+    def test_offer_get_all_include_history(self):
+        api.offer_create(test_offer_1)
+        api.offer_create(dict(test_offer_2, status=statuses.EXPIRED))
+        api.offer_create(dict(test_offer_3, status=statuses.DELETED))
+        api.offer_archive(self.before, 10)
+
+        offers = api.offer_get_all({"include_history": True})
+        self.assertEqual(["11111", "22222", "33333"], [offer.uuid for offer in offers])
+
+        offers = api.offer_get_all(
+            {"include_history": True, "limit": 1, "marker": "22222"}
+        )
+        self.assertEqual(["33333"], [offer.uuid for offer in offers])
+
+        offers = api.offer_get_all(
+            {"include_history": True, "project_id": test_offer_3["project_id"]}
+        )
+        self.assertEqual(["33333"], [offer.uuid for offer in offers])
+
+        offers = api.offer_get_all({})
+        self.assertEqual(["11111"], [offer.uuid for offer in offers])
+
+
 class TestEventAPI(base.DBTestCase):
     def test_event_get_all(self):
         api.event_create(test_event_1)
@@ -973,6 +1875,15 @@ class TestEventAPI(base.DBTestCase):
         self.assertIn(test_event_1["id"], event_ids)
         self.assertIn(test_event_2["id"], event_ids)
 
+    def test_event_get_all_paginate(self):
+        api.event_create(test_event_1)
+        api.event_create(test_event_2)
+        api.event_create(test_event_3)
+
+        res = api.event_get_all({"limit": 2, "marker": 1})
+
+        self.assertEqual([2, 3], [event.id for event in res])
+
     def test_event_get_all_filter_by_last_event_time(self):
         api.event_create(test_event_1)
         api.event_create(test_event_2)
@@ -1014,6 +1925,121 @@ class TestEventAPI(base.DBTestCase):
         assert len(events) == 1
         assert events[0].to_dict() == event.to_dict()
 
+    def test_event_create_many(self):
+        api.event_create_many(
+            [
+                test_event_1,
+                {"event_type": "fake:event:other", "event_time": now},
+            ]
+        )
+
+        events = api.event_get_all({}).all()
+        self.assertEqual(
+            ["fake:event:start", "fake:event:other"], [e.event_type for e in events]
+        )
+        self.assertEqual("0wn3r", events[0].owner_id)
+        self.assertIsNone(events[1].owner_id)
+        self.assertIsNotNone(events[1].created_at)
+
+    def test_event_create_many_empty(self):
+        api.event_create_many([])
+
+        self.assertEqual([], api.event_get_all({}).all())
+
+    def test_event_archive(self):
+        api.event_create(test_event_1)
+        api.event_create(test_event_2)
+        api.event_create(test_event_3)
+        before = now - datetime.timedelta(days=15)
+
+        count = api.event_archive(before, 10)
+
+        self.assertEqual(2, count)
+        self.assertEqual([2], [e.id for e in api.event_get_all({})])
+        archived = _archived_events()
+        self.assertEqual([1, 3], [e.id for e in archived])
+        self.assertEqual(test_event_1, {k: archived[0][k] for k in test_event_1})
+
+    def test_event_archive_batch(self):
+        api.event_create(test_event_1)
+        api.event_create(test_event_2)
+        api.event_create(test_event_3)
+        before = now
+
+        self.assertEqual(2, api.event_archive(before, 2))
+        self.assertEqual(1, api.event_archive(before, 2))
+        self.assertEqual(0, api.event_archive(before, 2))
+
+        self.assertEqual([], api.event_get_all({}).all())
+        self.assertEqual([1, 2, 3], [e.id for e in _archived_events()])
+
+    def test_event_archive_reused_id(self):
+        api.event_create(dict(test_event_1, id=1))
+        api.event_archive(now, 10)
+        api.event_create(dict(test_event_3, id=1))
+
+        self.assertEqual(1, api.event_archive(now, 10))
+        archived = _archived_events()
+        self.assertEqual([1, 1], [e.id for e in archived])
+        self.assertEqual(["11111", "22222"], [e.object_uuid for e in archived])
+
+    def test_event_archive_purge(self):
+        api.event_create(test_event_1)
+        api.event_create(test_event_2)
+
+        count = api.event_archive(now, 10, purge=True)
+
+        self.assertEqual(2, count)
+        self.assertEqual([], api.event_get_all({}).all())
+        self.assertEqual([], _archived_events())
+
+
+class TestOutboxAPI(base.DBTestCase):
+    def test_outbox_create(self):
+        api.outbox_create(
+            [_outbox_entry("fake:event:start"), _outbox_entry("fake:event:end")]
+        )
+
+        events = api.event_get_all({}).all()
+        self.assertEqual(
+            ["fake:event:start", "fake:event:end"], [e.event_type for e in events]
+        )
+        messages = api.outbox_get_undelivered(10)
+        self.assertEqual(
+            ["fake:event:start", "fake:event:end"], [m.event_type for m in messages]
+        )
+        self.assertIsNone(messages[0].delivered_at)
+
+    def test_outbox_get_undelivered_limit(self):
+        api.outbox_create([_outbox_entry("fake:event:%d" % i) for i in range(3)])
+
+        messages = api.outbox_get_undelivered(2)
+
+        self.assertEqual(
+            ["fake:event:0", "fake:event:1"], [m.event_type for m in messages]
+        )
+
+    def test_outbox_mark_delivered(self):
+        api.outbox_create([_outbox_entry("fake:event:%d" % i) for i in range(3)])
+        messages = api.outbox_get_undelivered(2)
+
+        api.outbox_mark_delivered([m.id for m in messages], now)
+
+        messages = api.outbox_get_undelivered(10)
+        self.assertEqual(["fake:event:2"], [m.event_type for m in messages])
+
+    def test_outbox_purge_delivered(self):
+        api.outbox_create([_outbox_entry("fake:event:%d" % i) for i in range(3)])
+        m1, m2, m3 = api.outbox_get_undelivered(10)
+        api.outbox_mark_delivered([m1.id], now - datetime.timedelta(days=2))
+        api.outbox_mark_delivered([m2.id], now)
+
+        deleted = api.outbox_purge_delivered(now - datetime.timedelta(days=1))
+
+        self.assertEqual(1, deleted)
+        ids = [m.id for m in api.model_query(api.models.OutboxMessage).all()]
+        self.assertEqual([m2.id, m3.id], ids)
+
 
 class TestConsoleAuthTokenAPI(base.DBTestCase):
     def test_console_auth_token_create_and_get(self):
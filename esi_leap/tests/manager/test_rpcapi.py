@@ -0,0 +1,48 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from esi_leap.manager import rpcapi
+from esi_leap.tests import base
+
+
+@mock.patch("oslo_messaging.get_rpc_transport")
+@mock.patch("oslo_messaging.RPCClient")
+class TestManagerRPCAPI(base.TestCase):
+    def test_schedule_lease(self, mock_client, mock_transport):
+        rpcapi.ManagerRPCAPI().schedule_lease(self.context, "lease-uuid")
+
+        mock_client.return_value.prepare.assert_called_once_with(
+            fanout=True, version="1.1"
+        )
+        mock_client.return_value.prepare.return_value.cast.assert_called_once_with(
+            self.context, "schedule_lease", lease_uuid="lease-uuid"
+        )
+
+    def test_schedule_offer(self, mock_client, mock_transport):
+        rpcapi.ManagerRPCAPI().schedule_offer(self.context, "offer-uuid")
+
+        mock_client.return_value.prepare.assert_called_once_with(
+            fanout=True, version="1.1"
+        )
+        mock_client.return_value.prepare.return_value.cast.assert_called_once_with(
+            self.context, "schedule_offer", offer_uuid="offer-uuid"
+        )
+
+    def test_cancel_leases(self, mock_client, mock_transport):
+        rpcapi.ManagerRPCAPI().cancel_leases(self.context)
+
+        mock_client.return_value.prepare.assert_called_once_with(version="1.2")
+        mock_client.return_value.prepare.return_value.cast.assert_called_once_with(
+            self.context, "cancel_leases"
+        )
@@ -0,0 +1,64 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+from esi_leap.manager import scheduler
+from esi_leap.tests import base
+
+
+class TestDeadlineScheduler(base.TestCase):
+    def setUp(self):
+        super(TestDeadlineScheduler, self).setUp()
+        self.scheduler = scheduler.DeadlineScheduler()
+        self.now = datetime.datetime(2016, 7, 16, 19, 20, 30)
+
+    def test_pop_due(self):
+        later = self.now + datetime.timedelta(minutes=1)
+        earlier = self.now - datetime.timedelta(minutes=1)
+        self.scheduler.add(later, scheduler.EXPIRE_LEASE, "lease2")
+        self.scheduler.add(self.now, scheduler.FULFILL_LEASE, "lease1")
+        self.scheduler.add(earlier, scheduler.EXPIRE_OFFER, "offer1")
+
+        due = self.scheduler.pop_due(self.now)
+
+        self.assertEqual(
+            [
+                (earlier, scheduler.EXPIRE_OFFER, "offer1"),
+                (self.now, scheduler.FULFILL_LEASE, "lease1"),
+            ],
+            due,
+        )
+        self.assertEqual(1, len(self.scheduler))
+        self.assertEqual(later, self.scheduler.next_deadline())
+
+    def test_pop_due_nothing_due(self):
+        later = self.now + datetime.timedelta(minutes=1)
+        self.scheduler.add(later, scheduler.EXPIRE_LEASE, "lease1")
+
+        self.assertEqual([], self.scheduler.pop_due(self.now))
+        self.assertEqual(1, len(self.scheduler))
+
+    def test_add_duplicate(self):
+        self.scheduler.add(self.now, scheduler.EXPIRE_LEASE, "lease1")
+        self.scheduler.add(self.now, scheduler.EXPIRE_LEASE, "lease1")
+
+        self.assertEqual(1, len(self.scheduler))
+        self.scheduler.pop_due(self.now)
+        self.scheduler.add(self.now, scheduler.EXPIRE_LEASE, "lease1")
+        self.assertEqual(1, len(self.scheduler))
+
+    def test_add_no_deadline(self):
+        self.scheduler.add(None, scheduler.EXPIRE_OFFER, "offer1")
+
+        self.assertEqual(0, len(self.scheduler))
+        self.assertIsNone(self.scheduler.next_deadline())
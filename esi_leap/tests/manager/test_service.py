@@ -10,16 +10,27 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import datetime
 import mock
+import threading
+import time
+from oslo_messaging import conffixture as messaging_fixture
+from oslo_messaging.notify import _impl_test as notify_test
 from oslo_utils import uuidutils
 
+from esi_leap.common import rpc
 from esi_leap.common import statuses
+import esi_leap.conf
+from esi_leap.manager import scheduler
+from esi_leap.manager.service import ManagerEndpoint
 from esi_leap.manager.service import ManagerService
 from esi_leap.objects import lease
 from esi_leap.objects import offer
 from esi_leap.tests import base
 
+CONF = esi_leap.conf.CONF
+
 
 class TestService(base.TestCase):
     def setUp(self):
@@ -38,6 +49,8 @@ class TestService(base.TestCase):
 
         self.test_lease = lease.Lease(
             offer_uuid=self.test_offer.uuid,
+            resource_type="test_node",
+            resource_uuid="abc",
             name="c",
             uuid=uuidutils.generate_uuid(),
             project_id="lesseeid",
@@ -46,9 +59,21 @@ class TestService(base.TestCase):
             end_time=datetime.datetime(4000, 7, 16),
         )
 
+    @mock.patch("esi_leap.common.notification_utils.flush")
+    @mock.patch("oslo_service.service.Service.stop")
+    def test_stop(self, mock_stop, mock_flush):
+        s = ManagerService()
+        s._server = mock.Mock()
+
+        s.stop()
+
+        mock_stop.assert_called_once()
+        s._server.stop.assert_called_once()
+        mock_flush.assert_called_once()
+
     @mock.patch("esi_leap.objects.lease.Lease.fulfill")
     @mock.patch("oslo_utils.timeutils.utcnow")
-    @mock.patch("esi_leap.objects.lease.Lease.get_all")
+    @mock.patch("esi_leap.objects.lease.Lease.get_all_due_for_fulfillment")
     def test__fulfill_leases(self, mock_ga, mock_utcnow, mock_fulfill):
         mock_ga.return_value = [self.test_lease, self.test_lease]
         mock_utcnow.return_value = datetime.datetime(3500, 7, 16)
@@ -57,17 +82,17 @@ class TestService(base.TestCase):
         s._fulfill_leases()
 
         assert mock_fulfill.call_count == 2
-        mock_ga.assert_called_once_with(
-            {"status": [statuses.CREATED, statuses.WAIT_FULFILL]}, s._context
-        )
+        mock_ga.assert_called_once_with(mock_utcnow.return_value, s._context)
 
     @mock.patch("esi_leap.objects.lease.Lease.save")
     @mock.patch("esi_leap.objects.lease.Lease.fulfill")
     @mock.patch("oslo_utils.timeutils.utcnow")
-    @mock.patch("esi_leap.objects.lease.Lease.get_all")
+    @mock.patch("esi_leap.objects.lease.Lease.get_all_due_for_fulfillment")
     def test__fulfill_leases_error(self, mock_ga, mock_utcnow, mock_fulfill, mock_save):
         error_lease = lease.Lease(
             offer_uuid=self.test_offer.uuid,
+            resource_type="test_node",
+            resource_uuid="abc",
             name="c",
             uuid=uuidutils.generate_uuid(),
             project_id="lesseeid",
@@ -83,15 +108,13 @@ class TestService(base.TestCase):
         s._fulfill_leases()
 
         mock_fulfill.assert_called_once()
-        mock_ga.assert_called_once_with(
-            {"status": [statuses.CREATED, statuses.WAIT_FULFILL]}, s._context
-        )
+        mock_ga.assert_called_once_with(mock_utcnow.return_value, s._context)
         self.assertEqual(statuses.ERROR, error_lease.status)
         mock_save.assert_called_once()
 
     @mock.patch("esi_leap.objects.lease.Lease.expire")
     @mock.patch("oslo_utils.timeutils.utcnow")
-    @mock.patch("esi_leap.objects.lease.Lease.get_all")
+    @mock.patch("esi_leap.objects.lease.Lease.get_all_due_for_expiry")
     def test__expire_leases(self, mock_ga, mock_utcnow, mock_expire):
         mock_ga.return_value = [self.test_lease, self.test_lease]
         mock_utcnow.return_value = datetime.datetime(5000, 7, 16)
@@ -100,25 +123,17 @@ class TestService(base.TestCase):
         s._expire_leases()
 
         assert mock_expire.call_count == 2
-        mock_ga.assert_called_once_with(
-            {
-                "status": [
-                    statuses.ACTIVE,
-                    statuses.CREATED,
-                    statuses.WAIT_EXPIRE,
-                    statuses.WAIT_FULFILL,
-                ]
-            },
-            s._context,
-        )
+        mock_ga.assert_called_once_with(mock_utcnow.return_value, s._context)
 
     @mock.patch("esi_leap.objects.lease.Lease.save")
     @mock.patch("esi_leap.objects.lease.Lease.expire")
     @mock.patch("oslo_utils.timeutils.utcnow")
-    @mock.patch("esi_leap.objects.lease.Lease.get_all")
+    @mock.patch("esi_leap.objects.lease.Lease.get_all_due_for_expiry")
     def test__expire_leases_error(self, mock_ga, mock_utcnow, mock_expire, mock_save):
         error_lease = lease.Lease(
             offer_uuid=self.test_offer.uuid,
+            resource_type="test_node",
+            resource_uuid="abc",
             name="c",
             uuid=uuidutils.generate_uuid(),
             project_id="lesseeid",
@@ -134,17 +149,7 @@ class TestService(base.TestCase):
         s._expire_leases()
 
         mock_expire.assert_called_once()
-        mock_ga.assert_called_once_with(
-            {
-                "status": [
-                    statuses.ACTIVE,
-                    statuses.CREATED,
-                    statuses.WAIT_EXPIRE,
-                    statuses.WAIT_FULFILL,
-                ]
-            },
-            s._context,
-        )
+        mock_ga.assert_called_once_with(mock_utcnow.return_value, s._context)
         self.assertEqual(statuses.ERROR, error_lease.status)
         mock_save.assert_called_once()
 
@@ -160,6 +165,28 @@ class TestService(base.TestCase):
         assert mock_cancel.call_count == 2
         mock_ga.assert_called_once_with({"status": [statuses.WAIT_CANCEL]}, s._context)
 
+    @mock.patch("esi_leap.objects.lease.Lease.cancel")
+    @mock.patch("esi_leap.objects.lease.Lease.get_all")
+    def test__cancel_leases_running(self, mock_ga, mock_cancel):
+        s = ManagerService()
+        calls = []
+
+        def get_all(filters, context):
+            calls.append(filters)
+            if len(calls) == 1:
+                # a cast arriving during the pass only wakes it up again
+                s._cancel_leases()
+                self.assertEqual(1, len(calls))
+            return [self.test_lease]
+
+        mock_ga.side_effect = get_all
+
+        s._cancel_leases()
+
+        self.assertEqual(2, mock_ga.call_count)
+        self.assertEqual(2, mock_cancel.call_count)
+        self.assertFalse(s._cancel_lock.locked())
+
     @mock.patch("esi_leap.objects.lease.Lease.save")
     @mock.patch("esi_leap.objects.lease.Lease.cancel")
     @mock.patch("oslo_utils.timeutils.utcnow")
@@ -167,6 +194,8 @@ class TestService(base.TestCase):
     def test__cancel_leases_error(self, mock_ga, mock_utcnow, mock_cancel, mock_save):
         error_lease = lease.Lease(
             offer_uuid=self.test_offer.uuid,
+            resource_type="test_node",
+            resource_uuid="abc",
             name="c",
             uuid=uuidutils.generate_uuid(),
             project_id="lesseeid",
@@ -188,7 +217,7 @@ class TestService(base.TestCase):
 
     @mock.patch("esi_leap.objects.offer.Offer.expire")
     @mock.patch("oslo_utils.timeutils.utcnow")
-    @mock.patch("esi_leap.objects.offer.Offer.get_all")
+    @mock.patch("esi_leap.objects.offer.Offer.get_all_due_for_expiry")
     def test__expire_offers(self, mock_ga, mock_utcnow, mock_expire):
         mock_ga.return_value = [self.test_offer, self.test_offer]
         mock_utcnow.return_value = datetime.datetime(5000, 7, 16)
@@ -197,14 +226,12 @@ class TestService(base.TestCase):
         s._expire_offers()
 
         assert mock_expire.call_count == 2
-        mock_ga.assert_called_once_with(
-            {"status": statuses.OFFER_CAN_DELETE}, s._context
-        )
+        mock_ga.assert_called_once_with(mock_utcnow.return_value, s._context)
 
     @mock.patch("esi_leap.objects.offer.Offer.save")
     @mock.patch("esi_leap.objects.offer.Offer.expire")
     @mock.patch("oslo_utils.timeutils.utcnow")
-    @mock.patch("esi_leap.objects.offer.Offer.get_all")
+    @mock.patch("esi_leap.objects.offer.Offer.get_all_due_for_expiry")
     def test__expire_offers_error(self, mock_ga, mock_utcnow, mock_expire, mock_save):
         error_offer = offer.Offer(
             resource_type="test_node",
@@ -224,12 +251,224 @@ class TestService(base.TestCase):
         s._expire_offers()
 
         mock_expire.assert_called_once()
-        mock_ga.assert_called_once_with(
-            {"status": statuses.OFFER_CAN_DELETE}, s._context
-        )
+        mock_ga.assert_called_once_with(mock_utcnow.return_value, s._context)
         self.assertEqual(statuses.ERROR, error_offer.status)
         mock_save.assert_called_once()
 
+    def test__run_transitions(self):
+        leases = [
+            lease.Lease(
+                uuid=uuidutils.generate_uuid(),
+                resource_type="test_node",
+                resource_uuid=resource_uuid,
+            )
+            for resource_uuid in ["abc", "def", "abc", "ghi", "abc"]
+        ]
+        calls = []
+        active = collections.Counter()
+        overlaps = []
+        lock = threading.Lock()
+
+        def transition(lease):
+            with lock:
+                active[lease.resource_uuid] += 1
+                if active[lease.resource_uuid] > 1:
+                    overlaps.append(lease.resource_uuid)
+            time.sleep(0.01)
+            with lock:
+                active[lease.resource_uuid] -= 1
+                calls.append(lease.uuid)
+
+        self.config(transition_workers=2, group="manager")
+        s = ManagerService()
+        s._run_transitions([(lease, transition) for lease in leases])
+
+        self.assertEqual([], overlaps)
+        self.assertEqual(sorted(lease.uuid for lease in leases), sorted(calls))
+        abc_uuids = [lease.uuid for lease in leases if lease.resource_uuid == "abc"]
+        self.assertEqual(abc_uuids, [uuid for uuid in calls if uuid in abc_uuids])
+
+    def test__run_transitions_error(self):
+        mock_transition = mock.Mock(side_effect=[Exception("whoops"), None])
+        leases = [
+            lease.Lease(
+                uuid=uuidutils.generate_uuid(),
+                resource_type="test_node",
+                resource_uuid=resource_uuid,
+            )
+            for resource_uuid in ["abc", "def"]
+        ]
+
+        s = ManagerService()
+        s._run_transitions([(lease, mock_transition) for lease in leases])
+
+        self.assertEqual(2, mock_transition.call_count)
+
+    @mock.patch("esi_leap.objects.offer.Offer.get_all")
+    @mock.patch("esi_leap.objects.lease.Lease.get_all")
+    def test__load_deadlines(self, mock_lga, mock_oga):
+        active_lease = lease.Lease(
+            uuid=uuidutils.generate_uuid(),
+            status=statuses.ACTIVE,
+            start_time=datetime.datetime(2000, 7, 16),
+            end_time=datetime.datetime(4000, 7, 16),
+        )
+        mock_lga.return_value = [self.test_lease, active_lease]
+        mock_oga.return_value = [self.test_offer]
+
+        s = ManagerService()
+        s._load_deadlines()
+
+        mock_lga.assert_called_once_with(
+            {"status": statuses.LEASE_CAN_EXPIRE}, s._context
+        )
+        mock_oga.assert_called_once_with(
+            {"status": statuses.OFFER_CAN_DELETE}, s._context
+        )
+        self.assertEqual(
+            [
+                (
+                    self.test_lease.start_time,
+                    scheduler.FULFILL_LEASE,
+                    self.test_lease.uuid,
+                )
+            ],
+            s._scheduler.pop_due(datetime.datetime(3500, 7, 16)),
+        )
+        self.assertEqual(3, len(s._scheduler))
+
+    @mock.patch("esi_leap.objects.lease.Lease.fulfill")
+    @mock.patch("esi_leap.objects.lease.Lease.get")
+    @mock.patch("oslo_utils.timeutils.utcnow")
+    def test__process_deadlines_fulfill(self, mock_utcnow, mock_get, mock_fulfill):
+        mock_utcnow.return_value = datetime.datetime(3500, 7, 16)
+        mock_get.return_value = self.test_lease
+
+        s = ManagerService()
+        s.schedule_lease(self.test_lease)
+        s._process_deadlines()
+
+        mock_get.assert_called_once_with(self.test_lease.uuid, s._context)
+        mock_fulfill.assert_called_once_with(s._context)
+        self.assertEqual(1, len(s._scheduler))
+
+    @mock.patch("esi_leap.objects.lease.Lease.expire")
+    @mock.patch("esi_leap.objects.lease.Lease.fulfill")
+    @mock.patch("esi_leap.objects.lease.Lease.get")
+    @mock.patch("oslo_utils.timeutils.utcnow")
+    def test__process_deadlines_stale(
+        self, mock_utcnow, mock_get, mock_fulfill, mock_expire
+    ):
+        mock_utcnow.return_value = datetime.datetime(5000, 7, 16)
+        updated_lease = lease.Lease(
+            uuid=self.test_lease.uuid,
+            status=statuses.ACTIVE,
+            start_time=datetime.datetime(3000, 7, 16),
+            end_time=datetime.datetime(6000, 7, 16),
+        )
+        mock_get.return_value = updated_lease
+
+        s = ManagerService()
+        s.schedule_lease(self.test_lease)
+        s._process_deadlines()
+
+        self.assertEqual(2, mock_get.call_count)
+        mock_fulfill.assert_not_called()
+        mock_expire.assert_not_called()
+
+    @mock.patch("esi_leap.objects.offer.Offer.expire")
+    @mock.patch("esi_leap.objects.offer.Offer.get")
+    @mock.patch("oslo_utils.timeutils.utcnow")
+    def test__process_deadlines_expire_offer(self, mock_utcnow, mock_get, mock_expire):
+        mock_utcnow.return_value = datetime.datetime(5000, 7, 16)
+        mock_get.return_value = self.test_offer
+
+        s = ManagerService()
+        s.schedule_offer(self.test_offer)
+        s._process_deadlines()
+
+        mock_get.assert_called_once_with(self.test_offer.uuid, s._context)
+        mock_expire.assert_called_once_with(s._context)
+        self.assertEqual(0, len(s._scheduler))
+
+    @mock.patch("esi_leap.objects.lease.Lease.fulfill")
+    @mock.patch("oslo_utils.timeutils.utcnow")
+    def test__fulfill_lease_retry(self, mock_utcnow, mock_fulfill):
+        now = datetime.datetime(3500, 7, 16)
+        mock_utcnow.return_value = now
+
+        def fail(context):
+            self.test_lease.status = statuses.WAIT_FULFILL
+
+        mock_fulfill.side_effect = fail
+        self.config(retry_interval=10, rescan_interval=30, group="manager")
+
+        s = ManagerService()
+        for delay in (10, 20, 30, 30):
+            s._fulfill_lease(self.test_lease)
+            self.assertEqual(
+                [
+                    (
+                        now + datetime.timedelta(seconds=delay),
+                        scheduler.FULFILL_LEASE,
+                        self.test_lease.uuid,
+                    )
+                ],
+                s._scheduler.pop_due(now + datetime.timedelta(seconds=delay)),
+            )
+
+        mock_fulfill.side_effect = None
+        self.test_lease.status = statuses.ACTIVE
+        s._fulfill_lease(self.test_lease)
+        self.assertEqual(0, len(s._scheduler))
+        self.assertEqual({}, s._retries)
+
+    @mock.patch("esi_leap.objects.lease.Lease.expire")
+    @mock.patch("oslo_utils.timeutils.utcnow")
+    def test__expire_lease_retry(self, mock_utcnow, mock_expire):
+        now = datetime.datetime(5000, 7, 16)
+        mock_utcnow.return_value = now
+
+        def fail(context):
+            self.test_lease.status = statuses.WAIT_EXPIRE
+
+        mock_expire.side_effect = fail
+        self.config(retry_interval=10, group="manager")
+
+        s = ManagerService()
+        s._expire_lease(self.test_lease)
+
+        self.assertEqual(
+            [
+                (
+                    now + datetime.timedelta(seconds=10),
+                    scheduler.EXPIRE_LEASE,
+                    self.test_lease.uuid,
+                )
+            ],
+            s._scheduler.pop_due(now + datetime.timedelta(seconds=10)),
+        )
+
+    @mock.patch("esi_leap.objects.lease.Lease.get")
+    def test_endpoint_schedule_lease(self, mock_get):
+        mock_get.return_value = self.test_lease
+        s = ManagerService()
+        endpoint = ManagerEndpoint(s)
+
+        endpoint.schedule_lease(self.context, self.test_lease.uuid)
+
+        mock_get.assert_called_once_with(self.test_lease.uuid, self.context)
+        self.assertEqual(2, len(s._scheduler))
+
+    @mock.patch("esi_leap.manager.service.ManagerService._cancel_leases")
+    def test_endpoint_cancel_leases(self, mock_cancel_leases):
+        s = ManagerService()
+        endpoint = ManagerEndpoint(s)
+
+        endpoint.cancel_leases(self.context)
+
+        mock_cancel_leases.assert_called_once_with()
+
     @mock.patch(
         "esi_leap.objects.console_auth_token.ConsoleAuthToken.clean_expired_console_tokens"
     )
@@ -238,3 +477,80 @@ class TestService(base.TestCase):
         s._clean_expired_console_tokens()
 
         mock_cect.assert_called_once
+
+
+class TestRelayOutbox(base.DBTestCase):
+    def setUp(self):
+        super(TestRelayOutbox, self).setUp()
+        messaging_conf = self.useFixture(messaging_fixture.ConfFixture(CONF))
+        messaging_conf.transport_url = "fake:/"
+        self.config(driver=["test"], group="oslo_messaging_notifications")
+        self.config(notification_level="info", group="notification")
+        rpc.init(CONF)
+        self.addCleanup(rpc.cleanup)
+        notify_test.reset()
+        self.addCleanup(notify_test.reset)
+
+    def _create_messages(self, count):
+        self.db_api.outbox_create(
+            [
+                {
+                    "message": {
+                        "publisher_id": "esi-leap-manager.host",
+                        "event_type": "esi_leap.lease.fulfill.%d" % i,
+                        "priority": "info",
+                        "payload": {"index": i},
+                    },
+                    "event": {
+                        "event_type": "esi_leap.lease.fulfill.%d" % i,
+                        "event_time": datetime.datetime.now(),
+                    },
+                }
+                for i in range(count)
+            ]
+        )
+
+    def test__relay_outbox(self):
+        self.config(outbox_batch_size=2, group="notification")
+        self._create_messages(5)
+
+        s = ManagerService()
+        s._relay_outbox()
+
+        notifications = notify_test.NOTIFICATIONS
+        self.assertEqual(
+            ["esi_leap.lease.fulfill.%d" % i for i in range(5)],
+            [n[1]["event_type"] for n in notifications],
+        )
+        self.assertEqual({"index": 0}, notifications[0][1]["payload"])
+        self.assertEqual("esi-leap-manager.host", notifications[0][1]["publisher_id"])
+        self.assertEqual([], self.db_api.outbox_get_undelivered(10))
+
+    @mock.patch("esi_leap.objects.outbox.OutboxMessage.publish")
+    def test__relay_outbox_error(self, mock_publish):
+        self._create_messages(3)
+        mock_publish.side_effect = [None, Exception("unreachable"), None]
+
+        s = ManagerService()
+        s._relay_outbox()
+
+        self.assertEqual(2, mock_publish.call_count)
+        messages = self.db_api.outbox_get_undelivered(10)
+        self.assertEqual(
+            ["esi_leap.lease.fulfill.1", "esi_leap.lease.fulfill.2"],
+            [m["event_type"] for m in messages],
+        )
+
+    def test__relay_outbox_purge(self):
+        self.config(outbox_retention=0, group="notification")
+        self._create_messages(2)
+
+        s = ManagerService()
+        s._relay_outbox()
+        s._relay_outbox()
+
+        self.assertEqual(2, len(notify_test.NOTIFICATIONS))
+        self.assertEqual([], self.db_api.outbox_get_undelivered(10))
+        self.assertEqual(
+            0, self.db_api.outbox_purge_delivered(datetime.datetime(3000, 1, 1))
+        )
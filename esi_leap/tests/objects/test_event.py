@@ -12,6 +12,7 @@
 
 from datetime import datetime
 import mock
+import threading
 
 from esi_leap.objects import event as event_obj
 from esi_leap.tests import base
@@ -57,3 +58,102 @@ class TestEventObject(base.DBTestCase):
         event = event_obj.Event(self.context, **self.test_event_create_dict)
         event.create()
         mock_ec.assert_called_once_with(self.test_event_create_dict)
+
+    @mock.patch("esi_leap.db.sqlalchemy.api.event_create_many")
+    def test_create_many(self, mock_ecm):
+        event = event_obj.Event(self.context, **self.test_event_create_dict)
+        event_obj.Event.create_many([event, event])
+        mock_ecm.assert_called_once_with(
+            [self.test_event_create_dict, self.test_event_create_dict]
+        )
+        self.assertEqual({}, event.obj_get_changes())
+
+
+class TestEventBuffer(base.TestCase):
+    def setUp(self):
+        super(TestEventBuffer, self).setUp()
+        self.buffer = event_obj.EventBuffer()
+        self.addCleanup(self.buffer.clear)
+        self.event = event_obj.Event(event_type="fake:event", event_time=datetime.now())
+
+    @mock.patch("esi_leap.objects.event.Event.create_many")
+    def test_add_flush_on_size(self, mock_cm):
+        self.config(event_buffer_size=3, group="notification")
+
+        self.buffer.add(self.event)
+        self.buffer.add(self.event)
+        mock_cm.assert_not_called()
+        self.buffer.add(self.event)
+
+        mock_cm.assert_called_once_with([self.event] * 3)
+        self.assertIsNone(self.buffer._timer)
+
+    @mock.patch("esi_leap.objects.event.Event.create_many")
+    def test_add_flush_on_interval(self, mock_cm):
+        self.config(event_flush_interval=0.01, group="notification")
+        flushed = threading.Event()
+        mock_cm.side_effect = lambda events: flushed.set()
+
+        self.buffer.add(self.event)
+
+        self.assertTrue(flushed.wait(10))
+        mock_cm.assert_called_once_with([self.event])
+
+    @mock.patch("esi_leap.objects.event.Event.create_many")
+    def test_flush(self, mock_cm):
+        self.buffer.add(self.event)
+        self.buffer.flush()
+        self.buffer.flush()
+
+        mock_cm.assert_called_once_with([self.event])
+        self.assertIsNone(self.buffer._timer)
+
+    @mock.patch("esi_leap.objects.event.Event.create_many")
+    def test_flush_error(self, mock_cm):
+        self.config(event_write_attempts=2, group="notification")
+        mock_cm.side_effect = Exception("boom")
+
+        self.buffer.add(self.event)
+        self.buffer.flush()
+
+        # the batch and then the event alone were tried
+        self.assertEqual([mock.call([self.event])] * 2, mock_cm.call_args_list)
+        self.assertEqual([(self.event, 1)], self.buffer._events)
+        self.assertIsNotNone(self.buffer._timer)
+
+        self.buffer.flush()
+
+        self.assertEqual(4, mock_cm.call_count)
+        self.assertEqual([], self.buffer._events)
+        self.assertIsNone(self.buffer._timer)
+
+    @mock.patch("esi_leap.objects.event.Event.create_many")
+    def test_flush_error_one_event(self, mock_cm):
+        bad_event = event_obj.Event(event_type="bad:event", event_time=datetime.now())
+
+        def create_many(events):
+            if bad_event in events:
+                raise Exception("boom")
+
+        mock_cm.side_effect = create_many
+
+        self.buffer.add(self.event)
+        self.buffer.add(bad_event)
+        self.buffer.flush()
+
+        mock_cm.assert_has_calls(
+            [
+                mock.call([self.event, bad_event]),
+                mock.call([self.event]),
+                mock.call([bad_event]),
+            ]
+        )
+        self.assertEqual([(bad_event, 1)], self.buffer._events)
+
+    @mock.patch("esi_leap.objects.event.Event.create_many")
+    def test_clear(self, mock_cm):
+        self.buffer.add(self.event)
+        self.buffer.clear()
+        self.buffer.flush()
+
+        mock_cm.assert_not_called()
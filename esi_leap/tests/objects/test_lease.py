@@ -122,6 +122,33 @@ class TestLeaseObject(base.DBTestCase):
             self.assertIsInstance(leases[0], lease_obj.Lease)
             self.assertEqual(self.context, leases[0]._context)
 
+    def test_get_all_due_for_fulfillment(self):
+        now = datetime.datetime(2016, 7, 16)
+        with mock.patch.object(
+            self.db_api, "lease_get_all_due_for_fulfillment", autospec=True
+        ) as mock_lgadff:
+            mock_lgadff.return_value = [self.test_lease_dict]
+
+            leases = lease_obj.Lease.get_all_due_for_fulfillment(now, self.context)
+
+            mock_lgadff.assert_called_once_with(now)
+            self.assertEqual(len(leases), 1)
+            self.assertIsInstance(leases[0], lease_obj.Lease)
+            self.assertEqual(self.context, leases[0]._context)
+
+    def test_get_all_due_for_expiry(self):
+        now = datetime.datetime(2016, 7, 16)
+        with mock.patch.object(
+            self.db_api, "lease_get_all_due_for_expiry", autospec=True
+        ) as mock_lgadfe:
+            mock_lgadfe.return_value = [self.test_lease_dict]
+
+            leases = lease_obj.Lease.get_all_due_for_expiry(now, self.context)
+
+            mock_lgadfe.assert_called_once_with(now)
+            self.assertEqual(len(leases), 1)
+            self.assertIsInstance(leases[0], lease_obj.Lease)
+
     @mock.patch("esi_leap.objects.lease.Lease.verify_time_range")
     @mock.patch("esi_leap.db.sqlalchemy.api.lease_create")
     def test_create(self, mock_lc, mock_vtr):
@@ -169,6 +196,191 @@ class TestLeaseObject(base.DBTestCase):
                 assert mock_vtr.call_count == 2
                 mock_lease_create.assert_called_once()
 
+    def _create_many_leases(self):
+        test_offer_2 = offer_obj.Offer(
+            uuid=uuidutils.generate_uuid(),
+            project_id="01d4e6a72f5c408813e02f664cc8c83e",
+            resource_type="dummy_node",
+            resource_uuid="1617",
+            start_time=self.start_time,
+            end_time=self.start_time + datetime.timedelta(days=100),
+            status=statuses.AVAILABLE,
+        )
+        leases = [
+            lease_obj.Lease(self.context, **self.test_lease_create_offer_dict),
+            lease_obj.Lease(
+                self.context,
+                **dict(
+                    self.test_lease_create_offer_dict,
+                    offer_uuid=test_offer_2.uuid,
+                    resource_uuid="1617",
+                ),
+            ),
+        ]
+        return leases, [self.test_offer, test_offer_2]
+
+    @mock.patch("esi_leap.common.utils.lock")
+    @mock.patch("esi_leap.objects.offer.Offer.verify_availability_many")
+    @mock.patch("esi_leap.objects.offer.Offer.get_many")
+    def test_create_many(self, mock_gm, mock_vam, mock_lock):
+        leases, offers = self._create_many_leases()
+        mock_gm.return_value = offers
+
+        with mock.patch.object(
+            self.db_api, "lease_create_many", autospec=True
+        ) as mock_lcm:
+            mock_lcm.return_value = [
+                dict(self.test_lease_dict, id=1, resource_uuid="1718"),
+                dict(self.test_lease_dict, id=2, resource_uuid="1617"),
+            ]
+
+            lease_obj.Lease.create_many(leases, self.context)
+
+            mock_lcm.assert_called_once()
+            self.assertEqual(2, len(mock_lcm.call_args[0][0]))
+        mock_gm.assert_called_once_with([o.uuid for o in offers])
+        mock_vam.assert_called_once_with(
+            [(o, lease.start_time, lease.end_time) for o, lease in zip(offers, leases)]
+        )
+        # resources are locked in a deterministic order
+        self.assertEqual(
+            [
+                mock.call("dummy_node-1617", external=True),
+                mock.call("dummy_node-1718", external=True),
+            ],
+            mock_lock.call_args_list,
+        )
+        self.assertEqual([1, 2], [lease.id for lease in leases])
+
+    @mock.patch("esi_leap.objects.offer.Offer.get_many")
+    def test_create_many_duplicate_offer(self, mock_gm):
+        leases = [
+            lease_obj.Lease(self.context, **self.test_lease_create_offer_dict),
+            lease_obj.Lease(self.context, **self.test_lease_create_offer_dict),
+        ]
+
+        with mock.patch.object(
+            self.db_api, "lease_create_many", autospec=True
+        ) as mock_lcm:
+            self.assertRaises(
+                exception.OfferDuplicateClaim,
+                lease_obj.Lease.create_many,
+                leases,
+                self.context,
+            )
+            mock_lcm.assert_not_called()
+        mock_gm.assert_not_called()
+
+    @mock.patch("esi_leap.objects.offer.Offer.get_many")
+    def test_create_many_offer_not_available(self, mock_gm):
+        leases, offers = self._create_many_leases()
+        offers[1].status = statuses.DELETED
+        mock_gm.return_value = offers
+
+        with mock.patch.object(
+            self.db_api, "lease_create_many", autospec=True
+        ) as mock_lcm:
+            self.assertRaises(
+                exception.OfferNotAvailable,
+                lease_obj.Lease.create_many,
+                leases,
+                self.context,
+            )
+            mock_lcm.assert_not_called()
+
+    @mock.patch("esi_leap.objects.offer.Offer.verify_availability_many")
+    @mock.patch("esi_leap.objects.offer.Offer.get_many")
+    def test_create_many_conflict(self, mock_gm, mock_vam):
+        leases, offers = self._create_many_leases()
+        mock_gm.return_value = offers
+        mock_vam.side_effect = exception.OfferNoTimeAvailabilities(
+            offer_uuid=offers[1].uuid, start_time="start", end_time="end"
+        )
+
+        with mock.patch.object(
+            self.db_api, "lease_create_many", autospec=True
+        ) as mock_lcm:
+            self.assertRaises(
+                exception.OfferNoTimeAvailabilities,
+                lease_obj.Lease.create_many,
+                leases,
+                self.context,
+            )
+            mock_lcm.assert_not_called()
+
+    @mock.patch("esi_leap.objects.offer.Offer.verify_availability_many")
+    @mock.patch("esi_leap.objects.offer.Offer.get_many")
+    @mock.patch("esi_leap.db.sqlalchemy.api.resource_get_conflicts_many")
+    @mock.patch("esi_leap.db.sqlalchemy.api.lease_update_many")
+    def test_extend_many(self, mock_lum, mock_rgcm, mock_gm, mock_vam):
+        lease = lease_obj.Lease(self.context, **self.test_lease_dict)
+        offer_lease = lease_obj.Lease(self.context, **self.test_lease_offer_dict)
+        mock_gm.return_value = [self.test_offer]
+        mock_rgcm.return_value = []
+        end_time = lease.end_time + datetime.timedelta(days=10)
+
+        lease_obj.Lease.extend_many([lease, offer_lease], end_time, self.context)
+
+        mock_gm.assert_called_once_with({self.test_offer.uuid})
+        mock_vam.assert_called_once_with(
+            [(self.test_offer, self.test_lease_dict["end_time"], end_time)]
+        )
+        mock_rgcm.assert_called_once_with(
+            [("dummy_node", "1718", None, self.test_lease_dict["end_time"], end_time)]
+        )
+        mock_lum.assert_called_once_with(
+            [lease.uuid, offer_lease.uuid], {"end_time": end_time}
+        )
+        self.assertEqual(end_time, lease.end_time)
+        self.assertNotIn("end_time", lease.obj_get_changes())
+
+    @mock.patch("esi_leap.db.sqlalchemy.api.resource_get_conflicts_many")
+    @mock.patch("esi_leap.db.sqlalchemy.api.lease_update_many")
+    def test_extend_many_conflict(self, mock_lum, mock_rgcm):
+        lease = lease_obj.Lease(self.context, **self.test_lease_dict)
+        mock_rgcm.return_value = [0]
+
+        self.assertRaises(
+            exception.ResourceTimeConflict,
+            lease_obj.Lease.extend_many,
+            [lease],
+            lease.end_time + datetime.timedelta(days=10),
+            self.context,
+        )
+        mock_lum.assert_not_called()
+
+    @mock.patch("esi_leap.db.sqlalchemy.api.lease_update_many")
+    def test_extend_many_invalid_time(self, mock_lum):
+        lease = lease_obj.Lease(self.context, **self.test_lease_dict)
+
+        self.assertRaises(
+            exception.InvalidTimeRange,
+            lease_obj.Lease.extend_many,
+            [lease],
+            lease.start_time,
+            self.context,
+        )
+        mock_lum.assert_not_called()
+
+    @mock.patch("esi_leap.db.sqlalchemy.api.lease_update_many")
+    def test_cancel_many(self, mock_lum):
+        lease = lease_obj.Lease(self.context, **self.test_lease_dict)
+        lease2 = lease_obj.Lease(
+            self.context, **dict(self.test_lease_dict, uuid=uuidutils.generate_uuid())
+        )
+        mock_lum.return_value = [lease.uuid]
+
+        res = lease_obj.Lease.cancel_many([lease, lease2], self.context)
+
+        mock_lum.assert_called_once_with(
+            [lease.uuid, lease2.uuid],
+            {"status": statuses.WAIT_CANCEL},
+            statuses.LEASE_CAN_DELETE,
+        )
+        self.assertEqual([lease], res)
+        self.assertEqual(statuses.WAIT_CANCEL, lease.status)
+        self.assertEqual(statuses.CREATED, lease2.status)
+
     @mock.patch("esi_leap.objects.lease.Lease.save")
     @mock.patch("esi_leap.objects.lease.Lease.verify_time_range")
     def test_update(self, mock_vtr, mock_save):
@@ -242,11 +454,12 @@ class TestLeaseObject(base.DBTestCase):
                 assert mock_vtr.call_count == 2
                 mock_save.assert_called_once()
 
+    @mock.patch("esi_leap.objects.lease.Lease._status_changed", return_value=False)
     @mock.patch("esi_leap.objects.lease.Lease.resource_object")
     @mock.patch("esi_leap.resource_objects.fake_node.FakeNode.set_lease")
     @mock.patch("esi_leap.objects.lease.Lease.save")
     @mock.patch("esi_leap.common.notification_utils" "._emit_notification")
-    def test_fulfill(self, mock_notify, mock_save, mock_set_lease, mock_ro):
+    def test_fulfill(self, mock_notify, mock_save, mock_set_lease, mock_ro, mock_sc):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
         test_node = FakeNode(uuidutils.generate_uuid(), "12345")
 
@@ -281,11 +494,14 @@ class TestLeaseObject(base.DBTestCase):
         mock_save.assert_called_once()
         self.assertEqual(lease.status, statuses.ACTIVE)
 
+    @mock.patch("esi_leap.objects.lease.Lease._status_changed", return_value=False)
     @mock.patch("esi_leap.objects.lease.Lease.resource_object")
     @mock.patch("esi_leap.resource_objects.fake_node.FakeNode.set_lease")
     @mock.patch("esi_leap.objects.lease.Lease.save")
     @mock.patch("esi_leap.common.notification_utils" "._emit_notification")
-    def test_fulfill_error(self, mock_notify, mock_save, mock_set_lease, mock_ro):
+    def test_fulfill_error(
+        self, mock_notify, mock_save, mock_set_lease, mock_ro, mock_sc
+    ):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
         test_node = FakeNode(uuidutils.generate_uuid(), "12345")
 
@@ -507,6 +723,7 @@ class TestLeaseObject(base.DBTestCase):
         mock_save.assert_called_once()
         self.assertEqual(lease.status, statuses.DELETED)
 
+    @mock.patch("esi_leap.objects.lease.Lease._status_changed", return_value=False)
     @mock.patch("esi_leap.resource_objects.fake_node.FakeNode.set_lease")
     @mock.patch("esi_leap.objects.lease.Lease.get")
     @mock.patch("esi_leap.objects.lease.Lease.resource_object")
@@ -515,7 +732,15 @@ class TestLeaseObject(base.DBTestCase):
     @mock.patch("esi_leap.objects.lease.Lease.save")
     @mock.patch("esi_leap.common.notification_utils" "._emit_notification")
     def test_expire(
-        self, mock_notify, mock_save, mock_rl, mock_glu, mock_ro, mock_lg, mock_sl
+        self,
+        mock_notify,
+        mock_save,
+        mock_rl,
+        mock_glu,
+        mock_ro,
+        mock_lg,
+        mock_sl,
+        mock_sc,
     ):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
         test_node = FakeNode(uuidutils.generate_uuid(), "12345")
@@ -555,6 +780,7 @@ class TestLeaseObject(base.DBTestCase):
         mock_save.assert_called_once()
         self.assertEqual(lease.status, statuses.EXPIRED)
 
+    @mock.patch("esi_leap.objects.lease.Lease._status_changed", return_value=False)
     @mock.patch("esi_leap.resource_objects.fake_node.FakeNode.set_lease")
     @mock.patch("esi_leap.objects.lease.Lease.get")
     @mock.patch("esi_leap.objects.lease.Lease.resource_object")
@@ -563,7 +789,15 @@ class TestLeaseObject(base.DBTestCase):
     @mock.patch("esi_leap.objects.lease.Lease.save")
     @mock.patch("esi_leap.common.notification_utils" "._emit_notification")
     def test_expire_error(
-        self, mock_notify, mock_save, mock_rl, mock_glu, mock_ro, mock_lg, mock_sl
+        self,
+        mock_notify,
+        mock_save,
+        mock_rl,
+        mock_glu,
+        mock_ro,
+        mock_lg,
+        mock_sl,
+        mock_sc,
     ):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
         test_node = FakeNode(uuidutils.generate_uuid(), "12345")
@@ -604,6 +838,7 @@ class TestLeaseObject(base.DBTestCase):
         mock_save.assert_called_once()
         self.assertEqual(lease.status, statuses.WAIT_EXPIRE)
 
+    @mock.patch("esi_leap.objects.lease.Lease._status_changed", return_value=False)
     @mock.patch("esi_leap.resource_objects.fake_node.FakeNode.set_lease")
     @mock.patch("esi_leap.objects.lease.Lease.get")
     @mock.patch("esi_leap.objects.lease.Lease.resource_object")
@@ -612,7 +847,15 @@ class TestLeaseObject(base.DBTestCase):
     @mock.patch("esi_leap.objects.lease.Lease.save")
     @mock.patch("esi_leap.common.notification_utils" "._emit_notification")
     def test_expire_with_parent(
-        self, mock_notify, mock_save, mock_rl, mock_glu, mock_ro, mock_lg, mock_sl
+        self,
+        mock_notify,
+        mock_save,
+        mock_rl,
+        mock_glu,
+        mock_ro,
+        mock_lg,
+        mock_sl,
+        mock_sc,
     ):
         lease = lease_obj.Lease(self.context, **self.test_lease_parent_lease_dict)
         test_node = FakeNode(uuidutils.generate_uuid(), "12345")
@@ -652,12 +895,15 @@ class TestLeaseObject(base.DBTestCase):
         mock_save.assert_called_once()
         self.assertEqual(lease.status, statuses.EXPIRED)
 
+    @mock.patch("esi_leap.objects.lease.Lease._status_changed", return_value=False)
     @mock.patch("esi_leap.objects.lease.Lease.resource_object")
     @mock.patch("esi_leap.resource_objects.fake_node.FakeNode.get_lease_uuid")
     @mock.patch("esi_leap.resource_objects.fake_node.FakeNode.remove_lease")
     @mock.patch("esi_leap.objects.lease.Lease.save")
     @mock.patch("esi_leap.common.notification_utils" "._emit_notification")
-    def test_expire_no_expire(self, mock_notify, mock_save, mock_rl, mock_glu, mock_ro):
+    def test_expire_no_expire(
+        self, mock_notify, mock_save, mock_rl, mock_glu, mock_ro, mock_sc
+    ):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
         test_node = FakeNode(uuidutils.generate_uuid(), "12345")
 
@@ -702,6 +948,103 @@ class TestLeaseObject(base.DBTestCase):
             lease.destroy()
             mock_lease_cancel.assert_called_once_with(lease.uuid)
 
+    def _get_lease_tree(self):
+        l2 = lease_obj.Lease(uuid="l2", parent_lease_uuid="l1", offer_uuid=None)
+        l3 = lease_obj.Lease(uuid="l3", parent_lease_uuid="l1", offer_uuid="o2")
+        l4 = lease_obj.Lease(uuid="l4", parent_lease_uuid="l3", offer_uuid="o3")
+        o2 = offer_obj.Offer(uuid="o2", parent_lease_uuid="l1")
+        o3 = offer_obj.Offer(uuid="o3", parent_lease_uuid="l3")
+        return [l2, l3, l4], [o2, o3]
+
+    def test_get_cascade_order(self):
+        leases, offers = self._get_lease_tree()
+
+        ordered = lease_obj.get_cascade_order("l1", leases, offers)
+
+        self.assertEqual(["l2", "l4", "o3", "l3", "o2"], [obj.uuid for obj in ordered])
+
+    def test_get_descendants(self):
+        lease = lease_obj.Lease(self.context, **self.test_lease_dict)
+        with mock.patch.object(
+            self.db_api, "lease_get_descendants", autospec=True
+        ) as mock_lgd:
+            mock_lgd.return_value = ([self.test_lease_dict], [])
+
+            leases, offers = lease_obj.Lease.get_descendants(lease.uuid, self.context)
+
+            mock_lgd.assert_called_once_with(lease.uuid)
+            self.assertEqual(1, len(leases))
+            self.assertIsInstance(leases[0], lease_obj.Lease)
+            self.assertEqual([], offers)
+
+    @mock.patch("esi_leap.objects.lease.Lease.resource_object")
+    @mock.patch("esi_leap.objects.lease.Lease.save")
+    @mock.patch("esi_leap.objects.lease.Lease._status_changed", return_value=True)
+    def test_fulfill_status_changed(self, mock_sc, mock_save, mock_ro):
+        lease = lease_obj.Lease(self.context, **self.test_lease_dict)
+
+        lease.fulfill()
+
+        mock_ro.assert_not_called()
+        mock_save.assert_not_called()
+        self.assertEqual(statuses.CREATED, lease.status)
+
+    @mock.patch("esi_leap.objects.lease.Lease.resource_object")
+    @mock.patch("esi_leap.objects.lease.Lease.save")
+    @mock.patch("esi_leap.objects.lease.Lease._status_changed", return_value=True)
+    def test_expire_status_changed(self, mock_sc, mock_save, mock_ro):
+        lease = lease_obj.Lease(self.context, **self.test_lease_dict)
+
+        lease._expire()
+
+        mock_ro.assert_not_called()
+        mock_save.assert_not_called()
+        self.assertEqual(statuses.CREATED, lease.status)
+
+    def test_status_changed(self):
+        lease = lease_obj.Lease(self.context, **self.test_lease_dict)
+        with mock.patch.object(
+            self.db_api, "lease_get_by_uuid", autospec=True
+        ) as mock_lgbu:
+            mock_lgbu.return_value = mock.Mock(status=statuses.CREATED)
+            self.assertFalse(lease._status_changed())
+
+            mock_lgbu.return_value = mock.Mock(status=statuses.ACTIVE)
+            self.assertTrue(lease._status_changed())
+
+            mock_lgbu.return_value = None
+            self.assertTrue(lease._status_changed())
+
+    @mock.patch("esi_leap.objects.offer.Offer._expire", autospec=True)
+    @mock.patch("esi_leap.objects.lease.Lease._expire", autospec=True)
+    @mock.patch("esi_leap.objects.lease.Lease.get_descendants")
+    def test_expire_cascade(self, mock_gd, mock_le, mock_oe):
+        mock_gd.return_value = self._get_lease_tree()
+        expired = []
+        mock_le.side_effect = lambda obj, context: expired.append(obj.uuid)
+        mock_oe.side_effect = lambda obj, context: expired.append(obj.uuid)
+        lease = lease_obj.Lease(self.context, uuid="l1")
+
+        lease.expire(self.context)
+
+        mock_gd.assert_called_once_with("l1", self.context)
+        self.assertEqual(["l2", "l4", "o3", "l3", "o2", "l1"], expired)
+
+    @mock.patch("esi_leap.objects.offer.Offer._cancel", autospec=True)
+    @mock.patch("esi_leap.objects.lease.Lease._cancel", autospec=True)
+    @mock.patch("esi_leap.objects.lease.Lease.get_descendants")
+    def test_cancel_cascade(self, mock_gd, mock_lc, mock_oc):
+        mock_gd.return_value = self._get_lease_tree()
+        cancelled = []
+        mock_lc.side_effect = lambda obj, context=None: cancelled.append(obj.uuid)
+        mock_oc.side_effect = lambda obj: cancelled.append(obj.uuid)
+        lease = lease_obj.Lease(self.context, uuid="l1")
+
+        lease.cancel()
+
+        mock_gd.assert_called_once_with("l1", None)
+        self.assertEqual(["l2", "l4", "o3", "l3", "o2", "l1"], cancelled)
+
     def test_save(self):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
         new_status = statuses.ACTIVE
@@ -719,10 +1062,38 @@ class TestLeaseObject(base.DBTestCase):
 
             updated_values = self.test_lease_dict.copy()
             updated_values["status"] = new_status
-            mock_lease_update.assert_called_once_with(lease.uuid, updated_values)
+            mock_lease_update.assert_called_once_with(
+                lease.uuid, updated_values, outbox=[]
+            )
             self.assertEqual(self.context, lease._context)
             self.assertEqual(updated_at, lease.updated_at)
 
+    @mock.patch("esi_leap.common.rpc.VERSIONED_NOTIFIER")
+    @mock.patch("esi_leap.objects.lease.Lease.resource_object")
+    def test_fulfill_outbox(self, mock_ro, mock_notifier):
+        self.config(use_outbox=True, notification_level="info", group="notification")
+        self.db_api.lease_create(self.test_lease_dict)
+        lease = lease_obj.Lease.get(self.test_lease_dict["uuid"], self.context)
+        mock_ro.return_value = FakeNode(uuidutils.generate_uuid(), "12345")
+
+        lease.fulfill()
+
+        self.assertEqual(statuses.ACTIVE, lease.status)
+        self.assertFalse(mock_notifier.prepare.called)
+        events = self.db_api.event_get_all({})
+        self.assertEqual(
+            ["esi_leap.lease.fulfill.start", "esi_leap.lease.fulfill.end"],
+            [e.event_type for e in events],
+        )
+        messages = self.db_api.outbox_get_undelivered(10)
+        self.assertEqual(
+            ["esi_leap.lease.fulfill.start", "esi_leap.lease.fulfill.end"],
+            [m.event_type for m in messages],
+        )
+        self.assertEqual(
+            lease.uuid, messages[0].payload["esi_leap_object.data"]["uuid"]
+        )
+
     @mock.patch("esi_leap.objects.lease.get_resource_object")
     def test_resource_object(self, mock_gro):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
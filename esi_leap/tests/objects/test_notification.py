@@ -79,7 +79,7 @@ class TestNotificationBase(test_base.TestCase):
         self,
         mock_notifier,
         mock_context,
-        mock_event_create,
+        mock_buffer_event,
         expected_event_type,
         expected_payload,
         expected_publisher,
@@ -97,11 +97,11 @@ class TestNotificationBase(test_base.TestCase):
             jsonutils.dumps(expected_payload, sort_keys=True),
             jsonutils.dumps(actual_payload, sort_keys=True),
         )
-        mock_event_create.assert_called_once()
+        mock_buffer_event.assert_called_once()
 
-    @mock.patch("esi_leap.objects.event.Event.create")
+    @mock.patch("esi_leap.objects.event.buffer_event")
     @mock.patch("esi_leap.common.rpc.VERSIONED_NOTIFIER")
-    def test_emit_notification(self, mock_notifier, mock_event_create):
+    def test_emit_notification(self, mock_notifier, mock_buffer_event):
         self.config(notification_level="debug", group="notification")
         payload = self.TestNotificationPayload(
             an_extra_field="extra", an_optional_field=1
@@ -126,7 +126,7 @@ class TestNotificationBase(test_base.TestCase):
         self._verify_notification(
             mock_notifier,
             mock_context,
-            mock_event_create,
+            mock_buffer_event,
             expected_event_type="esi_leap.test_object.test.start",
             expected_payload={
                 "esi_leap_object.name": "TestNotificationPayload",
@@ -219,9 +219,9 @@ class TestNotificationBase(test_base.TestCase):
         self.assertRaises(exception.NotificationPayloadError, notif.emit, mock_context)
         self.assertFalse(mock_notifier.called)
 
-    @mock.patch("esi_leap.objects.event.Event.create")
+    @mock.patch("esi_leap.objects.event.buffer_event")
     @mock.patch("esi_leap.common.rpc.VERSIONED_NOTIFIER")
-    def test_emit_notification_empty_schema(self, mock_notifier, mock_event_create):
+    def test_emit_notification_empty_schema(self, mock_notifier, mock_buffer_event):
         self.config(notification_level="debug", group="notification")
         payload = self.TestNotificationPayloadEmptySchema(fake_field="123")
         notif = self.TestNotificationEmptySchema(
@@ -243,7 +243,7 @@ class TestNotificationBase(test_base.TestCase):
         self._verify_notification(
             mock_notifier,
             mock_context,
-            mock_event_create,
+            mock_buffer_event,
             expected_event_type="esi_leap.test_object.test.error",
             expected_payload={
                 "esi_leap_object.name": "TestNotificationPayloadEmptySchema",
@@ -257,6 +257,75 @@ class TestNotificationBase(test_base.TestCase):
             notif_level=fields.NotificationLevel.ERROR,
         )
 
+    @mock.patch("esi_leap.objects.event.buffer_event")
+    @mock.patch("esi_leap.common.rpc.VERSIONED_NOTIFIER")
+    def test_get_outbox_entry(self, mock_notifier, mock_buffer_event):
+        self.config(notification_level="debug", group="notification")
+        payload = self.TestNotificationPayload(
+            an_extra_field="extra", an_optional_field=1
+        )
+        payload.populate_schema(test_obj=self.fake_obj)
+        notif = self.TestNotification(
+            event_type=notification.EventType(
+                object="test_object",
+                action="test",
+                status=fields.NotificationStatus.START,
+            ),
+            level=fields.NotificationLevel.DEBUG,
+            publisher=notification.NotificationPublisher(
+                service="esi-leap-api", host="host"
+            ),
+            payload=payload,
+        )
+
+        entry = notif.get_outbox_entry()
+
+        self.assertEqual(
+            {
+                "publisher_id": "esi-leap-api.host",
+                "event_type": "esi_leap.test_object.test.start",
+                "priority": fields.NotificationLevel.DEBUG,
+                "payload": {
+                    "esi_leap_object.name": "TestNotificationPayload",
+                    "esi_leap_object.data": {
+                        "fake_field_a": "fake1",
+                        "fake_field_b": 2,
+                        "an_extra_field": "extra",
+                        "an_optional_field": 1,
+                    },
+                    "esi_leap_object.version": "1.0",
+                    "esi_leap_object.namespace": "esi_leap",
+                },
+            },
+            entry["message"],
+        )
+        self.assertEqual(
+            "esi_leap.test_object.test.start", entry["event"]["event_type"]
+        )
+        self.assertFalse(mock_notifier.prepare.called)
+        self.assertFalse(mock_buffer_event.called)
+
+    def test_get_outbox_entry_level_too_low(self):
+        self.config(notification_level="warning", group="notification")
+        payload = self.TestNotificationPayload(
+            an_extra_field="extra", an_optional_field=1
+        )
+        payload.populate_schema(test_obj=self.fake_obj)
+        notif = self.TestNotification(
+            event_type=notification.EventType(
+                object="test_object",
+                action="test",
+                status=fields.NotificationStatus.START,
+            ),
+            level=fields.NotificationLevel.DEBUG,
+            publisher=notification.NotificationPublisher(
+                service="esi-leap-api", host="host"
+            ),
+            payload=payload,
+        )
+
+        self.assertIsNone(notif.get_outbox_entry())
+
     def test_populate_schema(self):
         payload = self.TestNotificationPayload(
             an_extra_field="extra", an_optional_field=1
@@ -87,6 +87,41 @@ class TestOfferObject(base.DBTestCase):
         self.assertIsInstance(offers[0], offer.Offer)
         self.assertEqual(self.context, offers[0]._context)
 
+    @mock.patch("esi_leap.db.sqlalchemy.api.offer_get_all_due_for_expiry")
+    def test_get_all_due_for_expiry(self, mock_ogadfe):
+        now = datetime.datetime(2016, 7, 16)
+        mock_ogadfe.return_value = [self.test_offer_data]
+
+        offers = offer.Offer.get_all_due_for_expiry(now, self.context)
+
+        mock_ogadfe.assert_called_once_with(now)
+        self.assertEqual(len(offers), 1)
+        self.assertIsInstance(offers[0], offer.Offer)
+        self.assertEqual(self.context, offers[0]._context)
+
+    @mock.patch("esi_leap.db.sqlalchemy.api.offer_search")
+    def test_search(self, mock_os):
+        start = datetime.datetime(2016, 7, 16)
+        end = datetime.datetime(2016, 7, 17)
+        mock_os.return_value = [self.test_offer_data]
+
+        offers = offer.Offer.search(
+            start,
+            end,
+            resource_type="dummy_node",
+            resource_uuids=["1718"],
+            lessee_id="lesseeid",
+            limit=4,
+            context=self.context,
+        )
+
+        mock_os.assert_called_once_with(
+            start, end, "dummy_node", ["1718"], "lesseeid", 4
+        )
+        self.assertEqual(len(offers), 1)
+        self.assertIsInstance(offers[0], offer.Offer)
+        self.assertEqual(self.context, offers[0]._context)
+
     @mock.patch("esi_leap.db.sqlalchemy.api.offer_get_conflict_times")
     @mock.patch("esi_leap.objects.offer.datetime")
     def test_get_availabilities_offer_in_future(self, mock_datetime, mock_ogct):
@@ -132,6 +167,54 @@ class TestOfferObject(base.DBTestCase):
         a = o.get_availabilities()
         self.assertEqual(a, expect)
 
+    @mock.patch("esi_leap.db.sqlalchemy.api.offer_get_conflict_times_many")
+    @mock.patch("esi_leap.db.sqlalchemy.api.offer_get_conflict_times")
+    @mock.patch("esi_leap.objects.offer.datetime")
+    def test_get_availabilities_many(self, mock_datetime, mock_ogct, mock_ogctm):
+        o1 = offer.Offer(self.context, **self.test_offer_data)
+        o2 = offer.Offer(
+            self.context, **dict(self.test_offer_data, uuid=uuidutils.generate_uuid())
+        )
+        o3 = offer.Offer(
+            self.context,
+            **dict(
+                self.test_offer_data,
+                uuid=uuidutils.generate_uuid(),
+                status=statuses.DELETED,
+            ),
+        )
+
+        now = o1.start_time + datetime.timedelta(days=10)
+        mock_datetime.datetime.now = mock.Mock(return_value=now)
+        o1_conflicts = [
+            (
+                o1.start_time + datetime.timedelta(days=5),
+                o1.start_time + datetime.timedelta(days=15),
+            ),
+            (
+                o1.start_time + datetime.timedelta(days=50),
+                o1.start_time + datetime.timedelta(days=60),
+            ),
+        ]
+        mock_ogctm.return_value = [(o1.uuid, s, e) for s, e in o1_conflicts]
+
+        avails = offer.Offer.get_availabilities_many([o1, o2, o3])
+
+        mock_ogctm.assert_called_once_with([o1.uuid, o2.uuid])
+        mock_ogct.return_value = o1_conflicts
+        self.assertEqual(o1.get_availabilities(), avails[o1.uuid])
+        self.assertEqual([[now, o2.end_time]], avails[o2.uuid])
+        self.assertEqual([], avails[o3.uuid])
+
+    @mock.patch("esi_leap.db.sqlalchemy.api.offer_get_conflict_times_many")
+    def test_get_availabilities_many_none_available(self, mock_ogctm):
+        o = offer.Offer(
+            self.context, **dict(self.test_offer_data, status=statuses.EXPIRED)
+        )
+
+        self.assertEqual({o.uuid: []}, offer.Offer.get_availabilities_many([o]))
+        mock_ogctm.assert_not_called()
+
     @mock.patch("esi_leap.db.sqlalchemy.api.offer_get_conflict_times")
     @mock.patch("esi_leap.objects.offer.datetime")
     def test_get_availabilities_conflicts_in_future(self, mock_datetime, mock_ogct):
@@ -239,6 +322,82 @@ class TestOfferObject(base.DBTestCase):
         )
         mock_oc.assert_called_once_with(self.test_offer_create_data)
 
+    @mock.patch("esi_leap.db.sqlalchemy.api.offer_create_many")
+    @mock.patch("esi_leap.db.sqlalchemy.api.resource_get_conflicts_many")
+    def test_create_many(self, mock_rgcm, mock_ocm):
+        start = self.test_offer_create_data["start_time"]
+        offers = [
+            # created
+            offer.Offer(self.context, **self.test_offer_create_data),
+            # invalid time range
+            offer.Offer(
+                self.context,
+                **dict(self.test_offer_create_data, end_time=start),
+            ),
+            # conflicts with an existing offer or lease
+            offer.Offer(
+                self.context,
+                **dict(self.test_offer_create_data, resource_uuid="1819"),
+            ),
+            # overlaps the first offer
+            offer.Offer(
+                self.context,
+                **dict(
+                    self.test_offer_create_data,
+                    start_time=start + datetime.timedelta(days=50),
+                ),
+            ),
+        ]
+        mock_rgcm.return_value = [1]
+        mock_ocm.return_value = [self.test_offer_data]
+
+        errors = offer.Offer.create_many(offers, self.context)
+
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], exception.InvalidTimeRange)
+        self.assertIsInstance(errors[2], exception.ResourceTimeConflict)
+        self.assertIsInstance(errors[3], exception.ResourceTimeConflict)
+        self.assertEqual(3, len(mock_rgcm.call_args[0][0]))
+        mock_ocm.assert_called_once_with([self.test_offer_create_data])
+        self.assertEqual(self.test_offer_data["id"], offers[0].id)
+
+    @mock.patch("esi_leap.db.sqlalchemy.api.offer_create_many")
+    @mock.patch("esi_leap.db.sqlalchemy.api.resource_get_conflicts_many")
+    @mock.patch("esi_leap.objects.lease.Lease.get")
+    def test_create_many_with_parent_lease(self, mock_lg, mock_rgcm, mock_ocm):
+        start = self.test_offer_create_data["start_time"]
+        self.test_parent_lease.start_time = start
+        self.test_parent_lease.end_time = start + datetime.timedelta(days=10)
+        mock_lg.return_value = self.test_parent_lease
+        offers = [
+            offer.Offer(
+                self.context,
+                **dict(
+                    self.test_offer_create_parent_lease_data,
+                    end_time=start + datetime.timedelta(days=5),
+                ),
+            ),
+            # outside of the parent lease
+            offer.Offer(
+                self.context,
+                **dict(
+                    self.test_offer_create_parent_lease_data,
+                    start_time=start + datetime.timedelta(days=5),
+                ),
+            ),
+        ]
+        mock_rgcm.return_value = []
+        mock_ocm.return_value = [self.test_offer_data]
+
+        errors = offer.Offer.create_many(offers, self.context)
+
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], exception.LeaseNoTimeAvailabilities)
+        mock_lg.assert_called_once_with(
+            self.test_offer_create_parent_lease_data["parent_lease_uuid"]
+        )
+        mock_ocm.assert_called_once()
+
     def test_create_invalid_time(self):
         start = self.test_offer_data["start_time"]
         bad_offer = {
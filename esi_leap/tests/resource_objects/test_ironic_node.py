@@ -16,6 +16,7 @@ from ironicclient.common.apiclient import exceptions as ir_exception
 import mock
 
 from esi_leap.common import exception
+from esi_leap.common import ironic
 from esi_leap.common import statuses
 from esi_leap.resource_objects import ironic_node
 from esi_leap.tests import base
@@ -49,6 +50,12 @@ class FakeLease(object):
 
 
 class TestIronicNode(base.TestCase):
+    def setUp(self):
+        super(TestIronicNode, self).setUp()
+        patcher = mock.patch.object(ironic_node, "get_api_rpcapi", autospec=True)
+        self.mock_api_rpcapi = patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_resource_type(self):
         test_ironic_node = ironic_node.IronicNode(fake_uuid)
         self.assertEqual("ironic_node", test_ironic_node.resource_type)
@@ -57,6 +64,31 @@ class TestIronicNode(base.TestCase):
         test_ironic_node = ironic_node.IronicNode(fake_uuid)
         self.assertEqual(fake_uuid, test_ironic_node.get_uuid())
 
+    @mock.patch("esi_leap.common.ironic.get_cached_node_list")
+    def test_get_uuids_by_resource_class(self, mock_gcnl):
+        mock_gcnl.return_value = ironic.NodeIndex([FakeIronicNode()])
+
+        self.assertEqual(
+            [fake_uuid],
+            ironic_node.IronicNode.get_uuids_by_resource_class("baremetal"),
+        )
+        self.assertEqual([], ironic_node.IronicNode.get_uuids_by_resource_class("fake"))
+
+    @mock.patch("esi_leap.common.ironic.get_node_list")
+    def test_get_many(self, mock_gnl):
+        fake_node = FakeIronicNode()
+        mock_gnl.return_value = [fake_node]
+
+        resources = ironic_node.IronicNode.get_many(
+            [fake_uuid, fake_node.name, "missing"]
+        )
+
+        mock_gnl.assert_called_once_with(fields=ironic.ENRICHMENT_FIELDS)
+        self.assertEqual({fake_uuid, fake_node.name}, set(resources))
+        for resource in resources.values():
+            self.assertEqual(fake_uuid, resource.get_uuid())
+            self.assertEqual(fake_node.owner, resource.get_owner_project_id())
+
     @mock.patch("esi_leap.resource_objects.ironic_node.IronicNode._get_node")
     def test_get_name(self, mock_gn):
         test_ironic_node = ironic_node.IronicNode(fake_uuid)
@@ -154,7 +186,14 @@ class TestIronicNode(base.TestCase):
         test_ironic_node = ironic_node.IronicNode(fake_uuid)
         fake_lease = FakeLease()
 
-        test_ironic_node.set_lease(fake_lease)
+        with mock.patch.object(
+            ironic_node.ironic, "invalidate_node", autospec=True
+        ) as mock_invalidate:
+            test_ironic_node.set_lease(fake_lease)
+            mock_invalidate.assert_called_once_with(fake_uuid)
+        self.mock_api_rpcapi.return_value.invalidate_node.assert_called_once_with(
+            mock.ANY, fake_uuid
+        )
         client_mock.assert_called_once()
         client_mock.return_value.node.update.assert_called_once_with(
             fake_uuid,
@@ -286,3 +325,11 @@ class TestIronicNode(base.TestCase):
         test_unknown_node = ironic_node.IronicNode(fake_uuid)
 
         self.assertRaises(exception.NodeNotFound, test_unknown_node._get_node)
+
+    @mock.patch.object(ironic_node.ironic, "invalidate_node", autospec=True)
+    def test_invalidate_node_publish_error(self, mock_invalidate):
+        self.mock_api_rpcapi.return_value.invalidate_node.side_effect = Exception("bad")
+
+        ironic_node.invalidate_node(fake_uuid)
+
+        mock_invalidate.assert_called_once_with(fake_uuid)